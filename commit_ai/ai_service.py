@@ -5,28 +5,391 @@ Este módulo gerencia a comunicação com diferentes provedores de IA
 (OpenAI, Google Gemini, Anthropic Claude, Ollama) para gerar mensagens de commit.
 """
 
+import asyncio
+import importlib.util
 import os
+import random
 import re
-from typing import Optional, Dict, Any
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional, Dict, Any, Callable, Iterable, Iterator, List, Tuple, Union
 import requests
+from requests.adapters import HTTPAdapter
 from .logger import logger
-from .cache import CommitCache
+from .batch import BatchProcessor
+from .cache import CommitCache, add_invalidation_listener
 from .templates import CommitTemplateManager
 
-# Importações condicionais para providers
+# SDK de cada provider; importado apenas quando o provider é usado
+# para não pesar na inicialização da CLI (None = usa apenas requests)
+_PROVIDER_MODULES = {
+    'openai': 'openai',
+    'gemini': None,
+    'claude': 'anthropic',
+    'ollama': 'ollama'
+}
+
+
+@lru_cache(maxsize=None)
+def _is_available(provider: str) -> bool:
+    """Verifica se o SDK do provider está instalado, sem importá-lo"""
+    module = _PROVIDER_MODULES.get(provider)
+    if module is None:
+        return provider in _PROVIDER_MODULES
+    available = importlib.util.find_spec(module) is not None
+    if not available:
+        logger.debug(f"{module} não disponível - instale com: pip install {module}")
+    return available
+
 try:
-    import anthropic
-    ANTHROPIC_AVAILABLE = True
+    import httpx
+    HTTPX_AVAILABLE = True
 except ImportError:
-    ANTHROPIC_AVAILABLE = False
-    logger.debug("Anthropic não disponível - instale com: pip install anthropic")
+    HTTPX_AVAILABLE = False
+    logger.debug("httpx não disponível - instale com: pip install httpx")
 
 try:
-    import ollama
-    OLLAMA_AVAILABLE = True
+    import h2  # noqa: F401 - habilita HTTP/2 no httpx
+    HTTP2_AVAILABLE = True
 except ImportError:
-    OLLAMA_AVAILABLE = False
-    logger.debug("Ollama não disponível - instale com: pip install ollama")
+    HTTP2_AVAILABLE = False
+
+# Sessão HTTP compartilhada pelas chamadas REST: reaproveita conexões
+# TCP/TLS (keep-alive) em vez de abrir uma nova a cada requisição
+_SESSION = requests.Session()
+
+# Pool maior que o padrão (10 por host) para não serializar chamadas
+# concorrentes; retentativas ficam a cargo do próprio serviço
+_ADAPTER = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=0)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+
+# Cliente httpx compartilhado pelos SDKs, criado sob demanda
+_SDK_HTTP_CLIENT = None
+
+
+def _get_sdk_http_client():
+    """Retorna o cliente httpx compartilhado pelos SDKs (HTTP/2 quando disponível)"""
+    global _SDK_HTTP_CLIENT
+    if _SDK_HTTP_CLIENT is None:
+        _SDK_HTTP_CLIENT = httpx.Client(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(AIService.DEFAULT_READ_TIMEOUT, connect=AIService.DEFAULT_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+        )
+    return _SDK_HTTP_CLIENT
+
+
+@lru_cache(maxsize=None)
+def _get_ollama_client(connect_timeout: float, read_timeout: float):
+    """
+    Retorna o cliente Ollama compartilhado para os timeouts informados
+    
+    Todas as instâncias de AIService reaproveitam o mesmo pool de conexões
+    keep-alive com o servidor local em vez de abrir um novo por instância.
+    """
+    import ollama
+    return ollama.Client(timeout=httpx.Timeout(read_timeout, connect=connect_timeout))
+
+
+# Partes constantes dos prompts, montadas uma única vez
+_PROMPT_HEAD = """Analise as seguintes alterações de código Git e gere uma mensagem de commit concisa e descritiva em português brasileiro.
+
+REGRAS PARA A MENSAGEM:
+1. Use no máximo 72 caracteres
+2. Comece com um verbo no imperativo (Add, Fix, Update, Remove, etc.)
+3. Seja específico sobre o que foi alterado
+4. Não inclua explicações longas
+5. Use formato convencional: "tipo: descrição breve"
+
+TIPOS COMUNS:
+- feat: nova funcionalidade
+- fix: correção de bug
+- docs: documentação
+- style: formatação
+- refactor: refatoração
+- test: testes
+- chore: tarefas de manutenção
+
+ALTERAÇÕES GIT:
+```
+"""
+
+_PROMPT_TAIL = """
+```
+
+MENSAGEM DE COMMIT:"""
+
+_ENHANCED_PROMPT_BASE = """Você é um assistente especializado em gerar mensagens de commit Git profissionais.
+
+Regras para a mensagem de commit:
+1. Use o formato: <tipo>: <descrição>
+2. Tipos válidos: feat, fix, docs, style, refactor, test, chore, perf, ci, build
+3. Máximo 50 caracteres no título
+4. Use imperativos (adiciona, corrige, atualiza)
+5. Seja específico e claro
+6. Use português brasileiro
+7. Não use pontos finais no título
+
+Exemplos:
+- feat: adiciona sistema de cache SQLite
+- fix: corrige validação de entrada do usuário
+- docs: atualiza documentação da API
+- refactor: melhora estrutura do código de login"""
+
+_ENHANCED_PROMPT_FOOTER = "\n\nAnalise as alterações e gere APENAS a mensagem de commit, sem explicações adicionais."
+
+# Cache em memória (LRU) na frente do SQLite, compartilhado no processo.
+# Cada entrada guarda (expira_em, mensagem) e respeita o max_age do CommitCache.
+_MEMORY_CACHE_SIZE = 256
+_MEMORY_CACHE: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+_MEMORY_CACHE_LOCK = threading.Lock()
+
+
+def _memory_cache_get(key: str) -> Optional[str]:
+    """Busca no cache em memória, marcando a entrada como usada recentemente"""
+    with _MEMORY_CACHE_LOCK:
+        entry = _MEMORY_CACHE.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, message = entry
+        if time.monotonic() >= expires_at:
+            del _MEMORY_CACHE[key]
+            return None
+        
+        _MEMORY_CACHE.move_to_end(key)
+        return message
+
+
+def _memory_cache_set(key: str, message: str, ttl: float) -> None:
+    """Armazena no cache em memória, descartando a entrada menos usada se cheio"""
+    with _MEMORY_CACHE_LOCK:
+        _MEMORY_CACHE[key] = (time.monotonic() + ttl, message)
+        _MEMORY_CACHE.move_to_end(key)
+        if len(_MEMORY_CACHE) > _MEMORY_CACHE_SIZE:
+            _MEMORY_CACHE.popitem(last=False)
+
+
+def _memory_cache_invalidate(keys: Optional[Iterable[str]] = None) -> None:
+    """Remove chaves do cache em memória (todas, se keys for None)"""
+    with _MEMORY_CACHE_LOCK:
+        if keys is None:
+            _MEMORY_CACHE.clear()
+            return
+        for key in keys:
+            _MEMORY_CACHE.pop(key, None)
+
+
+# Gravações e limpezas no CommitCache invalidam as cópias em memória
+add_invalidation_listener(_memory_cache_invalidate)
+
+
+# Regexes pré-compiladas usadas em _clean_commit_message
+_WS_RE = re.compile(r'\s+')
+_PREFIX_RE = re.compile(
+    r'^(?:mensagem de commit:|a mensagem de commit seria:|commit message:|commit:|resposta:|```\w*)\s*',
+    re.IGNORECASE
+)
+
+# Linhas do cabeçalho de cada arquivo no diff que não ajudam a descrever a alteração
+_DIFF_METADATA_PREFIXES = ('index ', '--- ', '+++ ')
+
+
+def _strip_diff_metadata(lines: List[str]) -> List[str]:
+    """
+    Remove as linhas 'index', '---' e '+++' dos cabeçalhos de arquivo do diff
+    
+    O nome do arquivo continua na linha 'diff --git'. Linhas dentro dos hunks
+    nunca são removidas, mesmo que comecem com os mesmos prefixos.
+    
+    Args:
+        lines: Linhas do diff
+        
+    Returns:
+        List[str]: Linhas sem os metadados
+    """
+    kept = []
+    in_header = False
+    for line in lines:
+        if line.startswith('diff --git '):
+            in_header = True
+        elif line.startswith('@@'):
+            in_header = False
+        elif in_header and line.startswith(_DIFF_METADATA_PREFIXES):
+            continue
+        kept.append(line)
+    return kept
+
+
+def prepare_diff(diff_text: str, max_chars: int) -> str:
+    """
+    Reduz o diff antes de enviá-lo a um modelo
+    
+    Os metadados dos cabeçalhos de arquivo são sempre removidos. Se o diff
+    exceder o limite, remove também as linhas de contexto (mantendo
+    cabeçalhos, hunks e linhas alteradas); se ainda exceder, mantém o
+    início e o fim do diff e omite o meio.
+    
+    Args:
+        diff_text: Diff das alterações do Git
+        max_chars: Tamanho máximo em caracteres (0 desativa o limite)
+        
+    Returns:
+        str: Diff dentro do limite
+    """
+    lines = _strip_diff_metadata(diff_text.splitlines())
+    prepared = "\n".join(lines)
+    
+    if not max_chars or len(prepared) <= max_chars:
+        return prepared
+    
+    lines = [line for line in lines if not line.startswith(' ')]
+    prepared = "\n".join(lines)
+    
+    if len(prepared) > max_chars:
+        budget = max(0, max_chars - 32) // 2  # reserva espaço para o marcador
+        
+        # Linhas maiores que a metade do limite (JS minificado, lockfiles) são
+        # cortadas; senão nem o início nem o fim caberiam e o diff ficaria vazio
+        lines = [line if len(line) <= budget else line[:max(0, budget - 4)] + "..."
+                 for line in lines]
+        
+        head, size = [], 0
+        for line in lines:
+            size += len(line) + 1
+            if size > budget:
+                break
+            head.append(line)
+        
+        tail, size = [], 0
+        for line in reversed(lines[len(head):]):
+            size += len(line) + 1
+            if size > budget:
+                break
+            tail.append(line)
+        tail.reverse()
+        
+        omitted = len(lines) - len(head) - len(tail)
+        marker = [f"...[{omitted} linhas omitidas]..."] if omitted else []
+        prepared = "\n".join(head + marker + tail)
+    
+    logger.debug(f"Diff reduzido de {len(diff_text)} para {len(prepared)} caracteres")
+    return prepared
+
+
+def ollama_num_ctx(max_diff_chars: int, prompt_chars: int, max_tokens: int) -> int:
+    """
+    Dimensiona o num_ctx do Ollama para o maior prompt possível
+    
+    Usa ~3 caracteres por token mais a resposta, arredondado para múltiplos
+    de 1024. O valor deve ser fixo por configuração: mudá-lo a cada chamada
+    faria o Ollama recarregar o modelo.
+    
+    Args:
+        max_diff_chars: Limite de caracteres do diff
+        prompt_chars: Tamanho aproximado do prompt sem o diff
+        max_tokens: Limite de tokens da resposta
+        
+    Returns:
+        int: Tamanho do contexto em tokens
+    """
+    tokens = (max_diff_chars + prompt_chars) // 3 + max_tokens
+    return -(-tokens // 1024) * 1024
+
+
+# Status HTTP transitórios que justificam uma nova tentativa
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+def _is_transient_error(error: Exception) -> bool:
+    """Indica se o erro é transitório (rede, timeout, 429 ou 5xx)"""
+    if isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError,
+                          ConnectionError, TimeoutError)):
+        return True
+    if HTTPX_AVAILABLE and isinstance(error, httpx.TransportError):
+        return True
+    
+    status_code = getattr(error, 'status_code', None)
+    response = getattr(error, 'response', None)
+    if status_code is None and response is not None:
+        status_code = getattr(response, 'status_code', None)
+    return status_code in RETRYABLE_STATUS_CODES
+
+
+def _retry_delay(error: Exception, attempt: int, base: float = 1.0, cap: float = 10.0) -> float:
+    """
+    Calcula a espera antes da próxima tentativa
+    
+    Respeita o header Retry-After quando presente; caso contrário usa
+    backoff exponencial com jitter.
+    
+    Args:
+        error: Erro que causou a nova tentativa
+        attempt: Número da tentativa que falhou (começando em 0)
+        base: Espera inicial em segundos
+        cap: Espera máxima do backoff em segundos
+        
+    Returns:
+        float: Segundos a aguardar
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    retry_after = headers.get('Retry-After') if hasattr(headers, 'get') else None
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except (TypeError, ValueError):
+            pass  # Formato de data HTTP: cai no backoff padrão
+    
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class AsyncTokenBucket:
+    """
+    Limitador de taxa assíncrono (token bucket)
+    
+    Permite rajadas até a capacidade e repõe os tokens continuamente ao longo
+    do período. Compartilhado por todas as chamadas concorrentes do serviço.
+    """
+    
+    def __init__(self, capacity: float, period: float = 60.0):
+        """
+        Inicializa o limitador
+        
+        Args:
+            capacity: Tokens disponíveis por período
+            period: Duração do período em segundos (padrão: 60)
+        """
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+    
+    def _refill(self):
+        """Repõe os tokens proporcionalmente ao tempo decorrido"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+    
+    async def acquire(self, amount: float = 1.0):
+        """
+        Aguarda até que haja tokens suficientes e os consome
+        
+        Args:
+            amount: Quantidade de tokens (limitada à capacidade)
+        """
+        amount = min(float(amount), self.capacity)
+        while True:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return
+            await asyncio.sleep((amount - self._tokens) / self.rate)
 
 
 class AIService:
@@ -55,9 +418,38 @@ class AIService:
         }
     }
     
+    # Limite padrão de chamadas simultâneas em abatch()
+    DEFAULT_MAX_CONCURRENCY = 8
+    
+    # Timeouts padrão (segundos) para conexão e leitura
+    DEFAULT_CONNECT_TIMEOUT = 5.0
+    DEFAULT_READ_TIMEOUT = 30.0
+    
+    # Número padrão de novas tentativas para erros transitórios
+    DEFAULT_MAX_RETRIES = 3
+    
+    # Tamanho máximo (caracteres) do diff enviado ao provider
+    DEFAULT_MAX_DIFF_CHARS = 8000
+    
+    # Tempo máximo (segundos) de cada geração dentro de abatch()
+    DEFAULT_REQUEST_TIMEOUT = 60.0
+    
+    # Tempo que o Ollama mantém o modelo carregado após cada requisição
+    OLLAMA_KEEP_ALIVE = "30m"
+    
+    # Tamanho aproximado do prompt sem o diff, usado para dimensionar num_ctx
+    OLLAMA_PROMPT_CHARS = 2000
+    
     def __init__(self, provider: str = 'openai', model: Optional[str] = None, 
                  max_tokens: int = 100, temperature: float = 0.3, use_cache: bool = True,
-                 use_templates: bool = True):
+                 use_templates: bool = True, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT, max_retries: int = DEFAULT_MAX_RETRIES,
+                 max_diff_chars: int = DEFAULT_MAX_DIFF_CHARS,
+                 race_providers: Optional[List[str]] = None, stream: bool = False,
+                 on_token: Optional[Callable[[str], None]] = None,
+                 request_timeout: Optional[float] = DEFAULT_REQUEST_TIMEOUT,
+                 prewarm: bool = False, requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None):
         """
         Inicializa o serviço de IA
         
@@ -68,12 +460,47 @@ class AIService:
             temperature: Criatividade da resposta (0.0-1.0)
             use_cache: Se deve usar cache (padrão: True)
             use_templates: Se deve usar templates personalizados (padrão: True)
+            connect_timeout: Timeout de conexão em segundos (padrão: 5)
+            read_timeout: Timeout de leitura em segundos (padrão: 30)
+            max_retries: Novas tentativas em erros transitórios (padrão: 3)
+            max_diff_chars: Tamanho máximo do diff enviado; 0 desativa o corte (padrão: 8000)
+            race_providers: Providers adicionais consultados em paralelo; vence a
+                primeira resposta bem-sucedida (padrão: nenhum)
+            stream: Se deve receber a resposta em streaming (OpenAI, Claude e Ollama)
+            on_token: Função chamada com cada trecho recebido em streaming
+                (padrão: escreve no stdout)
+            request_timeout: Tempo máximo de cada geração em abatch; None desativa (padrão: 60)
+            prewarm: Se deve abrir a conexão HTTPS com o provider em segundo plano
+                já na inicialização (padrão: False)
+            requests_per_minute: Limite de requisições por minuto nas chamadas
+                assíncronas; None desativa (padrão: None)
+            tokens_per_minute: Limite estimado de tokens por minuto nas chamadas
+                assíncronas; None desativa (padrão: None)
         """
         self.provider = provider.lower()
         self.max_tokens = max_tokens
         self.temperature = temperature
         self.use_cache = use_cache
         self.use_templates = use_templates
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max(0, max_retries)
+        self.max_diff_chars = max_diff_chars
+        self.race_providers = [
+            p.lower() for p in dict.fromkeys(race_providers or [])
+            if p.lower() != provider.lower()
+        ]
+        self._race_services = None
+        self.stream = stream
+        self.on_token = on_token
+        self.request_timeout = request_timeout
+        self._rpm_limiter = AsyncTokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tpm_limiter = AsyncTokenBucket(tokens_per_minute) if tokens_per_minute else None
+        
+        # Clientes assíncronos, criados sob demanda para o event loop em uso
+        self._aclient = None
+        self._async_client = None
+        self._async_loop = None
         
         logger.debug(f"Inicializando AIService: provider={provider}, max_tokens={max_tokens}, temperature={temperature}, cache={use_cache}, templates={use_templates}")
         
@@ -82,16 +509,22 @@ class AIService:
             supported = ', '.join(self.SUPPORTED_PROVIDERS.keys())
             raise ValueError(f"Provider '{provider}' não suportado. Use: {supported}")
         
+        for race_provider in self.race_providers:
+            if race_provider not in self.SUPPORTED_PROVIDERS:
+                supported = ', '.join(self.SUPPORTED_PROVIDERS.keys())
+                raise ValueError(f"Provider '{race_provider}' não suportado. Use: {supported}")
+        
         # Verificar disponibilidade do provider
-        if self.provider == 'claude' and not ANTHROPIC_AVAILABLE:
+        if self.provider == 'claude' and not _is_available('claude'):
             raise ImportError("Anthropic Claude não disponível. Instale com: pip install anthropic")
         
-        if self.provider == 'ollama' and not OLLAMA_AVAILABLE:
+        if self.provider == 'ollama' and not _is_available('ollama'):
             raise ImportError("Ollama não disponível. Instale com: pip install ollama")
         
         # Inicializar cache se habilitado
         if self.use_cache:
             self.cache = CommitCache()
+            self._memory_ttl = self.cache.max_age.total_seconds()
         else:
             self.cache = None
         
@@ -115,17 +548,64 @@ class AIService:
         
         # Inicializar cliente específico do provider
         self._init_provider_client()
+        
+        # Funções de geração do provider, resolvidas uma única vez
+        self._generate = {
+            'openai': self._generate_openai,
+            'gemini': self._generate_gemini,
+            'claude': self._generate_claude,
+            'ollama': self._generate_ollama
+        }[self.provider]
+        self._agenerate = {
+            'openai': self._agenerate_openai,
+            'gemini': self._agenerate_gemini,
+            'claude': self._agenerate_claude,
+            'ollama': self._agenerate_ollama
+        }[self.provider]
+        
+        if prewarm:
+            self._prewarm_connection()
     
-    def _init_provider_client(self):
-        """Inicializa o cliente específico para cada provider"""
-        if self.provider == 'openai':
-            self._init_openai_client()
+    def _prewarm_connection(self):
+        """
+        Abre a conexão HTTPS com o provider em uma thread daemon
+        
+        O handshake TLS acontece enquanto o usuário ainda revisa as alterações,
+        e a conexão fica no pool de keep-alive para a chamada de geração.
+        No Ollama, um prompt vazio apenas carrega o modelo na memória.
+        """
+        if self.provider == 'openai' and HTTPX_AVAILABLE:
+            client = _get_sdk_http_client()
+            warm = lambda: client.head("https://api.openai.com/v1/models", timeout=5)
         elif self.provider == 'gemini':
-            self._init_gemini_client()
-        elif self.provider == 'claude':
-            self._init_claude_client()
+            warm = lambda: _SESSION.head("https://generativelanguage.googleapis.com/", timeout=5)
+        elif self.provider == 'claude' and hasattr(self.client, 'models'):
+            # O SDK mantém o próprio pool: aquece com uma listagem mínima
+            warm = lambda: self.client.with_options(max_retries=0, timeout=5).models.list(limit=1)
         elif self.provider == 'ollama':
-            self._init_ollama_client()
+            # Mesmo num_ctx da geração: outro valor faria o Ollama recarregar o modelo
+            warm = lambda: self.client.generate(model=self.model, prompt='', options=self._ollama_options(),
+                                                keep_alive=self.OLLAMA_KEEP_ALIVE)
+        else:
+            return
+        
+        def run():
+            try:
+                warm()
+                logger.debug(f"Conexão com {self.provider} pré-aquecida")
+            except Exception as e:
+                logger.debug(f"Falha ao pré-aquecer conexão com {self.provider}: {e}")
+        
+        threading.Thread(target=run, name="commit-ai-prewarm", daemon=True).start()
+    
+    def _init_provider_client(self):
+        """Inicializa o cliente específico para cada provider"""
+        {
+            'openai': self._init_openai_client,
+            'gemini': self._init_gemini_client,
+            'claude': self._init_claude_client,
+            'ollama': self._init_ollama_client
+        }[self.provider]()
     
     def _init_openai_client(self):
         """Inicializa cliente OpenAI"""
@@ -135,7 +615,13 @@ class AIService:
             if not self.api_key:
                 raise ValueError("OPENAI_API_KEY não configurada")
             
-            self.client = openai.OpenAI(api_key=self.api_key)
+            if HTTPX_AVAILABLE:
+                self.client = openai.OpenAI(api_key=self.api_key, max_retries=self.max_retries,
+                                            timeout=self._sdk_timeout(openai),
+                                            http_client=_get_sdk_http_client())
+            else:
+                self.client = openai.OpenAI(api_key=self.api_key, max_retries=self.max_retries,
+                                            timeout=self._sdk_timeout(openai))
             logger.debug("Cliente OpenAI inicializado com sucesso")
         except ImportError:
             raise ImportError("OpenAI não disponível. Instale com: pip install openai")
@@ -152,24 +638,26 @@ class AIService:
     
     def _init_claude_client(self):
         """Inicializa cliente Anthropic Claude"""
-        if not ANTHROPIC_AVAILABLE:
+        if not _is_available('claude'):
             raise ImportError("Anthropic não disponível")
+        import anthropic
         
         self.api_key = os.getenv('ANTHROPIC_API_KEY')
         if not self.api_key:
             raise ValueError("ANTHROPIC_API_KEY não configurada")
         
-        self.client = anthropic.Anthropic(api_key=self.api_key)
+        self.client = anthropic.Anthropic(api_key=self.api_key, max_retries=self.max_retries,
+                                          timeout=self._sdk_timeout(anthropic))
         logger.debug("Cliente Claude inicializado com sucesso")
     
     def _init_ollama_client(self):
         """Inicializa cliente Ollama"""
-        if not OLLAMA_AVAILABLE:
+        if not _is_available('ollama'):
             raise ImportError("Ollama não disponível")
         
         # Ollama geralmente roda localmente, sem API key necessária
         try:
-            self.client = ollama.Client()
+            self.client = _get_ollama_client(self.connect_timeout, self.read_timeout)
             logger.debug("Cliente Ollama inicializado com sucesso")
         except Exception as e:
             logger.error(f"Erro ao conectar com Ollama: {e}")
@@ -187,12 +675,7 @@ class AIService:
         if provider not in cls.SUPPORTED_PROVIDERS:
             return False
         
-        if provider == 'claude':
-            return ANTHROPIC_AVAILABLE
-        elif provider == 'ollama':
-            return OLLAMA_AVAILABLE
-        else:
-            return True  # OpenAI e Gemini são sempre disponíveis
+        return _is_available(provider)
     
     def _get_api_key(self) -> Optional[str]:
         """
@@ -226,32 +709,7 @@ class AIService:
         Returns:
             str: Prompt formatado
         """
-        prompt = f"""Analise as seguintes alterações de código Git e gere uma mensagem de commit concisa e descritiva em português brasileiro.
-
-REGRAS PARA A MENSAGEM:
-1. Use no máximo 72 caracteres
-2. Comece com um verbo no imperativo (Add, Fix, Update, Remove, etc.)
-3. Seja específico sobre o que foi alterado
-4. Não inclua explicações longas
-5. Use formato convencional: "tipo: descrição breve"
-
-TIPOS COMUNS:
-- feat: nova funcionalidade
-- fix: correção de bug
-- docs: documentação
-- style: formatação
-- refactor: refatoração
-- test: testes
-- chore: tarefas de manutenção
-
-ALTERAÇÕES GIT:
-```
-{diff_text}
-```
-
-MENSAGEM DE COMMIT:"""
-        
-        return prompt
+        return f"{_PROMPT_HEAD}{diff_text}{_PROMPT_TAIL}"
     
     def _call_openai_api(self, prompt: str) -> str:
         """
@@ -290,8 +748,7 @@ MENSAGEM DE COMMIT:"""
         }
         
         try:
-            response = requests.post(url, json=data, headers=headers, timeout=30)
-            response.raise_for_status()
+            response = self._post_with_retries(url, json=data, headers=headers)
             
             result = response.json()
             message = result['choices'][0]['message']['content'].strip()
@@ -342,8 +799,7 @@ MENSAGEM DE COMMIT:"""
         }
         
         try:
-            response = requests.post(url, json=data, headers=headers, params=params, timeout=30)
-            response.raise_for_status()
+            response = self._post_with_retries(url, json=data, headers=headers, params=params)
             
             result = response.json()
             message = result['candidates'][0]['content']['parts'][0]['text'].strip()
@@ -365,10 +821,14 @@ MENSAGEM DE COMMIT:"""
             str: Mensagem limpa e formatada
         """
         # Remove quebras de linha e espaços extras
-        message = re.sub(r'\s+', ' ', message.strip())
+        message = _WS_RE.sub(' ', message.strip())
         
-        # Remove aspas se presentes
-        message = message.strip('"\'`')
+        # Remove aspas e prefixos como "Mensagem de commit:", mesmo encadeados
+        while True:
+            stripped = _PREFIX_RE.sub('', message.strip('"\'` '), count=1)
+            if stripped == message:
+                break
+            message = stripped
         
         # Limita o tamanho da mensagem
         if len(message) > 72:
@@ -376,12 +836,14 @@ MENSAGEM DE COMMIT:"""
         
         return message
     
-    def generate_commit_message(self, diff_text: str) -> str:
+    def generate_commit_message(self, diff_text: str, tree_hash: Optional[str] = None) -> str:
         """
         Gera uma mensagem de commit baseada no diff
         
         Args:
             diff_text: Diff das alterações do Git
+            tree_hash: Identificador das árvores Git do diff (opcional); usado
+                como chave de cache no lugar do hash do diff
             
         Returns:
             str: Mensagem de commit gerada
@@ -397,38 +859,27 @@ MENSAGEM DE COMMIT:"""
         
         logger.debug(f"Tamanho do diff: {len(diff_text)} caracteres")
         
-        # Verificar cache primeiro (se habilitado)
-        if self.cache:
-            cached_result = self.cache.get(
-                diff_text, self.provider, self.model, 
-                self.temperature, self.max_tokens
-            )
-            if cached_result:
-                logger.info("Cache hit - usando resposta em cache")
-                return cached_result
+        # Verificar cache primeiro (se habilitado); a chave é calculada uma única vez
+        cache_key, cached_result = self._cache_lookup(diff_text, tree_hash)
+        if cached_result:
+            logger.info("Cache hit - usando resposta em cache")
+            return cached_result
+        
+        diff_text = self._prepare_diff(diff_text)
         
         # Gerar mensagem usando o provider específico
         try:
-            if self.provider == 'openai':
-                raw_message = self._generate_openai(diff_text)
-            elif self.provider == 'gemini':
-                raw_message = self._generate_gemini(diff_text)
-            elif self.provider == 'claude':
-                raw_message = self._generate_claude(diff_text)
-            elif self.provider == 'ollama':
-                raw_message = self._generate_ollama(diff_text)
+            if self.race_providers:
+                raw_message = self._race_from_sync(diff_text)
             else:
-                raise ValueError(f"Provider {self.provider} não implementado")
+                raw_message = self._generate(diff_text)
             
             # Processar e limpar a mensagem
             processed_message = self._clean_commit_message(raw_message)
             
             # Salvar no cache (se habilitado)
-            if self.cache:
-                self.cache.set(
-                    diff_text, processed_message, self.provider, self.model,
-                    self.temperature, self.max_tokens
-                )
+            if cache_key:
+                self._cache_set(cache_key, processed_message)
                 logger.debug("Resposta salva no cache")
             
             logger.info("Commit message gerada com sucesso")
@@ -438,24 +889,122 @@ MENSAGEM DE COMMIT:"""
             logger.error(f"Erro ao gerar commit message: {e}")
             raise Exception(f"Falha na geração da mensagem: {str(e)}")
     
+    def _prepare_diff(self, diff_text: str) -> str:
+        """
+        Reduz o diff antes de enviá-lo ao provider (ver prepare_diff)
+        
+        Args:
+            diff_text: Diff das alterações do Git
+            
+        Returns:
+            str: Diff dentro do limite de max_diff_chars
+        """
+        return prepare_diff(diff_text, self.max_diff_chars)
+    
+    def _cache_lookup(self, diff_text: str,
+                      tree_hash: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Busca a mensagem do diff no cache
+        
+        Mensagens da Batch API são salvas pela chave do diff, pois o lote não
+        conhece as árvores Git: se a chave do tree_hash falhar, tenta também a
+        do diff e copia o resultado para a chave do tree_hash.
+        
+        Args:
+            diff_text: Diff das alterações do Git
+            tree_hash: Identificador das árvores Git do diff (opcional)
+            
+        Returns:
+            Tuple: (chave de cache ou None se desabilitado, mensagem ou None)
+        """
+        cache_key = self._cache_key(diff_text, tree_hash)
+        if not cache_key:
+            return None, None
+        
+        cached_result = self._cache_get(cache_key)
+        if not cached_result and tree_hash:
+            cached_result = self._cache_get(self._cache_key(diff_text))
+            if cached_result:
+                self._cache_set(cache_key, cached_result)
+        return cache_key, cached_result
+    
+    def _cache_get(self, cache_key: str) -> Optional[str]:
+        """Busca no cache em memória e, se não encontrar, no SQLite"""
+        cached_result = _memory_cache_get(cache_key)
+        if cached_result is None:
+            entry = self.cache.get_entry_by_key(cache_key)
+            if not entry:
+                return None
+            # A validade em memória acompanha o created_at da linha no SQLite
+            cached_result, ttl = entry
+            _memory_cache_set(cache_key, cached_result, min(ttl, self._memory_ttl))
+        return cached_result
+    
+    def _cache_set(self, cache_key: str, message: str) -> None:
+        """Armazena a mensagem no SQLite e no cache em memória"""
+        # set_by_key invalida a chave em memória, então a cópia nova vem depois
+        self.cache.set_by_key(
+            cache_key, self.provider, self.model,
+            self.temperature, self.max_tokens, message
+        )
+        _memory_cache_set(cache_key, message, self._memory_ttl)
+    
+    def _cache_key(self, diff_text: str, tree_hash: Optional[str] = None) -> Optional[str]:
+        """Chave de cache do diff com os parâmetros atuais (None se o cache estiver desabilitado)"""
+        if not self.cache:
+            return None
+        if tree_hash:
+            # O Git já identifica o estado de forma estável: dispensa o hash do diff
+            return f"{tree_hash}:{self.provider}:{self.model}:{self.temperature}:{self.max_tokens}"
+        return self.cache.make_key(diff_text, self.provider, self.model, self.temperature, self.max_tokens)
+    
+    def _build_chat_messages(self, diff_text: str) -> List[Dict[str, str]]:
+        """Monta as mensagens de chat usadas por OpenAI e Claude"""
+        return [
+            {
+                "role": "system", 
+                "content": self._get_enhanced_prompt(diff_text)
+            },
+            {
+                "role": "user", 
+                "content": f"Analise o seguinte diff do Git e gere uma mensagem de commit concisa e profissional:\n\n{diff_text}"
+            }
+        ]
+    
+    def _build_text_prompt(self, diff_text: str) -> str:
+        """Monta o prompt em texto único usado por Gemini e Ollama"""
+        return f"{self._get_enhanced_prompt(diff_text)}\n\nAnalise o seguinte diff do Git:\n\n{diff_text}"
+    
+    def _build_gemini_request(self, diff_text: str) -> Dict[str, Any]:
+        """Monta o corpo da requisição para a API Gemini"""
+        return {
+            'contents': [{
+                'parts': [{'text': self._build_text_prompt(diff_text)}]
+            }],
+            'generationConfig': {
+                'temperature': self.temperature,
+                'maxOutputTokens': self.max_tokens
+            }
+        }
+    
+    def _gemini_url(self) -> str:
+        """URL do endpoint generateContent do modelo configurado"""
+        return f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent"
+    
     def _generate_openai(self, diff_text: str) -> str:
         """Gera commit message usando OpenAI"""
         try:
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": self._get_enhanced_prompt(diff_text)
-                    },
-                    {
-                        "role": "user", 
-                        "content": f"Analise o seguinte diff do Git e gere uma mensagem de commit concisa e profissional:\n\n{diff_text}"
-                    }
-                ],
+                messages=self._build_chat_messages(diff_text),
                 max_tokens=self.max_tokens,
-                temperature=self.temperature
+                temperature=self.temperature,
+                stream=self.stream
             )
+            if self.stream:
+                return self._collect_stream(
+                    chunk.choices[0].delta.content for chunk in response if chunk.choices
+                )
             return response.choices[0].message.content.strip()
         except Exception as e:
             logger.error(f"Erro na API OpenAI: {e}")
@@ -463,24 +1012,291 @@ MENSAGEM DE COMMIT:"""
     
     def _generate_gemini(self, diff_text: str) -> str:
         """Gera commit message usando Google Gemini"""
-        prompt = f"{self._get_enhanced_prompt(diff_text)}\n\nAnalise o seguinte diff do Git:\n\n{diff_text}"
-        
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent"
         headers = {'Content-Type': 'application/json'}
+        data = self._build_gemini_request(diff_text)
         
-        data = {
-            'contents': [{
-                'parts': [{'text': prompt}]
-            }],
-            'generationConfig': {
-                'temperature': self.temperature,
-                'maxOutputTokens': self.max_tokens
-            }
+        try:
+            response = self._post_with_retries(
+                self._gemini_url(), headers=headers, params={'key': self.api_key}, json=data
+            )
+            
+            result = response.json()
+            return result['candidates'][0]['content']['parts'][0]['text'].strip()
+        except Exception as e:
+            logger.error(f"Erro na API Gemini: {e}")
+            raise
+    
+    def _generate_claude(self, diff_text: str) -> str:
+        """Gera commit message usando Anthropic Claude"""
+        system_message, user_message = self._build_chat_messages(diff_text)
+        request = dict(
+            model=self.model,
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            system=system_message['content'],
+            messages=[user_message]
+        )
+        try:
+            if self.stream:
+                with self.client.messages.stream(**request) as stream:
+                    return self._collect_stream(stream.text_stream)
+            
+            response = self.client.messages.create(**request)
+            return response.content[0].text.strip()
+        except Exception as e:
+            logger.error(f"Erro na API Claude: {e}")
+            raise
+    
+    def _ollama_options(self) -> Dict[str, Any]:
+        """
+        Opções de geração do Ollama
+        
+        num_ctx vem do limite de max_diff_chars (ver ollama_num_ctx).
+        """
+        options = {
+            'temperature': self.temperature,
+            'num_predict': self.max_tokens
         }
+        if self.max_diff_chars:
+            options['num_ctx'] = ollama_num_ctx(self.max_diff_chars, self.OLLAMA_PROMPT_CHARS, self.max_tokens)
+        return options
+    
+    def _generate_ollama(self, diff_text: str) -> str:
+        """
+        Gera commit message usando Ollama
+        
+        A resposta é sempre lida em streaming e a leitura é interrompida no
+        primeiro parágrafo, sem esperar o modelo terminar o corpo da mensagem.
+        """
+        prompt = self._build_text_prompt(diff_text)
+        
+        def generate() -> str:
+            # O stream é consumido aqui dentro: o SDK só conecta na primeira
+            # iteração, então erros de conexão também passam pelas retentativas
+            response = self.client.generate(
+                model=self.model,
+                prompt=prompt,
+                options=self._ollama_options(),
+                keep_alive=self.OLLAMA_KEEP_ALIVE,
+                stream=True
+            )
+            try:
+                pieces = self._first_paragraph(chunk['response'] for chunk in response)
+                if self.stream:
+                    return self._collect_stream(pieces)
+                return "".join(pieces).strip()
+            finally:
+                # Fecha a conexão HTTP se a geração foi abandonada no meio
+                close = getattr(response, 'close', None)
+                if close:
+                    close()
         
         try:
-            response = requests.post(f"{url}?key={self.api_key}", headers=headers, json=data)
+            return self._call_with_retries(generate)
+        except Exception as e:
+            logger.error(f"Erro na API Ollama: {e}")
+            raise
+    
+    @staticmethod
+    def _first_paragraph(pieces: Iterable[Optional[str]]) -> Iterator[str]:
+        """
+        Repassa os trechos de um stream até a primeira linha em branco
+        
+        Args:
+            pieces: Trechos de texto recebidos do provider
+            
+        Yields:
+            str: Trechos até o fim do primeiro parágrafo não vazio
+        """
+        text = ""
+        for piece in pieces:
+            if not piece:
+                continue
+            start = len(text)
+            text += piece
+            
+            content_start = len(text) - len(text.lstrip())
+            end = text.find("\n\n", content_start) if content_start < len(text) else -1
+            if end >= 0:
+                if end > start:
+                    yield text[start:end]
+                return
+            yield piece
+    
+    def _collect_stream(self, pieces: Iterable[Optional[str]]) -> str:
+        """
+        Consome uma resposta em streaming, repassando cada trecho a on_token
+        
+        Args:
+            pieces: Trechos de texto recebidos do provider
+            
+        Returns:
+            str: Resposta completa
+        """
+        chunks = []
+        for piece in pieces:
+            if not piece:
+                continue
+            chunks.append(piece)
+            if self.on_token:
+                self.on_token(piece)
+            else:
+                sys.stdout.write(piece)
+                sys.stdout.flush()
+        return "".join(chunks).strip()
+    
+    def _call_with_retries(self, func, *args, **kwargs):
+        """
+        Executa func com novas tentativas em erros transitórios
+        
+        Args:
+            func: Função a executar
+            *args, **kwargs: Argumentos repassados para func
+            
+        Returns:
+            Resultado de func
+            
+        Raises:
+            Exception: O último erro, se as tentativas se esgotarem ou o erro não for transitório
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_transient_error(e):
+                    raise
+                delay = _retry_delay(e, attempt)
+                logger.warning(f"Erro transitório ({e}); nova tentativa {attempt + 1}/{self.max_retries} em {delay:.1f}s")
+                time.sleep(delay)
+    
+    async def _acall_with_retries(self, func, *args, **kwargs):
+        """Versão assíncrona de _call_with_retries (func deve ser uma corrotina)"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_transient_error(e):
+                    raise
+                delay = _retry_delay(e, attempt)
+                logger.warning(f"Erro transitório ({e}); nova tentativa {attempt + 1}/{self.max_retries} em {delay:.1f}s")
+                await asyncio.sleep(delay)
+    
+    def _post_with_retries(self, url: str, **kwargs) -> requests.Response:
+        """POST na sessão compartilhada, com timeouts e novas tentativas em erros transitórios"""
+        def post():
+            response = _SESSION.post(url, timeout=self._timeout, **kwargs)
             response.raise_for_status()
+            return response
+        
+        return self._call_with_retries(post)
+    
+    @property
+    def _timeout(self) -> tuple:
+        """Timeout (conexão, leitura) usado nas chamadas via requests"""
+        return (self.connect_timeout, self.read_timeout)
+    
+    def _httpx_timeout(self):
+        """Timeout equivalente para clientes httpx"""
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+    
+    def _sdk_timeout(self, sdk):
+        """
+        Timeout (conexão, leitura) no tipo aceito pelo SDK do provider
+        
+        Cada SDK reexporta a classe Timeout do cliente HTTP que usa; se não
+        houver, o timeout de leitura vale para todas as fases.
+        """
+        timeout_cls = getattr(sdk, 'Timeout', None)
+        if timeout_cls is None:
+            return self.read_timeout
+        return timeout_cls(self.read_timeout, connect=self.connect_timeout)
+    
+    def _get_async_clients(self):
+        """
+        Retorna (cliente HTTP, cliente do provider) assíncronos do event loop atual
+        
+        Os clientes são criados sob demanda e recriados se o event loop mudar,
+        pois o pool de conexões do httpx fica preso ao loop que o criou.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            if not HTTPX_AVAILABLE:
+                raise ImportError("httpx não disponível. Instale com: pip install httpx")
+            
+            http_client = httpx.AsyncClient(
+                timeout=self._httpx_timeout(),
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+                http2=HTTP2_AVAILABLE
+            )
+            
+            provider_client = None  # Gemini usa a API REST diretamente
+            if self.provider == 'openai':
+                import openai
+                provider_client = openai.AsyncOpenAI(api_key=self.api_key, max_retries=self.max_retries,
+                                                     timeout=self._sdk_timeout(openai), http_client=http_client)
+            elif self.provider == 'claude':
+                import anthropic
+                # O SDK da Anthropic pode usar outro cliente HTTP: mantém o pool próprio dele
+                provider_client = anthropic.AsyncAnthropic(api_key=self.api_key, max_retries=self.max_retries,
+                                                            timeout=self._sdk_timeout(anthropic))
+            elif self.provider == 'ollama':
+                import ollama
+                provider_client = ollama.AsyncClient(timeout=self._httpx_timeout())
+            
+            self._aclient = http_client
+            self._async_client = provider_client
+            self._async_loop = loop
+            logger.debug("Clientes assíncronos inicializados")
+        
+        return self._aclient, self._async_client
+    
+    async def aclose(self) -> None:
+        """Fecha os clientes assíncronos abertos, inclusive os dos serviços da corrida"""
+        for service in self._race_services or []:
+            if service is not self:
+                await service.aclose()
+        
+        http_client, provider_client = self._aclient, self._async_client
+        self._aclient = None
+        self._async_client = None
+        self._async_loop = None
+        
+        # AsyncOpenAI, AsyncAnthropic e ollama.AsyncClient expõem close() assíncrono
+        close = getattr(provider_client, 'close', None)
+        if close is not None:
+            await close()
+        if http_client is not None:
+            await http_client.aclose()
+    
+    async def _agenerate_openai(self, diff_text: str) -> str:
+        """Versão assíncrona de _generate_openai"""
+        _, client = self._get_async_clients()
+        try:
+            response = await client.chat.completions.create(
+                model=self.model,
+                messages=self._build_chat_messages(diff_text),
+                max_tokens=self.max_tokens,
+                temperature=self.temperature
+            )
+            return response.choices[0].message.content.strip()
+        except Exception as e:
+            logger.error(f"Erro na API OpenAI: {e}")
+            raise
+    
+    async def _agenerate_gemini(self, diff_text: str) -> str:
+        """Versão assíncrona de _generate_gemini"""
+        http_client, _ = self._get_async_clients()
+        try:
+            async def post():
+                response = await http_client.post(
+                    self._gemini_url(),
+                    params={'key': self.api_key},
+                    json=self._build_gemini_request(diff_text)
+                )
+                response.raise_for_status()
+                return response
+            
+            response = await self._acall_with_retries(post)
             
             result = response.json()
             return result['candidates'][0]['content']['parts'][0]['text'].strip()
@@ -488,60 +1304,263 @@ MENSAGEM DE COMMIT:"""
             logger.error(f"Erro na API Gemini: {e}")
             raise
     
-    def _generate_claude(self, diff_text: str) -> str:
-        """Gera commit message usando Anthropic Claude"""
+    async def _agenerate_claude(self, diff_text: str) -> str:
+        """Versão assíncrona de _generate_claude"""
+        _, client = self._get_async_clients()
+        system_message, user_message = self._build_chat_messages(diff_text)
         try:
-            response = self.client.messages.create(
+            response = await client.messages.create(
                 model=self.model,
                 max_tokens=self.max_tokens,
                 temperature=self.temperature,
-                system=self._get_enhanced_prompt(diff_text),
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f"Analise o seguinte diff do Git e gere uma mensagem de commit concisa e profissional:\n\n{diff_text}"
-                    }
-                ]
+                system=system_message['content'],
+                messages=[user_message]
             )
             return response.content[0].text.strip()
         except Exception as e:
             logger.error(f"Erro na API Claude: {e}")
             raise
     
-    def _generate_ollama(self, diff_text: str) -> str:
-        """Gera commit message usando Ollama"""
+    async def _agenerate_ollama(self, diff_text: str) -> str:
+        """Versão assíncrona de _generate_ollama"""
+        _, client = self._get_async_clients()
         try:
-            response = self.client.generate(
+            response = await self._acall_with_retries(
+                client.generate,
                 model=self.model,
-                prompt=f"{self._get_enhanced_prompt(diff_text)}\n\nAnalise o seguinte diff do Git:\n\n{diff_text}",
-                options={
-                    'temperature': self.temperature,
-                    'num_predict': self.max_tokens
-                }
+                prompt=self._build_text_prompt(diff_text),
+                options=self._ollama_options(),
+                keep_alive=self.OLLAMA_KEEP_ALIVE
             )
             return response['response'].strip()
         except Exception as e:
             logger.error(f"Erro na API Ollama: {e}")
             raise
     
+    async def _agenerate_raw(self, diff_text: str) -> str:
+        """Gera a mensagem bruta (sem limpeza nem cache) com o provider configurado"""
+        return await self._agenerate(diff_text)
+    
+    def _get_race_services(self) -> List['AIService']:
+        """
+        Retorna os serviços que participam da corrida (o próprio serviço primeiro)
+        
+        Providers que não puderem ser inicializados (ex.: sem API key) são ignorados.
+        """
+        if self._race_services is None:
+            services = [self]
+            for provider in self.race_providers:
+                try:
+                    services.append(AIService(
+                        provider=provider, max_tokens=self.max_tokens,
+                        temperature=self.temperature, use_cache=False,
+                        use_templates=self.use_templates,
+                        connect_timeout=self.connect_timeout, read_timeout=self.read_timeout,
+                        max_retries=self.max_retries, max_diff_chars=self.max_diff_chars
+                    ))
+                except Exception as e:
+                    logger.warning(f"Provider {provider} ignorado na corrida: {e}")
+            self._race_services = services
+        return self._race_services
+    
+    async def _race_providers(self, diff_text: str) -> str:
+        """
+        Envia o mesmo diff a vários providers e retorna a primeira resposta bem-sucedida
+        
+        As tarefas restantes são canceladas assim que uma termina com sucesso.
+        
+        Args:
+            diff_text: Diff já preparado
+            
+        Returns:
+            str: Mensagem bruta do provider vencedor
+            
+        Raises:
+            Exception: O último erro, se todos os providers falharem
+        """
+        tasks = {
+            asyncio.ensure_future(service._agenerate_raw(diff_text)): service
+            for service in self._get_race_services()
+        }
+        pending = set(tasks)
+        last_error = None
+        
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        logger.debug(f"Provider vencedor da corrida: {tasks[task].provider}")
+                        return task.result()
+                    logger.warning(f"Provider {tasks[task].provider} falhou na corrida: {error}")
+                    last_error = error
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        raise last_error
+    
+    async def _run_race(self, diff_text: str) -> str:
+        """Executa _race_providers e fecha os clientes assíncronos ao final (uso síncrono)"""
+        try:
+            return await self._race_providers(diff_text)
+        finally:
+            await self.aclose()
+    
+    def _race_from_sync(self, diff_text: str) -> str:
+        """
+        Executa a corrida de providers a partir da API síncrona
+        
+        Se a thread já roda um event loop (Jupyter, host assíncrono), asyncio.run
+        falharia: nesse caso os providers são tentados em sequência.
+        
+        Args:
+            diff_text: Diff já preparado
+            
+        Returns:
+            str: Mensagem bruta do primeiro provider bem-sucedido
+            
+        Raises:
+            Exception: O último erro, se todos os providers falharem
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._run_race(diff_text))
+        
+        logger.debug("Event loop já em execução - providers da corrida tentados em sequência")
+        last_error = None
+        for service in self._get_race_services():
+            try:
+                return service._generate(diff_text)
+            except Exception as e:
+                logger.warning(f"Provider {service.provider} falhou: {e}")
+                last_error = e
+        raise last_error
+    
+    def _estimate_tokens(self, diff_text: str) -> int:
+        """Estimativa grosseira de tokens da chamada (~4 caracteres por token + saída)"""
+        return (len(_ENHANCED_PROMPT_BASE) + len(diff_text)) // 4 + self.max_tokens
+    
+    async def _acquire_rate_limit(self, diff_text: str):
+        """Aguarda os limites de requisições e tokens por minuto, se configurados"""
+        if self._rpm_limiter:
+            await self._rpm_limiter.acquire()
+        if self._tpm_limiter:
+            await self._tpm_limiter.acquire(self._estimate_tokens(diff_text))
+    
+    async def agenerate_commit_message(self, diff_text: str, tree_hash: Optional[str] = None) -> str:
+        """
+        Versão assíncrona de generate_commit_message
+        
+        Args:
+            diff_text: Diff das alterações do Git
+            tree_hash: Identificador das árvores Git do diff (opcional)
+            
+        Returns:
+            str: Mensagem de commit gerada
+            
+        Raises:
+            Exception: Se a geração falhar
+        """
+        if not diff_text.strip():
+            logger.error("Diff vazio fornecido")
+            raise Exception("Nenhuma alteração encontrada para analisar")
+        
+        cache_key, cached_result = self._cache_lookup(diff_text, tree_hash)
+        if cached_result:
+            logger.info("Cache hit - usando resposta em cache")
+            return cached_result
+        
+        diff_text = self._prepare_diff(diff_text)
+        
+        try:
+            await self._acquire_rate_limit(diff_text)
+            
+            if self.race_providers:
+                raw_message = await self._race_providers(diff_text)
+            else:
+                raw_message = await self._agenerate_raw(diff_text)
+            
+            processed_message = self._clean_commit_message(raw_message)
+            
+            if cache_key:
+                self._cache_set(cache_key, processed_message)
+            
+            return processed_message
+            
+        except Exception as e:
+            logger.error(f"Erro ao gerar commit message: {e}")
+            raise Exception(f"Falha na geração da mensagem: {str(e)}")
+    
+    async def abatch(self, diffs: List[str], 
+                     max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> List[Union[str, Exception]]:
+        """
+        Gera mensagens de commit para vários diffs concorrentemente
+        
+        Args:
+            diffs: Lista de diffs do Git
+            max_concurrency: Número máximo de chamadas simultâneas ao provider
+            
+        Returns:
+            List: Mensagens geradas, na mesma ordem dos diffs. Falhas individuais
+            são retornadas como a exceção correspondente, sem abortar o lote.
+        
+        Cada geração tem seu próprio limite (request_timeout): uma chamada
+        travada é cancelada e tentada mais uma vez, sem bloquear as demais.
+        """
+        logger.info(f"Gerando {len(diffs)} commit messages em lote (concorrência: {max_concurrency})")
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def _bounded(diff_text: str) -> str:
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(self.agenerate_commit_message(diff_text),
+                                                  timeout=self.request_timeout)
+                except asyncio.TimeoutError:
+                    logger.warning(f"Geração excedeu {self.request_timeout}s; tentando novamente")
+                    return await asyncio.wait_for(self.agenerate_commit_message(diff_text),
+                                                  timeout=self.request_timeout)
+        
+        try:
+            return await asyncio.gather(*(_bounded(d) for d in diffs), return_exceptions=True)
+        finally:
+            # Os clientes ficam presos a este event loop: fecha antes que ele termine
+            await self.aclose()
+    
+    def submit_batch(self, diffs: List[str], labels: Optional[List[str]] = None) -> str:
+        """
+        Envia vários diffs para a Batch API da OpenAI
+        
+        Args:
+            diffs: Lista de diffs
+            labels: Rótulo de cada diff (ex: caminho do arquivo), opcional
+            
+        Returns:
+            str: ID do lote, usado em poll_batch
+        """
+        return BatchProcessor(self).submit(diffs, labels)
+    
+    def batch_labels(self, batch_id: str) -> Dict[str, str]:
+        """Rótulos registrados em submit_batch, por custom_id (chave de cache)"""
+        return BatchProcessor(self).labels(batch_id)
+    
+    def poll_batch(self, batch_id: str) -> Optional[Dict[str, str]]:
+        """
+        Coleta os resultados de um lote enviado por submit_batch
+        
+        Args:
+            batch_id: ID do lote
+            
+        Returns:
+            Dict[str, str]: Mensagens por chave de cache, ou None se ainda em andamento
+        """
+        return BatchProcessor(self).poll(batch_id)
+    
     def _get_enhanced_prompt(self, diff_text: str = "") -> str:
         """Retorna um prompt aprimorado para gerar commits melhores"""
-        base_prompt = """Você é um assistente especializado em gerar mensagens de commit Git profissionais.
-
-Regras para a mensagem de commit:
-1. Use o formato: <tipo>: <descrição>
-2. Tipos válidos: feat, fix, docs, style, refactor, test, chore, perf, ci, build
-3. Máximo 50 caracteres no título
-4. Use imperativos (adiciona, corrige, atualiza)
-5. Seja específico e claro
-6. Use português brasileiro
-7. Não use pontos finais no título
-
-Exemplos:
-- feat: adiciona sistema de cache SQLite
-- fix: corrige validação de entrada do usuário
-- docs: atualiza documentação da API
-- refactor: melhora estrutura do código de login"""
+        parts = [_ENHANCED_PROMPT_BASE]
         
         # Adicionar informações de template se disponível
         if self.template_manager and diff_text:
@@ -549,10 +1568,10 @@ Exemplos:
             template = self.template_manager.get_template(suggested_type)
             
             if template:
-                base_prompt += f"\n\nTipo sugerido baseado nas alterações: {suggested_type} - {template['description']}"
-                base_prompt += f"\nExemplos deste tipo:"
+                parts.append(f"\n\nTipo sugerido baseado nas alterações: {suggested_type} - {template['description']}")
+                parts.append("\nExemplos deste tipo:")
                 for example in template['examples'][:2]:  # Mostrar apenas 2 exemplos
-                    base_prompt += f"\n- {example}"
+                    parts.append(f"\n- {example}")
         
-        base_prompt += "\n\nAnalise as alterações e gere APENAS a mensagem de commit, sem explicações adicionais."
-        return base_prompt
+        parts.append(_ENHANCED_PROMPT_FOOTER)
+        return "".join(parts)
@@ -6,23 +6,62 @@ Coleta, processa e apresenta métricas detalhadas sobre padrões de commit,
 produtividade de desenvolvimento e insights colaborativos.
 """
 
+import atexit
+import itertools
 import json
-import sqlite3
+import re
+import threading
+import time
 from datetime import datetime, timedelta
+from math import log2
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, Iterator, List, Optional, Tuple, Any
 from dataclasses import dataclass, asdict
-from collections import defaultdict, Counter
-import statistics
 
 from .git_handler import GitHandler
 from .config_manager import ConfigManager
+from .analytics_cache import metrics_cache
+from .database import ConnectionPool, enable_wal
 from .logger import logger
+from .paths import commit_ai_home
 
+# orjson serializa dataclasses e datetimes nativamente e é bem mais rápido; opcional
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logger.debug("orjson não disponível - usando json da biblioteca padrão (instale com: pip install orjson)")
 
-@dataclass
+
+# Tipo convencional no início da mensagem, seguido de ':' ou '(' (escopo)
+_COMMIT_TYPE_RE = re.compile(r'(feat|fix|docs|style|refactor|test|chore)[:(]', re.IGNORECASE)
+
+
+def _to_json_value(obj: Any) -> Any:
+    """Prepara um dataclass para serialização (orjson dispensa o asdict)"""
+    return obj if ORJSON_AVAILABLE else asdict(obj)
+
+
+def _dumps_json(data: Dict[str, Any]) -> str:
+    """Serializa o relatório em JSON indentado"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2).decode('utf-8')
+    return json.dumps(data, indent=2, default=_json_default)
+
+
+def _json_default(obj: Any) -> str:
+    """Converte valores não serializáveis (datas no mesmo formato ISO do orjson)"""
+    return obj.isoformat() if isinstance(obj, datetime) else str(obj)
+
+
+@dataclass(frozen=True)
 class CommitMetric:
     """Métrica individual de commit"""
+    __slots__ = ('hash', 'message', 'author', 'date', 'type', 'provider', 'template',
+                 'confidence', 'files_changed', 'lines_added', 'lines_deleted',
+                 'processing_time')
+    
     hash: str
     message: str
     author: str
@@ -37,9 +76,13 @@ class CommitMetric:
     processing_time: float
 
 
-@dataclass
+@dataclass(frozen=True)
 class ProductivityMetrics:
     """Métricas de produtividade"""
+    __slots__ = ('total_commits', 'commits_per_day', 'avg_processing_time',
+                 'most_used_provider', 'most_used_template', 'most_common_type',
+                 'avg_confidence', 'total_lines_changed', 'files_touched')
+    
     total_commits: int
     commits_per_day: float
     avg_processing_time: float
@@ -51,9 +94,12 @@ class ProductivityMetrics:
     files_touched: int
 
 
-@dataclass
+@dataclass(frozen=True)
 class TeamInsights:
     """Insights colaborativos"""
+    __slots__ = ('team_members', 'commits_by_author', 'avg_commits_per_author',
+                 'most_active_author', 'common_patterns', 'collaboration_score')
+    
     team_members: List[str]
     commits_by_author: Dict[str, int]
     avg_commits_per_author: float
@@ -65,18 +111,27 @@ class TeamInsights:
 class AnalyticsDatabase:
     """Gerenciador do banco de dados de analytics"""
     
+    # Bancos cuja estrutura já foi criada neste processo
+    _initialized_paths = set()
+    
     def __init__(self, db_path: Optional[Path] = None):
         if db_path is None:
-            config_dir = Path.home() / '.commit-ai'
+            config_dir = commit_ai_home()
             config_dir.mkdir(exist_ok=True)
             db_path = config_dir / 'analytics.db'
         
         self.db_path = db_path
-        self.init_database()
+        self._pool = ConnectionPool(self.db_path)
+        
+        db_key = str(Path(self.db_path).resolve())
+        if db_key not in self._initialized_paths:
+            self.init_database()
+            self._initialized_paths.add(db_key)
     
     def init_database(self) -> None:
         """Inicializa estrutura do banco de dados"""
-        with sqlite3.connect(self.db_path) as conn:
+        enable_wal(self.db_path)
+        with self._pool.get() as conn:
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS commits (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -125,96 +180,278 @@ class AnalyticsDatabase:
             
             # Índices para performance
             conn.execute('CREATE INDEX IF NOT EXISTS idx_commits_date ON commits(date)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_commits_author ON commits(author)')
-            conn.execute('CREATE INDEX IF NOT EXISTS idx_commits_type ON commits(type)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_commits_date_author ON commits(date DESC, author)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_commits_date_provider ON commits(date DESC, provider)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_commits_date_type ON commits(date DESC, type)')
+            
+            # Cobertos pelos índices compostos acima (todas as consultas filtram por data)
+            conn.execute('DROP INDEX IF EXISTS idx_commits_author')
+            conn.execute('DROP INDEX IF EXISTS idx_commits_type')
+            
+            # Atualiza as estatísticas usadas pelo planejador de consultas
+            conn.execute('ANALYZE')
+    
+    def close(self) -> None:
+        """Fecha as conexões abertas com o banco de analytics"""
+        self._pool.close()
+    
+    _INSERT_COMMIT_SQL = '''
+        INSERT OR REPLACE INTO commits 
+        (hash, message, author, date, type, provider, template, 
+         confidence, files_changed, lines_added, lines_deleted, 
+         processing_time, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    @staticmethod
+    def _commit_row(metric: CommitMetric, created_at: str) -> tuple:
+        """Converte uma métrica na tupla de valores do INSERT"""
+        return (
+            metric.hash,
+            metric.message,
+            metric.author,
+            metric.date.isoformat(),
+            metric.type,
+            metric.provider,
+            metric.template,
+            metric.confidence,
+            metric.files_changed,
+            metric.lines_added,
+            metric.lines_deleted,
+            metric.processing_time,
+            created_at
+        )
     
     def record_commit(self, metric: CommitMetric) -> None:
         """Registra uma métrica de commit"""
+        self.record_commits([metric])
+    
+    def record_commits(self, metrics: List[CommitMetric]) -> None:
+        """Registra várias métricas de commit em uma única transação"""
+        if not metrics:
+            return
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute('''
-                    INSERT OR REPLACE INTO commits 
-                    (hash, message, author, date, type, provider, template, 
-                     confidence, files_changed, lines_added, lines_deleted, 
-                     processing_time, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    metric.hash,
-                    metric.message,
-                    metric.author,
-                    metric.date.isoformat(),
-                    metric.type,
-                    metric.provider,
-                    metric.template,
-                    metric.confidence,
-                    metric.files_changed,
-                    metric.lines_added,
-                    metric.lines_deleted,
-                    metric.processing_time,
-                    datetime.now().isoformat()
-                ))
-                
-                logger.debug(f"Métrica de commit registrada: {metric.hash}")
+            created_at = datetime.now().isoformat()
+            with self._pool.get() as conn:
+                # Tuplas geradas sob demanda; o SQL fixo reaproveita o statement
+                # preparado no cache da conexão (reutilizada pelo pool)
+                conn.executemany(
+                    self._INSERT_COMMIT_SQL,
+                    (self._commit_row(metric, created_at) for metric in metrics)
+                )
+            metrics_cache.invalidate()
+            
+            logger.debug(f"{len(metrics)} métrica(s) de commit registrada(s)")
+            
+        except Exception as e:
+            logger.error(f"Erro ao registrar métricas de commit: {e}")
+    
+    @staticmethod
+    def _row_to_metric(row: Tuple) -> CommitMetric:
+        """Converte uma linha da tabela commits em CommitMetric"""
+        return CommitMetric(
+            hash=row[0],
+            message=row[1],
+            author=row[2],
+            date=datetime.fromisoformat(row[3]),
+            type=row[4],
+            provider=row[5],
+            template=row[6],
+            confidence=row[7],
+            files_changed=row[8],
+            lines_added=row[9],
+            lines_deleted=row[10],
+            processing_time=row[11]
+        )
+    
+    def iter_commits(self, 
+                     days: int = 30, 
+                     author: Optional[str] = None) -> Iterator[CommitMetric]:
+        """
+        Percorre os commits do período, do mais recente ao mais antigo
+        
+        As linhas são lidas do cursor sob demanda, sem materializar o
+        resultado inteiro em memória.
+        
+        Args:
+            days: Período em dias
+            author: Filtra pelos commits de um autor
+            
+        Yields:
+            CommitMetric: Métrica de cada commit
+        """
+        try:
+            since_date = datetime.now() - timedelta(days=days)
+            
+            query = '''
+                SELECT hash, message, author, date, type, provider, template,
+                       confidence, files_changed, lines_added, lines_deleted,
+                       processing_time
+                FROM commits 
+                WHERE date >= ?
+            '''
+            params = [since_date.isoformat()]
+            
+            if author:
+                query += ' AND author = ?'
+                params.append(author)
+            
+            query += ' ORDER BY date DESC'
+            
+            cursor = self._pool.get().execute(query, params)
+            try:
+                for row in cursor:
+                    yield self._row_to_metric(row)
+            finally:
+                cursor.close()
                 
         except Exception as e:
-            logger.error(f"Erro ao registrar métrica de commit: {e}")
+            logger.error(f"Erro ao recuperar commits: {e}")
     
     def get_commits(self, 
                    days: int = 30, 
                    author: Optional[str] = None) -> List[CommitMetric]:
         """Recupera commits do período especificado"""
-        try:
-            since_date = datetime.now() - timedelta(days=days)
+        return list(self.iter_commits(days, author))
+    
+    @staticmethod
+    def _most_common(conn, column: str, since: str) -> Optional[Tuple[str, int]]:
+        """
+        Valor mais frequente de uma coluna no período
+        
+        Empates são resolvidos pelo uso mais recente, como o Counter faria
+        sobre a lista de commits ordenada por data decrescente.
+        """
+        return conn.execute(f'''
+            SELECT {column}, COUNT(*) AS c
+            FROM commits
+            WHERE date >= ?
+            GROUP BY {column}
+            ORDER BY c DESC, MAX(date) DESC
+            LIMIT 1
+        ''', (since,)).fetchone()
+    
+    def aggregate_productivity(self, days: int = 30) -> Dict[str, Any]:
+        """
+        Agrega as métricas de produtividade do período diretamente no SQLite
+        
+        Args:
+            days: Período em dias
             
-            with sqlite3.connect(self.db_path) as conn:
-                query = '''
-                    SELECT hash, message, author, date, type, provider, template,
-                           confidence, files_changed, lines_added, lines_deleted,
-                           processing_time
-                    FROM commits 
+        Returns:
+            Dict com totais, médias e os valores mais usados (valor, contagem)
+        """
+        since = (datetime.now() - timedelta(days=days)).isoformat()
+        
+        try:
+            with self._pool.get() as conn:
+                row = conn.execute('''
+                    SELECT COUNT(*), AVG(processing_time), AVG(confidence),
+                           SUM(lines_added + lines_deleted), SUM(files_changed)
+                    FROM commits
                     WHERE date >= ?
-                '''
-                params = [since_date.isoformat()]
-                
-                if author:
-                    query += ' AND author = ?'
-                    params.append(author)
+                ''', (since,)).fetchone()
                 
-                query += ' ORDER BY date DESC'
-                
-                cursor = conn.execute(query, params)
-                commits = []
+                return {
+                    'total_commits': row[0],
+                    'avg_processing_time': row[1] or 0.0,
+                    'avg_confidence': row[2] or 0.0,
+                    'total_lines_changed': row[3] or 0,
+                    'files_touched': row[4] or 0,
+                    'top_provider': self._most_common(conn, 'provider', since),
+                    'top_template': self._most_common(conn, 'template', since),
+                    'top_type': self._most_common(conn, 'type', since)
+                }
                 
-                for row in cursor.fetchall():
-                    commits.append(CommitMetric(
-                        hash=row[0],
-                        message=row[1],
-                        author=row[2],
-                        date=datetime.fromisoformat(row[3]),
-                        type=row[4],
-                        provider=row[5],
-                        template=row[6],
-                        confidence=row[7],
-                        files_changed=row[8],
-                        lines_added=row[9],
-                        lines_deleted=row[10],
-                        processing_time=row[11]
-                    ))
+        except Exception as e:
+            logger.error(f"Erro ao agregar métricas: {e}")
+            return {'total_commits': 0}
+    
+    def count_by_author(self, days: int = 30) -> Dict[str, int]:
+        """
+        Conta commits por autor no período
+        
+        Args:
+            days: Período em dias
+            
+        Returns:
+            Dict autor -> commits, do autor com commit mais recente ao mais antigo
+        """
+        since = (datetime.now() - timedelta(days=days)).isoformat()
+        
+        try:
+            with self._pool.get() as conn:
+                rows = conn.execute('''
+                    SELECT author, COUNT(*)
+                    FROM commits
+                    WHERE date >= ?
+                    GROUP BY author
+                    ORDER BY MAX(date) DESC
+                ''', (since,)).fetchall()
+                return dict(rows)
                 
-                return commits
+        except Exception as e:
+            logger.error(f"Erro ao contar commits por autor: {e}")
+            return {}
+    
+    def recent_types(self, days: int = 30, limit: int = 7) -> List[str]:
+        """Tipos dos commits mais recentes do período"""
+        since = (datetime.now() - timedelta(days=days)).isoformat()
+        
+        try:
+            with self._pool.get() as conn:
+                rows = conn.execute('''
+                    SELECT type FROM commits
+                    WHERE date >= ?
+                    ORDER BY date DESC
+                    LIMIT ?
+                ''', (since, limit)).fetchall()
+                return [row[0] for row in rows]
                 
         except Exception as e:
-            logger.error(f"Erro ao recuperar commits: {e}")
+            logger.error(f"Erro ao recuperar tipos recentes: {e}")
             return []
 
 
 class AnalyticsEngine:
     """Motor de analytics para processar e gerar insights"""
     
+    # Métricas coletadas são gravadas em lote ao atingir o tamanho ou o intervalo
+    FLUSH_BATCH_SIZE = 50
+    FLUSH_INTERVAL = 1.0
+    
     def __init__(self):
         self.db = AnalyticsDatabase()
         self.git_handler = GitHandler()
         self.config_manager = ConfigManager()
+        
+        self._pending: List[CommitMetric] = []
+        self._pending_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+    
+    def flush(self) -> None:
+        """
+        Grava no banco as métricas pendentes
+        
+        A instância global de get_analytics_engine é gravada ao final do
+        processo; instâncias criadas diretamente devem chamar flush() antes
+        de serem descartadas.
+        """
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+        
+        if pending:
+            self.db.record_commits(pending)
+    
+    def _maybe_flush(self) -> None:
+        """Grava as métricas pendentes se o lote encheu ou o intervalo passou"""
+        with self._pending_lock:
+            due = (len(self._pending) >= self.FLUSH_BATCH_SIZE or
+                   time.monotonic() - self._last_flush >= self.FLUSH_INTERVAL)
+        if due:
+            self.flush()
     
     def collect_commit_metrics(self, 
                               commit_hash: str,
@@ -253,28 +490,33 @@ class AnalyticsEngine:
                 processing_time=processing_time
             )
             
-            # Registrar no banco
-            self.db.record_commit(metric)
+            # Enfileirar para gravação em lote
+            with self._pending_lock:
+                self._pending.append(metric)
+            # Relatórios em cache não refletem a métrica pendente
+            metrics_cache.invalidate()
+            self._maybe_flush()
             
         except Exception as e:
             logger.error(f"Erro ao coletar métricas do commit: {e}")
     
     def _extract_commit_type(self, message: str) -> str:
         """Extrai o tipo do commit da mensagem"""
-        types = ['feat', 'fix', 'docs', 'style', 'refactor', 'test', 'chore']
-        
-        message_lower = message.lower()
-        for commit_type in types:
-            if message_lower.startswith(f"{commit_type}:") or message_lower.startswith(f"{commit_type}("):
-                return commit_type
-        
-        return 'other'
+        match = _COMMIT_TYPE_RE.match(message)
+        return match.group(1).lower() if match else 'other'
     
+    @metrics_cache.cached
+    def _summarize(self, days: int) -> Dict[str, Any]:
+        """Agregados do período, calculados uma vez e compartilhados pelos relatórios"""
+        return self.db.aggregate_productivity(days)
+    
+    @metrics_cache.cached
     def calculate_productivity_metrics(self, days: int = 30) -> ProductivityMetrics:
         """Calcula métricas de produtividade"""
-        commits = self.db.get_commits(days=days)
+        self.flush()
+        stats = self._summarize(days)
         
-        if not commits:
+        if not stats['total_commits']:
             return ProductivityMetrics(
                 total_commits=0,
                 commits_per_day=0.0,
@@ -287,38 +529,27 @@ class AnalyticsEngine:
                 files_touched=0
             )
         
-        # Calcular estatísticas básicas
-        total_commits = len(commits)
-        commits_per_day = total_commits / days
-        avg_processing_time = statistics.mean([c.processing_time for c in commits])
-        avg_confidence = statistics.mean([c.confidence for c in commits])
-        
-        # Contadores para elementos mais usados
-        provider_counter = Counter([c.provider for c in commits])
-        template_counter = Counter([c.template for c in commits])
-        type_counter = Counter([c.type for c in commits])
-        
-        # Estatísticas de código
-        total_lines_changed = sum([c.lines_added + c.lines_deleted for c in commits])
-        files_touched = sum([c.files_changed for c in commits])
+        total_commits = stats['total_commits']
         
         return ProductivityMetrics(
             total_commits=total_commits,
-            commits_per_day=round(commits_per_day, 2),
-            avg_processing_time=round(avg_processing_time, 2),
-            most_used_provider=provider_counter.most_common(1)[0][0] if provider_counter else "N/A",
-            most_used_template=template_counter.most_common(1)[0][0] if template_counter else "N/A",
-            most_common_type=type_counter.most_common(1)[0][0] if type_counter else "N/A",
-            avg_confidence=round(avg_confidence, 3),
-            total_lines_changed=total_lines_changed,
-            files_touched=files_touched
+            commits_per_day=round(total_commits / days, 2),
+            avg_processing_time=round(stats['avg_processing_time'], 2),
+            most_used_provider=stats['top_provider'][0] if stats['top_provider'] else "N/A",
+            most_used_template=stats['top_template'][0] if stats['top_template'] else "N/A",
+            most_common_type=stats['top_type'][0] if stats['top_type'] else "N/A",
+            avg_confidence=round(stats['avg_confidence'], 3),
+            total_lines_changed=stats['total_lines_changed'],
+            files_touched=stats['files_touched']
         )
     
+    @metrics_cache.cached
     def generate_team_insights(self, days: int = 30) -> TeamInsights:
         """Gera insights colaborativos da equipe"""
-        commits = self.db.get_commits(days=days)
+        self.flush()
+        commits_by_author = self.db.count_by_author(days)
         
-        if not commits:
+        if not commits_by_author:
             return TeamInsights(
                 team_members=[],
                 commits_by_author={},
@@ -328,61 +559,80 @@ class AnalyticsEngine:
                 collaboration_score=0.0
             )
         
-        # Análise por autor
-        commits_by_author = defaultdict(int)
-        for commit in commits:
-            commits_by_author[commit.author] += 1
-        
+        total_commits = sum(commits_by_author.values())
         team_members = list(commits_by_author.keys())
-        avg_commits_per_author = statistics.mean(commits_by_author.values()) if commits_by_author else 0.0
-        most_active_author = max(commits_by_author, key=commits_by_author.get) if commits_by_author else "N/A"
+        avg_commits_per_author = total_commits / len(commits_by_author)
+        most_active_author = max(commits_by_author, key=commits_by_author.get)
         
         # Análise de padrões comuns
-        common_patterns = self._analyze_commit_patterns(commits)
+        common_patterns = self._format_patterns(self._pattern_stats(days, total_commits))
         
         # Calcular score de colaboração
-        collaboration_score = self._calculate_collaboration_score(commits_by_author, len(commits))
+        collaboration_score = self._calculate_collaboration_score(commits_by_author, total_commits)
         
         return TeamInsights(
             team_members=team_members,
-            commits_by_author=dict(commits_by_author),
+            commits_by_author=commits_by_author,
             avg_commits_per_author=round(avg_commits_per_author, 2),
             most_active_author=most_active_author,
             common_patterns=common_patterns,
             collaboration_score=round(collaboration_score, 2)
         )
     
-    def _analyze_commit_patterns(self, commits: List[CommitMetric]) -> List[str]:
-        """Analisa padrões comuns nos commits"""
+    @metrics_cache.cached
+    def _pattern_stats(self, days: int, total_commits: int) -> Dict[str, Any]:
+        """
+        Dados numéricos dos padrões de commit do período, sem formatação
+        
+        Args:
+            days: Período em dias
+            total_commits: Total de commits do período
+            
+        Returns:
+            Dict com tipo e template mais usados (valor, contagem), confiança
+            média e o tipo dominante nos últimos 7 commits (ou None)
+        """
+        stats = self._summarize(days)
+        
+        recent_focus = None
+        if total_commits > 7:
+            recent_types = set(self.db.recent_types(days, limit=7))  # Últimos 7 commits
+            if len(recent_types) == 1:
+                recent_focus = recent_types.pop()
+        
+        return {
+            'top_type': stats.get('top_type'),
+            'top_template': stats.get('top_template'),
+            'avg_confidence': stats['avg_confidence'] if stats.get('total_commits') else None,
+            'recent_focus_type': recent_focus
+        }
+    
+    @staticmethod
+    def _format_patterns(pattern_stats: Dict[str, Any]) -> List[str]:
+        """Descreve em texto os padrões calculados por _pattern_stats"""
         patterns = []
         
         # Análise de tipos mais usados
-        type_counter = Counter([c.type for c in commits])
-        if type_counter:
-            most_common_type = type_counter.most_common(1)[0]
+        if pattern_stats['top_type']:
+            most_common_type = pattern_stats['top_type']
             patterns.append(f"{most_common_type[1]} commits do tipo '{most_common_type[0]}'")
         
         # Análise de templates
-        template_counter = Counter([c.template for c in commits])
-        if template_counter:
-            most_common_template = template_counter.most_common(1)[0]
+        if pattern_stats['top_template']:
+            most_common_template = pattern_stats['top_template']
             patterns.append(f"Template '{most_common_template[0]}' usado {most_common_template[1]} vezes")
         
         # Análise de confiança
-        confidences = [c.confidence for c in commits]
-        if confidences:
-            avg_confidence = statistics.mean(confidences)
+        avg_confidence = pattern_stats['avg_confidence']
+        if avg_confidence is not None:
             if avg_confidence > 0.8:
                 patterns.append("Alta confiança nas mensagens geradas (>80%)")
             elif avg_confidence < 0.6:
                 patterns.append("Baixa confiança nas mensagens geradas (<60%)")
         
         # Análise temporal
-        if len(commits) > 7:
-            recent_commits = commits[:7]  # Últimos 7 commits
-            recent_types = Counter([c.type for c in recent_commits])
-            if len(recent_types) == 1:
-                patterns.append(f"Foco recente em commits do tipo '{list(recent_types.keys())[0]}'")
+        if pattern_stats['recent_focus_type']:
+            patterns.append(f"Foco recente em commits do tipo '{pattern_stats['recent_focus_type']}'")
         
         return patterns
     
@@ -410,18 +660,29 @@ class AnalyticsEngine:
                                days: int = 30) -> Optional[str]:
         """Exporta relatório de analytics em formato especificado"""
         try:
+            if format not in ('json', 'text'):
+                logger.warning(f"Formato não suportado: {format}")
+                return None
+            
+            report_date = datetime.now().isoformat()
             productivity = self.calculate_productivity_metrics(days)
             team_insights = self.generate_team_insights(days)
-            commits = self.db.get_commits(days)
+            
+            if format == 'text':
+                # O texto lê os dataclasses diretamente, sem convertê-los em dict
+                return self._format_text_report(report_date, days, productivity, team_insights)
+            
+            recent_commits = itertools.islice(self.db.iter_commits(days), 10)
             
             report_data = {
-                'report_date': datetime.now().isoformat(),
+                'report_date': report_date,
                 'period_days': days,
-                'productivity_metrics': asdict(productivity),
-                'team_insights': asdict(team_insights),
-                'recent_commits': [asdict(commit) for commit in commits[:10]],
+                'productivity_metrics': _to_json_value(productivity),
+                'team_insights': _to_json_value(team_insights),
+                'pattern_stats': self._pattern_stats(days, productivity.total_commits),
+                'recent_commits': [_to_json_value(commit) for commit in recent_commits],
                 'summary': {
-                    'total_commits': len(commits),
+                    'total_commits': productivity.total_commits,
                     'unique_authors': len(team_insights.team_members),
                     'avg_daily_commits': productivity.commits_per_day,
                     'dominant_type': productivity.most_common_type,
@@ -429,54 +690,50 @@ class AnalyticsEngine:
                 }
             }
             
-            if format == 'json':
-                return json.dumps(report_data, indent=2, default=str)
-            elif format == 'text':
-                return self._format_text_report(report_data)
-            else:
-                logger.warning(f"Formato não suportado: {format}")
-                return None
+            return _dumps_json(report_data)
                 
         except Exception as e:
             logger.error(f"Erro ao exportar relatório: {e}")
             return None
     
-    def _format_text_report(self, data: Dict[str, Any]) -> str:
+    def _format_text_report(self, 
+                            report_date: str,
+                            days: int,
+                            prod: ProductivityMetrics,
+                            team: TeamInsights) -> str:
         """Formata relatório em texto simples"""
         report = []
         report.append("=" * 60)
         report.append("📊 RELATÓRIO DE ANALYTICS - COMMIT-AI")
         report.append("=" * 60)
-        report.append(f"Período: {data['period_days']} dias")
-        report.append(f"Gerado em: {data['report_date']}")
+        report.append(f"Período: {days} dias")
+        report.append(f"Gerado em: {report_date}")
         report.append("")
         
         # Métricas de produtividade
-        prod = data['productivity_metrics']
         report.append("🚀 PRODUTIVIDADE")
         report.append("-" * 30)
-        report.append(f"Total de commits: {prod['total_commits']}")
-        report.append(f"Commits por dia: {prod['commits_per_day']}")
-        report.append(f"Tempo médio de processamento: {prod['avg_processing_time']}s")
-        report.append(f"Provider mais usado: {prod['most_used_provider']}")
-        report.append(f"Template mais usado: {prod['most_used_template']}")
-        report.append(f"Tipo mais comum: {prod['most_common_type']}")
-        report.append(f"Confiança média: {prod['avg_confidence']:.1%}")
-        report.append(f"Linhas alteradas: {prod['total_lines_changed']}")
+        report.append(f"Total de commits: {prod.total_commits}")
+        report.append(f"Commits por dia: {prod.commits_per_day}")
+        report.append(f"Tempo médio de processamento: {prod.avg_processing_time}s")
+        report.append(f"Provider mais usado: {prod.most_used_provider}")
+        report.append(f"Template mais usado: {prod.most_used_template}")
+        report.append(f"Tipo mais comum: {prod.most_common_type}")
+        report.append(f"Confiança média: {prod.avg_confidence:.1%}")
+        report.append(f"Linhas alteradas: {prod.total_lines_changed}")
         report.append("")
         
         # Insights da equipe
-        team = data['team_insights']
         report.append("👥 COLABORAÇÃO")
         report.append("-" * 30)
-        report.append(f"Membros da equipe: {len(team['team_members'])}")
-        report.append(f"Mais ativo: {team['most_active_author']}")
-        report.append(f"Score de colaboração: {team['collaboration_score']}")
+        report.append(f"Membros da equipe: {len(team.team_members)}")
+        report.append(f"Mais ativo: {team.most_active_author}")
+        report.append(f"Score de colaboração: {team.collaboration_score}")
         report.append("")
         
-        if team['common_patterns']:
+        if team.common_patterns:
             report.append("Padrões identificados:")
-            for pattern in team['common_patterns']:
+            for pattern in team.common_patterns:
                 report.append(f"  • {pattern}")
         
         report.append("")
@@ -485,14 +742,27 @@ class AnalyticsEngine:
         return "\n".join(report)
 
 
-def log2(x):
-    """Logaritmo base 2"""
-    import math
-    return math.log2(x)
+# Instância global do analytics engine, criada no primeiro uso
+_analytics_engine: Optional[AnalyticsEngine] = None
+_analytics_engine_lock = threading.Lock()
 
 
-# Instância global do analytics engine
-analytics_engine = AnalyticsEngine()
+def get_analytics_engine() -> AnalyticsEngine:
+    """
+    Retorna o analytics engine global, criando-o na primeira chamada
+    
+    Evita abrir o SQLite e o repositório Git ao apenas importar o módulo.
+    
+    Returns:
+        AnalyticsEngine: Instância compartilhada
+    """
+    global _analytics_engine
+    if _analytics_engine is None:
+        with _analytics_engine_lock:
+            if _analytics_engine is None:
+                _analytics_engine = AnalyticsEngine()
+                atexit.register(_analytics_engine.flush)
+    return _analytics_engine
 
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+"""
+Cache em memória para os relatórios de analytics do Commit-AI
+
+Métricas de produtividade e insights da equipe são recalculados a cada
+relatório, mas os dados mudam pouco entre chamadas. O cache guarda os
+resultados por alguns segundos e é invalidado quando novos commits são
+registrados.
+"""
+
+import functools
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from .logger import logger
+
+
+DEFAULT_TTL_SECONDS = 60.0
+
+
+def _ttl_from_env() -> float:
+    """Lê o TTL de METRICS_CACHE_TTL_SECONDS (0 desativa o cache)"""
+    value = os.getenv('METRICS_CACHE_TTL_SECONDS')
+    if value is None:
+        return DEFAULT_TTL_SECONDS
+    
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        logger.warning(f"METRICS_CACHE_TTL_SECONDS inválido: {value!r} - usando {DEFAULT_TTL_SECONDS}s")
+        return DEFAULT_TTL_SECONDS
+
+
+def _instance_key(instance: Any) -> Hashable:
+    """
+    Identifica a origem dos dados de uma instância para a chave do cache
+    
+    Instâncias sobre o mesmo banco (atributo db_path, próprio ou de instance.db)
+    compartilham entradas; as demais são separadas pela identidade do objeto.
+    """
+    db_path = getattr(getattr(instance, 'db', instance), 'db_path', None)
+    return str(db_path) if db_path is not None else id(instance)
+
+
+class TTLCache:
+    """Cache thread-safe cujas entradas expiram após um TTL"""
+    
+    def __init__(self, ttl: float = DEFAULT_TTL_SECONDS):
+        """
+        Inicializa o cache
+        
+        Args:
+            ttl: Tempo de vida das entradas em segundos (0 desativa o cache)
+        """
+        self.ttl = ttl
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Recupera um valor ainda válido
+        
+        Args:
+            key: Chave da entrada
+        
+        Returns:
+            O valor armazenado ou None se ausente/expirado
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            
+            return value
+    
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Armazena um valor
+        
+        Args:
+            key: Chave da entrada
+            value: Valor a armazenar
+        """
+        if self.ttl <= 0:
+            return
+        
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+    
+    def invalidate(self) -> None:
+        """Remove todas as entradas"""
+        with self._lock:
+            self._entries.clear()
+    
+    def cached(self, func: Callable) -> Callable:
+        """
+        Decorador para métodos cujo resultado depende só dos argumentos
+        
+        A chave é (nome do método, banco da instância, argumentos): instâncias
+        sobre bancos diferentes não compartilham resultados.
+        """
+        @functools.wraps(func)
+        def wrapper(instance, *args, **kwargs):
+            key = (func.__name__, _instance_key(instance), args, tuple(sorted(kwargs.items())))
+            value = self.get(key)
+            if value is None:
+                value = func(instance, *args, **kwargs)
+                self.set(key, value)
+            return value
+        
+        return wrapper
+
+
+# Instância global usada pelo motor de analytics
+metrics_cache = TTLCache(ttl=_ttl_from_env())
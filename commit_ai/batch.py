@@ -0,0 +1,223 @@
+"""
+Processamento em lote para o Commit-AI
+
+Gera mensagens de commit para muitos diffs de uma vez usando a Batch API
+da OpenAI (custo menor, sem limite de requisições síncronas). Ideal para
+bots e pipelines de CI que não precisam da resposta imediatamente.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+from .cache import CommitCache
+from .logger import logger
+from .paths import commit_ai_home
+
+
+class BatchProcessor:
+    """Envia e coleta lotes de geração de commits pela Batch API da OpenAI"""
+    
+    ENDPOINT = "/v1/chat/completions"
+    COMPLETION_WINDOW = "24h"
+    
+    # Status finais sem resultado utilizável
+    FAILED_STATUSES = ('failed', 'expired', 'cancelled')
+    
+    def __init__(self, ai_service):
+        """
+        Inicializa o processador de lotes
+        
+        Args:
+            ai_service: AIService configurado com o provider OpenAI
+        
+        Raises:
+            ValueError: Se o provider não for OpenAI
+        """
+        if ai_service.provider != 'openai':
+            raise ValueError("Batch API disponível apenas para o provider OpenAI")
+        
+        self.ai_service = ai_service
+        self.client = ai_service.client
+    
+    def custom_id(self, diff_text: str) -> str:
+        """
+        Identificador da requisição: a mesma chave usada no cache
+        
+        O diff é normalizado como em GitHandler.get_staged_diff (sem espaços nas
+        pontas), para que um diff salvo em arquivo gere a chave do diff staged.
+        """
+        service = self.ai_service
+        return CommitCache.make_key(diff_text.strip(), service.provider, service.model,
+                                    service.temperature, service.max_tokens)
+    
+    @staticmethod
+    def _labels_path(batch_id: str) -> Path:
+        """Arquivo com os rótulos (ex: caminhos dos diffs) de um lote enviado"""
+        return commit_ai_home() / 'batches' / f"{batch_id}.json"
+    
+    def labels(self, batch_id: str) -> Dict[str, str]:
+        """
+        Rótulos registrados no envio do lote
+        
+        Args:
+            batch_id: ID retornado por submit
+        
+        Returns:
+            Dict[str, str]: Rótulo por custom_id (vazio se não houver registro)
+        """
+        try:
+            with open(self._labels_path(batch_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def build_requests(self, diffs: List[str]) -> List[Dict]:
+        """
+        Monta as requisições do lote (uma por diff, sem duplicatas)
+        
+        Args:
+            diffs: Lista de diffs
+        
+        Returns:
+            List[Dict]: Requisições no formato da Batch API
+        """
+        service = self.ai_service
+        requests_by_id = {}
+        
+        for diff_text in diffs:
+            diff_text = diff_text.strip()
+            if not diff_text:
+                continue
+            
+            custom_id = self.custom_id(diff_text)
+            if custom_id in requests_by_id:
+                continue
+            
+            requests_by_id[custom_id] = {
+                'custom_id': custom_id,
+                'method': 'POST',
+                'url': self.ENDPOINT,
+                'body': {
+                    'model': service.model,
+                    'messages': service._build_chat_messages(service._prepare_diff(diff_text)),
+                    'max_tokens': service.max_tokens,
+                    'temperature': service.temperature
+                }
+            }
+        
+        return list(requests_by_id.values())
+    
+    def submit(self, diffs: List[str], labels: Optional[List[str]] = None) -> str:
+        """
+        Envia um lote de diffs para processamento
+        
+        Args:
+            diffs: Lista de diffs
+            labels: Rótulo de cada diff (ex: caminho do arquivo), recuperável
+                depois por labels(batch_id)
+        
+        Returns:
+            str: ID do lote criado
+        
+        Raises:
+            Exception: Se não houver diffs válidos ou o envio falhar
+        """
+        batch_requests = self.build_requests(diffs)
+        if not batch_requests:
+            raise Exception("Nenhuma alteração encontrada para analisar")
+        
+        payload = "\n".join(json.dumps(request, ensure_ascii=False) for request in batch_requests)
+        
+        input_file = self.client.files.create(
+            file=('commit-ai-batch.jsonl', payload.encode('utf-8')),
+            purpose='batch'
+        )
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=self.ENDPOINT,
+            completion_window=self.COMPLETION_WINDOW
+        )
+        
+        if labels:
+            self._save_labels(batch.id, diffs, labels)
+        
+        logger.info(f"Lote {batch.id} enviado com {len(batch_requests)} requisições")
+        return batch.id
+    
+    def _save_labels(self, batch_id: str, diffs: List[str], labels: List[str]) -> None:
+        """Registra o rótulo de cada diff do lote, indexado pelo custom_id"""
+        index = {self.custom_id(diff_text): label
+                 for diff_text, label in zip(diffs, labels) if diff_text.strip()}
+        path = self._labels_path(batch_id)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False)
+        except OSError as e:
+            logger.warning(f"Não foi possível registrar os rótulos do lote {batch_id}: {e}")
+    
+    def poll(self, batch_id: str) -> Optional[Dict[str, str]]:
+        """
+        Verifica um lote e coleta os resultados quando concluído
+        
+        As mensagens geradas são salvas no cache, então chamadas futuras de
+        generate_commit_message com os mesmos diffs não acessam a API.
+        
+        Args:
+            batch_id: ID retornado por submit
+        
+        Returns:
+            Dict[str, str]: Mensagens por custom_id, ou None se ainda em andamento
+        
+        Raises:
+            Exception: Se o lote falhar, expirar ou for cancelado
+        """
+        batch = self.client.batches.retrieve(batch_id)
+        
+        if batch.status in self.FAILED_STATUSES:
+            raise Exception(f"Lote {batch_id} terminou com status '{batch.status}'")
+        
+        if batch.status != 'completed':
+            logger.debug(f"Lote {batch_id} em andamento: {batch.status}")
+            return None
+        
+        error_file_id = getattr(batch, 'error_file_id', None)
+        if not batch.output_file_id:
+            # Todas as requisições falharam: só existe o arquivo de erros
+            raise Exception(f"Lote {batch_id} concluído sem resultados "
+                            f"(erros no arquivo {error_file_id or 'indisponível'})")
+        if error_file_id:
+            logger.warning(f"Lote {batch_id} tem requisições com erro (arquivo {error_file_id})")
+        
+        content = self.client.files.content(batch.output_file_id).text
+        service = self.ai_service
+        results = {}
+        
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            
+            entry = json.loads(line)
+            custom_id = entry.get('custom_id')
+            response = entry.get('response') or {}
+            
+            if response.get('status_code') != 200:
+                logger.warning(f"Requisição {custom_id} do lote falhou: {entry.get('error')}")
+                continue
+            
+            try:
+                raw_message = response['body']['choices'][0]['message']['content']
+            except (KeyError, IndexError, TypeError):
+                logger.warning(f"Resposta inesperada para a requisição {custom_id} do lote")
+                continue
+            
+            results[custom_id] = service._clean_commit_message(raw_message)
+        
+        if service.cache:
+            service.cache.set_many_by_key(
+                results, service.provider, service.model,
+                service.temperature, service.max_tokens
+            )
+        
+        logger.info(f"Lote {batch_id} concluído: {len(results)} mensagens geradas")
+        return results
@@ -9,14 +9,58 @@ import hashlib
 import json
 import sqlite3
 from pathlib import Path
-from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, Callable, Iterable, List, Tuple
+from datetime import timedelta
+from .database import ConnectionPool, enable_wal
 from .logger import logger
+from .paths import commit_ai_home
+
+# BLAKE3 é bem mais rápido que SHA-256 em diffs grandes; opcional
+try:
+    from blake3 import blake3 as _blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+    logger.debug("blake3 não disponível - usando SHA-256 (instale com: pip install blake3)")
+
+# UPDATE ... RETURNING está disponível a partir do SQLite 3.35
+RETURNING_SUPPORTED = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Funções chamadas quando entradas do cache mudam ou são removidas, para que
+# caches em memória na frente do SQLite sejam invalidados. Recebem as chaves
+# alteradas ou None quando o cache inteiro deve ser descartado.
+_INVALIDATION_LISTENERS: List[Callable[[Optional[Iterable[str]]], None]] = []
+
+
+def add_invalidation_listener(listener: Callable[[Optional[Iterable[str]]], None]) -> None:
+    """
+    Registra uma função chamada quando entradas do cache são alteradas ou removidas
+    
+    Args:
+        listener: Recebe as chaves alteradas ou None se todas forem invalidadas
+    """
+    if listener not in _INVALIDATION_LISTENERS:
+        _INVALIDATION_LISTENERS.append(listener)
+
+
+def _notify_invalidation(keys: Optional[Iterable[str]] = None) -> None:
+    """Avisa os listeners registrados sobre chaves alteradas (None = todas)"""
+    for listener in _INVALIDATION_LISTENERS:
+        try:
+            listener(keys)
+        except Exception as e:
+            logger.debug(f"Erro ao invalidar cache em memória: {e}")
 
 
 class CommitCache:
     """Sistema de cache para respostas da IA"""
     
+    _INSERT_SQL = '''
+        INSERT OR REPLACE INTO commit_cache 
+        (diff_hash, provider, model, temperature, max_tokens, commit_message)
+        VALUES (?, ?, ?, ?, ?, ?)
+    '''
+    
     def __init__(self, cache_dir: Optional[Path] = None, max_age_hours: int = 24):
         """
         Inicializa o sistema de cache
@@ -25,19 +69,23 @@ class CommitCache:
             cache_dir: Diretório para o cache (padrão: ~/.commit-ai/cache)
             max_age_hours: Idade máxima do cache em horas (padrão: 24h)
         """
-        self.cache_dir = cache_dir or (Path.home() / '.commit-ai' / 'cache')
+        self.cache_dir = cache_dir or (commit_ai_home() / 'cache')
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         
         self.db_path = self.cache_dir / 'cache.db'
         self.max_age = timedelta(hours=max_age_hours)
+        # Modificador para datetime('now', ?) do SQLite (created_at é gravado em UTC)
+        self._max_age_modifier = f"-{int(self.max_age.total_seconds())} seconds"
         
         logger.debug(f"Inicializando cache em: {self.db_path}")
+        self._pool = ConnectionPool(self.db_path)
         self._init_database()
     
     def _init_database(self):
         """Inicializa o banco de dados SQLite"""
+        enable_wal(self.db_path)
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.get() as conn:
                 conn.execute('''
                     CREATE TABLE IF NOT EXISTS commit_cache (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -58,16 +106,34 @@ class CommitCache:
                     ON commit_cache(diff_hash)
                 ''')
                 
+                # Índice para remoção de entradas expiradas por faixa de data
+                conn.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_created_at 
+                    ON commit_cache(created_at)
+                ''')
+                
+                # Índice de cobertura para as contagens por provedor em stats()
+                conn.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_provider_created 
+                    ON commit_cache(provider, created_at)
+                ''')
+                conn.execute('DROP INDEX IF EXISTS idx_provider')
+                
                 conn.commit()
                 logger.debug("Banco de dados de cache inicializado")
                 
         except Exception as e:
             logger.error(f"Erro ao inicializar banco de cache: {e}")
     
-    def _generate_hash(self, diff_text: str, provider: str, model: str, 
-                      temperature: float, max_tokens: int) -> str:
+    @staticmethod
+    def make_key(diff_text: str, provider: str, model: str,
+                 temperature: float, max_tokens: int) -> str:
         """
-        Gera hash único baseado nos parâmetros
+        Gera a chave de cache baseada no conteúdo do diff e nos parâmetros
+        
+        Usa BLAKE3 quando disponível (SHA-256 caso contrário). Os parâmetros
+        entram como prefixo para que o diff seja processado uma única vez,
+        sem concatenar uma nova string do tamanho do diff.
         
         Args:
             diff_text: Texto do diff
@@ -77,11 +143,12 @@ class CommitCache:
             max_tokens: Parâmetro max_tokens
             
         Returns:
-            str: Hash SHA-256
+            str: Hash hexadecimal
         """
-        # Combina todos os parâmetros que afetam a resposta
-        content = f"{diff_text}|{provider}|{model}|{temperature}|{max_tokens}"
-        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+        hasher = _blake3() if BLAKE3_AVAILABLE else hashlib.sha256()
+        hasher.update(f"{provider}|{model}|{temperature}|{max_tokens}|".encode('utf-8'))
+        hasher.update(diff_text.encode('utf-8'))
+        return hasher.hexdigest()
     
     def get(self, diff_text: str, provider: str, model: str, 
             temperature: float, max_tokens: int) -> Optional[str]:
@@ -98,42 +165,64 @@ class CommitCache:
         Returns:
             str: Mensagem de commit em cache ou None se não encontrada
         """
-        diff_hash = self._generate_hash(diff_text, provider, model, temperature, max_tokens)
+        return self.get_by_key(self.make_key(diff_text, provider, model, temperature, max_tokens))
+    
+    def get_by_key(self, diff_hash: str) -> Optional[str]:
+        """
+        Busca uma resposta no cache a partir de uma chave já calculada
+        
+        Args:
+            diff_hash: Chave gerada por make_key
+            
+        Returns:
+            str: Mensagem de commit em cache ou None se não encontrada
+        """
+        entry = self.get_entry_by_key(diff_hash)
+        return entry[0] if entry else None
+    
+    def get_entry_by_key(self, diff_hash: str) -> Optional[Tuple[str, float]]:
+        """
+        Busca uma resposta no cache junto com o tempo de validade restante
+        
+        Args:
+            diff_hash: Chave gerada por make_key
         
+        Returns:
+            tuple: (mensagem, segundos até expirar, contados a partir de created_at)
+                   ou None se não encontrada
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Busca entrada no cache
-                cursor.execute('''
-                    SELECT commit_message, created_at 
-                    FROM commit_cache 
-                    WHERE diff_hash = ?
-                ''', (diff_hash,))
-                
-                result = cursor.fetchone()
-                
-                if result:
-                    commit_message, created_at = result
-                    
-                    # Verifica se o cache ainda é válido
-                    created_time = datetime.fromisoformat(created_at.replace('Z', '+00:00').replace('+00:00', ''))
-                    if datetime.now() - created_time <= self.max_age:
-                        # Atualiza o timestamp de acesso
-                        cursor.execute('''
+            with self._pool.get() as conn:
+                # Entradas expiradas são filtradas pelo próprio SQLite; a idade é
+                # calculada no banco para evitar conversões de fuso horário
+                if RETURNING_SUPPORTED:
+                    # Busca e atualiza o timestamp de acesso numa única instrução
+                    rows = conn.execute('''
+                        UPDATE commit_cache 
+                        SET accessed_at = CURRENT_TIMESTAMP 
+                        WHERE diff_hash = ? AND created_at >= datetime('now', ?)
+                        RETURNING commit_message,
+                                  (julianday('now') - julianday(created_at)) * 86400.0
+                    ''', (diff_hash, self._max_age_modifier)).fetchall()
+                else:
+                    rows = conn.execute('''
+                        SELECT commit_message,
+                               (julianday('now') - julianday(created_at)) * 86400.0
+                        FROM commit_cache 
+                        WHERE diff_hash = ? AND created_at >= datetime('now', ?)
+                    ''', (diff_hash, self._max_age_modifier)).fetchall()
+                    if rows:
+                        conn.execute('''
                             UPDATE commit_cache 
                             SET accessed_at = CURRENT_TIMESTAMP 
                             WHERE diff_hash = ?
                         ''', (diff_hash,))
-                        conn.commit()
-                        
-                        logger.info(f"Cache hit para hash: {diff_hash[:12]}...")
-                        return commit_message
-                    else:
-                        # Remove entrada expirada
-                        cursor.execute('DELETE FROM commit_cache WHERE diff_hash = ?', (diff_hash,))
-                        conn.commit()
-                        logger.debug(f"Cache expirado removido: {diff_hash[:12]}...")
+                
+                if rows:
+                    logger.info(f"Cache hit para hash: {diff_hash[:12]}...")
+                    message, age = rows[0]
+                    ttl = max(0.0, self.max_age.total_seconds() - (age or 0.0))
+                    return message, ttl
                 
                 logger.debug(f"Cache miss para hash: {diff_hash[:12]}...")
                 return None
@@ -155,65 +244,144 @@ class CommitCache:
             max_tokens: Parâmetro max_tokens
             commit_message: Mensagem de commit para armazenar
         """
-        diff_hash = self._generate_hash(diff_text, provider, model, temperature, max_tokens)
+        diff_hash = self.make_key(diff_text, provider, model, temperature, max_tokens)
+        self.set_by_key(diff_hash, provider, model, temperature, max_tokens, commit_message)
+    
+    def set_by_key(self, diff_hash: str, provider: str, model: str,
+                   temperature: float, max_tokens: int, commit_message: str):
+        """
+        Armazena uma resposta no cache a partir de uma chave já calculada
         
+        Args:
+            diff_hash: Chave gerada por make_key
+            provider: Provedor de IA
+            model: Modelo usado
+            temperature: Parâmetro temperature
+            max_tokens: Parâmetro max_tokens
+            commit_message: Mensagem de commit para armazenar
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
+            with self._pool.get() as conn:
                 # Insere ou atualiza entrada no cache
-                cursor.execute('''
-                    INSERT OR REPLACE INTO commit_cache 
+                conn.execute(
+                    self._INSERT_SQL,
                     (diff_hash, provider, model, temperature, max_tokens, commit_message)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (diff_hash, provider, model, temperature, max_tokens, commit_message))
-                
-                conn.commit()
+                )
                 logger.debug(f"Cache armazenado para hash: {diff_hash[:12]}...")
+            _notify_invalidation([diff_hash])
+                
+        except Exception as e:
+            logger.error(f"Erro ao armazenar no cache: {e}")
+    
+    def set_many_by_key(self, messages: Dict[str, str], provider: str, model: str,
+                        temperature: float, max_tokens: int):
+        """
+        Armazena várias respostas geradas com os mesmos parâmetros numa única transação
+        
+        Args:
+            messages: Mensagens de commit por chave (geradas por make_key)
+            provider: Provedor de IA
+            model: Modelo usado
+            temperature: Parâmetro temperature
+            max_tokens: Parâmetro max_tokens
+        """
+        if not messages:
+            return
+        
+        try:
+            with self._pool.get() as conn:
+                conn.executemany(
+                    self._INSERT_SQL,
+                    ((diff_hash, provider, model, temperature, max_tokens, message)
+                     for diff_hash, message in messages.items())
+                )
+                logger.debug(f"{len(messages)} entradas armazenadas no cache")
+            _notify_invalidation(list(messages))
                 
         except Exception as e:
             logger.error(f"Erro ao armazenar no cache: {e}")
     
-    def clear_expired(self):
-        """Remove entradas expiradas do cache"""
+    def clear_expired(self) -> int:
+        """
+        Remove entradas expiradas do cache
+        
+        Returns:
+            int: Número de entradas removidas
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.get() as conn:
                 cursor = conn.cursor()
                 
                 # Remove entradas antigas
-                cutoff_time = datetime.now() - self.max_age
                 cursor.execute('''
                     DELETE FROM commit_cache 
-                    WHERE datetime(created_at) < ?
-                ''', (cutoff_time.isoformat(),))
+                    WHERE created_at < datetime('now', ?)
+                ''', (self._max_age_modifier,))
                 
                 removed_count = cursor.rowcount
                 conn.commit()
                 
                 if removed_count > 0:
                     logger.info(f"Removidas {removed_count} entradas expiradas do cache")
+                    _notify_invalidation()
+                
+                return removed_count
                 
         except Exception as e:
             logger.error(f"Erro ao limpar cache expirado: {e}")
+            return 0
     
-    def clear_all(self):
-        """Remove todas as entradas do cache"""
+    def optimize(self) -> bool:
+        """
+        Compacta o banco de cache e atualiza as estatísticas do SQLite
+        
+        Consolida o WAL no arquivo principal, executa VACUUM e PRAGMA optimize.
+        
+        Returns:
+            bool: True se a otimização foi concluída
+        """
+        try:
+            conn = self._pool.get()
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            conn.execute('VACUUM')
+            conn.execute('PRAGMA optimize')
+            logger.info("Banco de cache otimizado")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Erro ao otimizar banco de cache: {e}")
+            return False
+    
+    def close(self):
+        """Fecha as conexões abertas com o banco de cache"""
+        self._pool.close()
+    
+    def clear_all(self) -> int:
+        """
+        Remove todas as entradas do cache
+        
+        Returns:
+            int: Número de entradas removidas
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.get() as conn:
                 cursor = conn.cursor()
                 cursor.execute('DELETE FROM commit_cache')
                 removed_count = cursor.rowcount
                 conn.commit()
                 
                 logger.info(f"Cache limpo: {removed_count} entradas removidas")
+                _notify_invalidation()
+                return removed_count
                 
         except Exception as e:
             logger.error(f"Erro ao limpar cache: {e}")
+            return 0
     
     def stats(self) -> Dict[str, Any]:
         """Retorna estatísticas do cache"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.get() as conn:
                 cursor = conn.cursor()
                 
                 # Total de entradas
@@ -6,10 +6,13 @@ Fornece comandos para visualizar, limpar e gerenciar o cache.
 """
 
 import click
-from pathlib import Path
 from commit_ai.cache import CommitCache
 from commit_ai.logger import logger
 
+# Cabeçalhos fixos, formatados uma única vez
+_HEADER_STATS = click.style("📊 Estatísticas do Cache", fg='cyan', bold=True)
+_HEADER_INFO = click.style("ℹ️  Informações do Cache", fg='cyan', bold=True)
+
 
 @click.group()
 def cache_cli():
@@ -27,7 +30,7 @@ def stats():
         click.echo(click.style(f"❌ Erro: {stats_data['error']}", fg='red'))
         return
     
-    click.echo(click.style("📊 Estatísticas do Cache", fg='cyan', bold=True))
+    click.echo(_HEADER_STATS)
     click.echo(f"📁 Diretório: {stats_data['cache_dir']}")
     click.echo(f"📈 Total de entradas: {stats_data['total_entries']}")
     click.echo(f"⏰ Idade máxima: {stats_data['max_age_hours']:.1f} horas")
@@ -52,11 +55,10 @@ def clear():
     cache = CommitCache()
     
     try:
-        old_stats = cache.stats()
-        cache.clear_all()
+        removed = cache.clear_all()
         
         click.echo(click.style(
-            f"✅ Cache limpo com sucesso! {old_stats['total_entries']} entradas removidas.", 
+            f"✅ Cache limpo com sucesso! {removed} entradas removidas.", 
             fg='green'
         ))
     except Exception as e:
@@ -69,11 +71,8 @@ def cleanup():
     cache = CommitCache()
     
     try:
-        old_stats = cache.stats()
-        cache.clear_expired()
-        new_stats = cache.stats()
-        
-        removed = old_stats['total_entries'] - new_stats['total_entries']
+        # O próprio DELETE informa quantas entradas foram removidas
+        removed = cache.clear_expired()
         
         if removed > 0:
             click.echo(click.style(
@@ -107,22 +106,37 @@ def set_max_age(hours):
     click.echo(f"📊 Total de entradas válidas: {stats_data['total_entries']}")
 
 
+@cache_cli.command()
+def optimize():
+    """⚡ Compactar e otimizar o banco de cache"""
+    cache = CommitCache()
+    db_file = cache.db_path
+    old_size = db_file.stat().st_size if db_file.exists() else 0
+    
+    if cache.optimize():
+        new_size = db_file.stat().st_size
+        click.echo(click.style(
+            f"✅ Cache otimizado! Tamanho: {old_size:,} → {new_size:,} bytes",
+            fg='green'
+        ))
+    else:
+        click.echo(click.style("❌ Erro ao otimizar o cache.", fg='red'))
+
+
 @cache_cli.command()
 def info():
     """ℹ️  Informações detalhadas sobre o cache"""
     cache = CommitCache()
-    cache_dir = Path.home() / '.commit-ai' / 'cache'
     
-    click.echo(click.style("ℹ️  Informações do Cache", fg='cyan', bold=True))
-    click.echo(f"📁 Diretório: {cache_dir}")
-    click.echo(f"💾 Arquivo do banco: {cache_dir / 'cache.db'}")
+    click.echo(_HEADER_INFO)
+    click.echo(f"📁 Diretório: {cache.cache_dir}")
+    click.echo(f"💾 Arquivo do banco: {cache.db_path}")
     
-    # Verificar se os arquivos existem
-    db_file = cache_dir / 'cache.db'
-    if db_file.exists():
-        file_size = db_file.stat().st_size
+    # Um único stat: a ausência do arquivo vem como exceção
+    try:
+        file_size = cache.db_path.stat().st_size
         click.echo(f"📏 Tamanho do arquivo: {file_size:,} bytes")
-    else:
+    except FileNotFoundError:
         click.echo("⚠️  Arquivo de cache não encontrado")
     
     # Mostrar configurações
@@ -4,17 +4,41 @@ Arquivo de configuração para o Commit-AI
 Este módulo gerencia configurações persistentes do usuário.
 """
 
+import copy
 import json
 import os
-from pathlib import Path
 from typing import Dict, Any, Optional
+from .logger import logger
+from .paths import commit_ai_home
+
+# orjson lê e grava JSON bem mais rápido que o módulo padrão; opcional
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    logger.debug("orjson não disponível - usando json da biblioteca padrão (instale com: pip install orjson)")
+
+
+def _dumps(config: Dict[str, Any]) -> bytes:
+    """Serializa a configuração em JSON indentado (UTF-8)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(config, option=orjson.OPT_INDENT_2)
+    return json.dumps(config, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def _loads(data: bytes) -> Any:
+    """Lê a configuração a partir de JSON (UTF-8)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data.decode('utf-8'))
 
 
 class ConfigManager:
     """Gerenciador de configurações do Commit-AI"""
     
     def __init__(self):
-        self.config_dir = Path.home() / '.commit-ai'
+        self.config_dir = commit_ai_home()
         self.config_file = self.config_dir / 'config.json'
         self.default_config = {
             'default_api': 'openai',
@@ -27,8 +51,12 @@ class ConfigManager:
                 'feat', 'fix', 'docs', 'style', 'refactor',
                 'test', 'chore', 'perf', 'ci', 'build'
             ],
-            'custom_prompt': None
+            'custom_prompt': None,
+            'race_providers': []
         }
+        # Configuração já carregada e a assinatura (mtime, tamanho) do arquivo lido
+        self._cached: Optional[Dict[str, Any]] = None
+        self._signature: Optional[tuple] = None
         self._ensure_config_exists()
     
     def _ensure_config_exists(self):
@@ -37,24 +65,62 @@ class ConfigManager:
         if not self.config_file.exists():
             self.save_config(self.default_config)
     
+    def _file_signature(self) -> Optional[tuple]:
+        """Assinatura do arquivo de configuração, usada para detectar alterações externas"""
+        try:
+            st = os.stat(self.config_file)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+    
     def load_config(self) -> Dict[str, Any]:
-        """Carrega a configuração do arquivo"""
+        """
+        Carrega a configuração do arquivo
+        
+        O resultado fica em memória e só é relido quando o arquivo muda.
+        """
+        signature = self._file_signature()
+        if self._cached is not None and signature is not None and signature == self._signature:
+            # Cópia profunda: listas e dicts alterados pelo chamador não podem
+            # alterar o cache, senão save_config acharia que nada mudou
+            return copy.deepcopy(self._cached)
+        
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            with open(self.config_file, 'rb') as f:
+                config = _loads(f.read())
             # Mescla com valores padrão para chaves faltantes
-            return {**self.default_config, **config}
+            self._cached = {**copy.deepcopy(self.default_config), **config}
+            self._signature = signature
+            return copy.deepcopy(self._cached)
         except (FileNotFoundError, json.JSONDecodeError):
-            return self.default_config.copy()
+            return copy.deepcopy(self.default_config)
     
     def save_config(self, config: Dict[str, Any]):
-        """Salva a configuração no arquivo"""
+        """
+        Salva a configuração no arquivo
+        
+        A escrita é omitida quando nada mudou desde a última leitura/gravação
+        e o arquivo não foi alterado por fora.
+        """
+        merged = {**self.default_config, **config}
+        unchanged = (merged == self._cached and self._signature is not None and
+                     self._file_signature() == self._signature)
+        if unchanged:
+            return
+        
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+            with open(self.config_file, 'wb') as f:
+                f.write(_dumps(config))
+            self._cached = copy.deepcopy(merged)
+            self._signature = self._file_signature()
         except Exception as e:
             print(f"Erro ao salvar configuração: {e}")
     
+    @property
+    def config(self) -> Dict[str, Any]:
+        """Configuração atual (servida do cache em memória enquanto o arquivo não muda)"""
+        return self.load_config()
+    
     def get(self, key: str, default: Any = None) -> Any:
         """Obtém um valor da configuração"""
         config = self.load_config()
@@ -66,6 +132,12 @@ class ConfigManager:
         config[key] = value
         self.save_config(config)
     
+    def update(self, updates: Dict[str, Any]):
+        """Define vários valores na configuração com uma única escrita"""
+        config = self.load_config()
+        config.update(updates)
+        self.save_config(config)
+    
     def reset(self):
         """Reseta a configuração para os valores padrão"""
         self.save_config(self.default_config)
@@ -7,8 +7,8 @@ guiando o usuário através de todas as opções disponíveis.
 """
 
 import os
+import re
 import sys
-from pathlib import Path
 from typing import Dict, List, Optional, Any
 import json
 
@@ -23,11 +23,26 @@ try:
 except ImportError:
     RICH_AVAILABLE = False
 
+from dotenv import set_key
+
 from .config_manager import ConfigManager
 from .ai_service import AIService
 from .templates import CommitTemplateManager
 from .logger import logger
 
+# Tags de markup do Rich, removidas quando a saída é um terminal simples
+_RICH_MARKUP_RE = re.compile(r'\[/?\w+\]')
+
+# Configurações exibidas (nesta ordem) na configuração existente e no resumo final
+_EXISTING_CONFIG_KEYS = (
+    'default_api', 'default_template', 'default_model',
+    'hooks_enabled', 'auto_improve_messages', 'tui_theme'
+)
+_SUMMARY_CONFIG_KEYS = (
+    'default_api', 'default_template', 'hooks_enabled',
+    'plugins_enabled', 'analytics_enabled', 'enable_tui'
+)
+
 
 class ConfigurationWizard:
     """Wizard interativo para configuração inicial"""
@@ -36,6 +51,8 @@ class ConfigurationWizard:
         self.config_manager = ConfigManager()
         self.console = Console() if RICH_AVAILABLE else None
         self.configuration = {}
+        # Variáveis a gravar no .env, escritas de uma vez ao salvar a configuração
+        self._env_updates: Dict[str, str] = {}
         
     def run(self) -> bool:
         """Executa o wizard completo"""
@@ -117,8 +134,7 @@ class ConfigurationWizard:
             self.configuration['default_template'] = template_map.get(template_choice, 'conventional')
             
             # Salvar
-            for key, value in self.configuration.items():
-                self.config_manager.set(key, value)
+            self.config_manager.update(self.configuration)
             
             print("\n✅ Configuração básica salva!")
             return True
@@ -179,13 +195,8 @@ incluindo provedores de IA, templates, hooks e outras preferências.
     
     def _format_existing_config(self, config: Dict[str, Any]) -> str:
         """Formata configuração existente para exibição"""
-        important_keys = [
-            'default_api', 'default_template', 'default_model',
-            'hooks_enabled', 'auto_improve_messages', 'tui_theme'
-        ]
-        
         lines = []
-        for key in important_keys:
+        for key in _EXISTING_CONFIG_KEYS:
             if key in config:
                 value = config[key]
                 if isinstance(value, bool):
@@ -200,6 +211,7 @@ incluindo provedores de IA, templates, hooks e outras preferências.
         
         # Mostrar provedores disponíveis
         providers = AIService.get_supported_providers()
+        available_providers = []
         
         table = Table(title="Provedores Disponíveis")
         table.add_column("Provider", style="cyan")
@@ -209,6 +221,9 @@ incluindo provedores de IA, templates, hooks e outras preferências.
         
         for provider, info in providers.items():
             available = AIService.is_provider_available(provider)
+            if available:
+                available_providers.append(provider)
+            
             status = "✅ Disponível" if available else "❌ Indisponível"
             models = ", ".join(info['models'][:3]) + "..." if len(info['models']) > 3 else ", ".join(info['models'])
             
@@ -217,8 +232,6 @@ incluindo provedores de IA, templates, hooks e outras preferências.
         self.console.print(table)
         
         # Selecionar provider padrão
-        available_providers = [p for p in providers.keys() if AIService.is_provider_available(p)]
-        
         if not available_providers:
             self.console.print("[red]❌ Nenhum provider disponível! Configure API keys primeiro.[/red]")
             return False
@@ -503,29 +516,19 @@ incluindo provedores de IA, templates, hooks e outras preferências.
         return True
     
     def _save_api_key(self, provider: str, api_key: str) -> None:
-        """Salva API key no arquivo .env"""
+        """Registra a API key para ser salva no arquivo .env"""
+        self._env_updates[f'{provider.upper()}_API_KEY'] = api_key
+    
+    def _flush_env(self) -> None:
+        """Grava as variáveis pendentes no arquivo .env"""
+        if not self._env_updates:
+            return
+        
         try:
-            env_file = Path('.env')
-            env_var = f'{provider.upper()}_API_KEY={api_key}\n'
-            
-            if env_file.exists():
-                content = env_file.read_text()
-                lines = content.split('\n')
-                
-                # Atualizar linha existente ou adicionar nova
-                key_found = False
-                for i, line in enumerate(lines):
-                    if line.startswith(f'{provider.upper()}_API_KEY='):
-                        lines[i] = env_var.rstrip()
-                        key_found = True
-                        break
-                
-                if not key_found:
-                    lines.append(env_var.rstrip())
-                
-                env_file.write_text('\n'.join(lines))
-            else:
-                env_file.write_text(env_var)
+            # O parser do python-dotenv reconhece aspas, 'export' e comentários
+            for key, value in self._env_updates.items():
+                set_key('.env', key, value, quote_mode='never')
+            self._env_updates.clear()
             
             self.console.print(f"[green]API key salva em .env[/green]")
             
@@ -542,12 +545,13 @@ incluindo provedores de IA, templates, hooks e outras preferências.
             ) as progress:
                 task = progress.add_task("Salvando configurações...", total=None)
                 
-                # Salvar cada configuração
-                for key, value in self.configuration.items():
-                    self.config_manager.set(key, value)
+                # Salvar todas as configurações de uma vez
+                self.config_manager.update(self.configuration)
                 
                 progress.update(task, description="Configurações salvas!")
             
+            self._flush_env()
+            
             # Resumo final
             self._show_configuration_summary()
             
@@ -572,12 +576,7 @@ incluindo provedores de IA, templates, hooks e outras preferências.
         table.add_column("Configuração", style="cyan")
         table.add_column("Valor", style="white")
         
-        important_configs = [
-            'default_api', 'default_template', 'hooks_enabled',
-            'plugins_enabled', 'analytics_enabled', 'enable_tui'
-        ]
-        
-        for key in important_configs:
+        for key in _SUMMARY_CONFIG_KEYS:
             if key in self.configuration:
                 value = self.configuration[key]
                 if isinstance(value, bool):
@@ -593,9 +592,7 @@ incluindo provedores de IA, templates, hooks e outras preferências.
             self.console.print(message)
         else:
             # Remover markup Rich para terminal simples
-            import re
-            clean_message = re.sub(r'\[/?\w+\]', '', message)
-            print(clean_message)
+            print(_RICH_MARKUP_RE.sub('', message))
 
 
 def run_configuration_wizard() -> bool:
@@ -0,0 +1,104 @@
+"""
+Utilitários de SQLite para o Commit-AI
+
+Centraliza a abertura de conexões com os bancos locais (cache e analytics),
+aplicando as mesmas configurações de desempenho em todos eles.
+"""
+
+import sqlite3
+import threading
+import weakref
+from contextlib import closing
+from pathlib import Path
+from typing import List, Union
+from .logger import logger
+
+
+# PRAGMAs aplicados a cada conexão (valem apenas para a conexão atual)
+SQLITE_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',      # Seguro com WAL, sem fsync a cada commit
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=268435456',     # Leituras servidas via mmap (256 MB)
+    'PRAGMA cache_size=-65536',       # Cache de páginas de 64 MB
+    'PRAGMA busy_timeout=5000',       # Espera até 5s por locks de outros processos
+)
+
+
+def enable_wal(db_path: Union[str, Path]) -> None:
+    """
+    Ativa o modo WAL no banco (persistente, basta executar uma vez)
+    
+    Args:
+        db_path: Caminho do banco SQLite
+    """
+    try:
+        with closing(sqlite3.connect(db_path)) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+    except sqlite3.Error as e:
+        logger.warning(f"Não foi possível ativar WAL em {db_path}: {e}")
+
+
+def connect(db_path: Union[str, Path], check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    Abre uma conexão SQLite com os PRAGMAs de desempenho aplicados
+    
+    Args:
+        db_path: Caminho do banco SQLite
+        check_same_thread: Se a conexão só pode ser usada pela thread que a criou
+    
+    Returns:
+        sqlite3.Connection: Conexão configurada
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _close_connections(connections: List[sqlite3.Connection]) -> None:
+    """Fecha as conexões abertas por um ConnectionPool"""
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    connections.clear()
+
+
+class ConnectionPool:
+    """Mantém uma conexão SQLite reaproveitável por thread para um banco"""
+    
+    def __init__(self, db_path: Union[str, Path]):
+        """
+        Inicializa o pool
+        
+        Args:
+            db_path: Caminho do banco SQLite
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        # Fecha as conexões quando o pool for coletado ou ao final do processo
+        self._finalizer = weakref.finalize(self, _close_connections, self._connections)
+    
+    def get(self) -> sqlite3.Connection:
+        """
+        Retorna a conexão da thread atual, abrindo-a na primeira chamada
+        
+        Returns:
+            sqlite3.Connection: Conexão configurada
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = connect(self.db_path, check_same_thread=False)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+    
+    def close(self) -> None:
+        """Fecha todas as conexões abertas pelo pool"""
+        with self._lock:
+            _close_connections(self._connections)
+        self._local = threading.local()
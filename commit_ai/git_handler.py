@@ -7,30 +7,104 @@ como obter diffs, verificar alterações e fazer commits.
 
 import os
 import subprocess
-import sys
-from typing import Dict, List, Optional
+import threading
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Union
+
+
+# Limite de leitura de get_staged_diff_stream (1 MB)
+DIFF_STREAM_LIMIT = 1 << 20
+
+
+@lru_cache(maxsize=None)
+def _git_root_for(cwd: str) -> Optional[str]:
+    """
+    Encontra a raiz do repositório Git que contém um diretório
+    
+    Args:
+        cwd: Diretório de partida
+        
+    Usa `git rev-parse --show-toplevel`, que também entende worktrees,
+    submódulos e GIT_DIR. Se o git não estiver no PATH, procura '.git'
+    subindo pelos diretórios pais.
+    
+    Returns:
+        str: Caminho para a raiz do repositório Git ou None se não encontrado
+    """
+    try:
+        result = subprocess.run(
+            ['git', 'rev-parse', '--show-toplevel'],
+            cwd=cwd,
+            capture_output=True,
+            text=True
+        )
+    except OSError:
+        pass
+    else:
+        if result.returncode != 0:
+            return None
+        return os.path.normpath(result.stdout.strip())
+    
+    current_dir = cwd
+    while current_dir != os.path.dirname(current_dir):
+        if os.path.exists(os.path.join(current_dir, '.git')):
+            return current_dir
+        current_dir = os.path.dirname(current_dir)
+    return None
 
 
 class GitHandler:
     """Classe para gerenciar operações do Git"""
     
+    # Status de `git diff --name-status` -> categoria em get_file_changes
+    _STATUS_CATEGORIES = {
+        'M': 'Modificados',
+        'A': 'Adicionados',
+        'D': 'Removidos'
+    }
+    
     def __init__(self):
         """Inicializa o GitHandler"""
         self.git_dir = self._find_git_root()
+        self._object_reader: Optional[subprocess.Popen] = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Encerra o processo git persistente usado para consultar objetos"""
+        proc, self._object_reader = self._object_reader, None
+        if proc is None:
+            return
+        
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+            proc.wait()
+        finally:
+            proc.stdout.close()
     
     def _find_git_root(self) -> Optional[str]:
         """
         Encontra a raiz do repositório Git
         
+        O resultado é memorizado por diretório; uma raiz em cache é confirmada
+        com uma única verificação de '.git' em vez de percorrer os diretórios pais.
+        
         Returns:
             str: Caminho para a raiz do repositório Git ou None se não encontrado
         """
-        current_dir = os.getcwd()
-        while current_dir != os.path.dirname(current_dir):
-            if os.path.exists(os.path.join(current_dir, '.git')):
-                return current_dir
-            current_dir = os.path.dirname(current_dir)
-        return None
+        cwd = os.getcwd()
+        root = _git_root_for(cwd)
+        if root is None or not os.path.exists(os.path.join(root, '.git')):
+            _git_root_for.cache_clear()
+            root = _git_root_for(cwd)
+        return root
     
     def is_git_repo(self) -> bool:
         """
@@ -41,15 +115,18 @@ class GitHandler:
         """
         return self.git_dir is not None
     
-    def _run_git_command(self, args: List[str]) -> str:
+    def _run_git_command(self, args: List[str], capture: bool = True,
+                         decode: bool = True) -> Union[str, bytes]:
         """
         Executa um comando git e retorna a saída
         
         Args:
             args: Lista de argumentos para o comando git
+            capture: Se False, descarta a saída padrão (retorna '')
+            decode: Se False, retorna a saída em bytes sem decodificar
             
         Returns:
-            str: Saída do comando git
+            str: Saída do comando git (bytes se decode=False)
             
         Raises:
             subprocess.CalledProcessError: Se o comando falhar
@@ -58,13 +135,76 @@ class GitHandler:
             result = subprocess.run(
                 ['git'] + args,
                 cwd=self.git_dir,
-                capture_output=True,
-                text=True,
+                stdout=subprocess.PIPE if capture else subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=decode,
                 check=True
             )
-            return result.stdout.strip()
         except subprocess.CalledProcessError as e:
-            raise Exception(f"Erro ao executar comando git: {e.stderr}")
+            stderr = e.stderr
+            if isinstance(stderr, bytes):
+                stderr = stderr.decode('utf-8', errors='replace')
+            raise Exception(f"Erro ao executar comando git: {stderr}")
+        
+        if not capture:
+            return ''
+        return result.stdout.strip()
+    
+    def _run_git_status(self, args: List[str]) -> int:
+        """
+        Executa um comando git descartando a saída e retorna o código de saída
+        
+        Args:
+            args: Lista de argumentos para o comando git
+            
+        Returns:
+            int: Código de saída do comando git
+        """
+        return subprocess.run(
+            ['git'] + args,
+            cwd=self.git_dir,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        ).returncode
+    
+    def _resolve_object(self, rev: str) -> Optional[str]:
+        """
+        Resolve uma revisão para o hash do objeto
+        
+        Usa um único `git cat-file --batch-check` mantido aberto durante a vida
+        do GitHandler, evitando um fork+exec do git a cada consulta.
+        
+        Args:
+            rev: Revisão a resolver (ex: 'HEAD^{tree}')
+            
+        Returns:
+            str: Hash do objeto ou None se a revisão não existir
+        """
+        if '\n' in rev:
+            return None
+        
+        try:
+            if self._object_reader is None or self._object_reader.poll() is not None:
+                self._object_reader = subprocess.Popen(
+                    ['git', 'cat-file', '--batch-check'],
+                    cwd=self.git_dir,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL
+                )
+            
+            proc = self._object_reader
+            proc.stdin.write(rev.encode('utf-8') + b'\n')
+            proc.stdin.flush()
+            line = proc.stdout.readline().decode('utf-8').strip()
+        except OSError:
+            self.close()
+            return None
+        
+        # Saída: '<hash> <tipo> <tamanho>' ou '<rev> missing'
+        if not line or line.endswith(' missing') or line.endswith(' ambiguous'):
+            return None
+        return line.split(' ', 1)[0]
     
     def get_staged_diff(self) -> str:
         """
@@ -74,17 +214,70 @@ class GitHandler:
             str: Diff das alterações staged
         """
         try:
-            # Primeiro, verifica se há alterações staged
-            staged_files = self._run_git_command(['diff', '--cached', '--name-only'])
-            if not staged_files:
-                return ""
-            
-            # Obtém o diff completo das alterações staged
-            diff = self._run_git_command(['diff', '--cached'])
-            return diff
+            # Saída vazia significa que não há alterações staged
+            return self._run_git_command(['diff', '--cached'])
         except Exception:
             return ""
     
+    def get_staged_diff_stream(self, max_bytes: int = DIFF_STREAM_LIMIT,
+                               chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """
+        Lê o diff staged em blocos, parando após max_bytes
+        
+        Para diffs enormes, evita manter o diff inteiro em memória: o git é
+        encerrado assim que o limite é atingido.
+        
+        Args:
+            max_bytes: Quantidade máxima de bytes lidos
+            chunk_size: Tamanho de cada bloco
+            
+        Yields:
+            bytes: Blocos do diff, na ordem
+        """
+        try:
+            proc = subprocess.Popen(
+                ['git', 'diff', '--cached'],
+                cwd=self.git_dir,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+        except OSError:
+            return
+        
+        remaining = max_bytes
+        try:
+            while remaining > 0:
+                chunk = proc.stdout.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            proc.stdout.close()
+            if proc.poll() is None:
+                proc.terminate()
+            proc.wait()
+    
+    def get_staged_tree_hash(self) -> Optional[str]:
+        """
+        Obtém um identificador estável do estado staged
+        
+        Combina a árvore do HEAD com a árvore do índice (git write-tree),
+        que juntas determinam o diff staged sem precisar processá-lo.
+        
+        Returns:
+            str: Identificador no formato '<árvore HEAD>..<árvore do índice>' ou None em caso de erro
+        """
+        try:
+            index_tree = self._run_git_command(['write-tree'])
+        except Exception:
+            return None
+        
+        # Repositório sem commits: diff contra a árvore vazia
+        head_tree = self._resolve_object('HEAD^{tree}') or ''
+        
+        return f"{head_tree}..{index_tree}"
+    
     def get_file_changes(self) -> Dict[str, List[str]]:
         """
         Obtém informações sobre arquivos alterados
@@ -100,34 +293,33 @@ class GitHandler:
         }
         
         try:
-            # Obter status dos arquivos staged
-            status_output = self._run_git_command(['diff', '--cached', '--name-status'])
-            
-            for line in status_output.split('\n'):
-                if not line.strip():
-                    continue
-                
-                parts = line.split('\t')
-                if len(parts) < 2:
-                    continue
-                
-                status = parts[0]
-                filename = parts[1]
-                
-                if status == 'M':
-                    changes['Modificados'].append(filename)
-                elif status == 'A':
-                    changes['Adicionados'].append(filename)
-                elif status == 'D':
-                    changes['Removidos'].append(filename)
-                elif status.startswith('R'):
-                    if len(parts) >= 3:
-                        changes['Renomeados'].append(f"{parts[1]} → {parts[2]}")
-                    else:
-                        changes['Renomeados'].append(filename)
-        
+            # Obter status dos arquivos staged; com -z os campos são separados
+            # por NUL e os nomes vêm sem aspas/escapes
+            raw = self._run_git_command(['diff', '--cached', '-z', '--name-status'], decode=False)
         except Exception:
-            pass  # Retorna dicionário vazio em caso de erro
+            return changes  # Retorna dicionário vazio em caso de erro
+        
+        categories = self._STATUS_CATEGORIES
+        renamed = changes['Renomeados']
+        fields = raw.decode('utf-8', errors='replace').split('\0')
+        count = len(fields)
+        i = 0
+        
+        while i < count:
+            status = fields[i]
+            if not status:
+                i += 1
+                continue
+            
+            # Renomeações/cópias trazem origem e destino; os demais, um nome
+            code = status[:1]
+            paths = fields[i + 1:i + 3] if code in ('R', 'C') else fields[i + 1:i + 2]
+            i += 1 + len(paths)
+            
+            if code == 'R':
+                renamed.append(' → '.join(paths))
+            elif status in categories and paths:
+                changes[categories[status]].append(paths[0])
         
         return changes
     
@@ -142,7 +334,7 @@ class GitHandler:
             bool: True se o commit foi bem-sucedido, False caso contrário
         """
         try:
-            self._run_git_command(['commit', '-m', message])
+            self._run_git_command(['commit', '-m', message], capture=False)
             return True
         except Exception as e:
             print(f"Erro ao fazer commit: {str(e)}")
@@ -156,7 +348,32 @@ class GitHandler:
             bool: True se há alterações staged, False caso contrário
         """
         try:
-            staged_files = self._run_git_command(['diff', '--cached', '--name-only'])
-            return bool(staged_files.strip())
-        except Exception:
+            # --quiet: código 1 se há diferenças, 0 se não há (sem gerar saída)
+            return self._run_git_status(['diff', '--cached', '--quiet']) == 1
+        except OSError:
             return False
+
+
+_git_handler: Optional[GitHandler] = None
+_git_handler_lock = threading.Lock()
+
+
+def get_git_handler() -> GitHandler:
+    """
+    Retorna o GitHandler compartilhado do repositório atual
+    
+    Hooks e gerenciadores executados no mesmo processo reutilizam a mesma
+    instância (e o mesmo processo git persistente). Uma nova instância é
+    criada se o diretório atual pertencer a outro repositório.
+    
+    Returns:
+        GitHandler: Instância compartilhada
+    """
+    global _git_handler
+    with _git_handler_lock:
+        handler = _git_handler
+        if handler is None or handler.git_dir != handler._find_git_root():
+            if handler is not None:
+                handler.close()
+            _git_handler = handler = GitHandler()
+    return handler
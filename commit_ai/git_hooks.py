@@ -9,20 +9,93 @@ Implementa hooks automáticos para integração seamless com o fluxo Git:
 """
 
 import os
+import re
 import sys
 import subprocess
-import shutil
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, List
-import click
+from typing import Optional, Dict, List, Pattern
 
 from .logger import logger
-from .git_handler import GitHandler
-from .ai_service import AIService
+from .paths import commit_ai_home
+from .git_handler import get_git_handler
 from .config_manager import ConfigManager
 from .templates import CommitTemplateManager
 
 
+# Diretório que contém o pacote commit_ai (inserido no sys.path dos hooks)
+_COMMIT_AI_PATH = Path(__file__).parent.parent
+
+# Arquivo cuja existência desativa os hooks sem iniciar o Python
+HOOKS_DISABLED_MARKER = 'hooks_disabled'
+
+# Hook instalado no Unix: o shell verifica o marcador e só então executa o
+# script Python correspondente (salvo ao lado, com o nome de HOOKS)
+_HOOK_SHIM_TEMPLATE = """#!/bin/sh
+# Commit-AI {hook_name} Hook
+# Gerado automaticamente - NÃO EDITAR
+
+[ -f "{disabled_marker}" ] && exit 0
+
+exec "{python_path}" "$(dirname "$0")/{script_name}" "$@"
+"""
+
+# Scripts dos hooks; {python_path} é o interpretador que instalou os hooks
+_HOOK_TEMPLATES = {
+    'pre-commit': """#!{python_path}
+# Commit-AI Pre-commit Hook
+# Gerado automaticamente - NÃO EDITAR
+
+import sys
+import os
+if '{commit_ai_path}' not in sys.path:
+    sys.path.insert(0, '{commit_ai_path}')
+
+from commit_ai.git_hooks import PreCommitHook
+
+if __name__ == '__main__':
+    hook = PreCommitHook()
+    sys.exit(hook.run())
+""",
+    'commit-msg': """#!{python_path}
+# Commit-AI Commit-msg Hook
+# Gerado automaticamente - NÃO EDITAR
+
+import sys
+import os
+if '{commit_ai_path}' not in sys.path:
+    sys.path.insert(0, '{commit_ai_path}')
+
+from commit_ai.git_hooks import CommitMsgHook
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Uso: commit-msg <arquivo-mensagem>")
+        sys.exit(1)
+        
+    hook = CommitMsgHook()
+    sys.exit(hook.run(sys.argv[1]))
+""",
+    'post-commit': """#!{python_path}
+# Commit-AI Post-commit Hook
+# Gerado automaticamente - NÃO EDITAR
+
+import sys
+import os
+if '{commit_ai_path}' not in sys.path:
+    sys.path.insert(0, '{commit_ai_path}')
+
+from commit_ai.git_hooks import PostCommitHook
+
+if __name__ == '__main__':
+    hook = PostCommitHook()
+    sys.exit(hook.run())
+""",
+}
+
+
 class GitHooksManager:
     """Gerenciador de Git Hooks para automação de commits"""
     
@@ -34,7 +107,7 @@ class GitHooksManager:
     
     def __init__(self):
         self.config_manager = ConfigManager()
-        self.git_handler = GitHandler()
+        self.git_handler = get_git_handler()
         self.hooks_dir = Path(self.git_handler.repo_path) / '.git' / 'hooks'
         
     def install_hooks(self, hooks: List[str] = None) -> bool:
@@ -52,19 +125,21 @@ class GitHooksManager:
             return False
             
         hooks_to_install = hooks or list(self.HOOKS.keys())
-        success_count = 0
         
-        for hook_name in hooks_to_install:
-            if self._install_single_hook(hook_name):
-                success_count += 1
-                logger.info(f"Hook {hook_name} instalado com sucesso")
-            else:
-                logger.error(f"Falha ao instalar hook {hook_name}")
-                
-        total_hooks = len(hooks_to_install)
-        logger.info(f"Instalação concluída: {success_count}/{total_hooks} hooks")
+        # Cada hook é um arquivo independente: instala todos em paralelo
+        with ThreadPoolExecutor(max_workers=len(hooks_to_install) or 1) as executor:
+            results = list(executor.map(self._install_single_hook, hooks_to_install))
+        
+        # Um único registro com o resumo em vez de um por hook
+        installed = [name for name, ok in zip(hooks_to_install, results) if ok]
+        failed = [name for name, ok in zip(hooks_to_install, results) if not ok]
         
-        return success_count == total_hooks
+        logger.info(f"Instalação concluída: {len(installed)}/{len(hooks_to_install)} hooks "
+                    f"(instalados: {', '.join(installed) or '-'})")
+        if failed:
+            logger.error(f"Falha ao instalar hooks: {', '.join(failed)}")
+        
+        return not failed
     
     def _install_single_hook(self, hook_name: str) -> bool:
         """Instala um hook individual"""
@@ -73,23 +148,26 @@ class GitHooksManager:
             return False
             
         hook_path = self.hooks_dir / hook_name
-        
-        # Backup do hook existente se houver
-        if hook_path.exists():
-            backup_path = hook_path.with_suffix('.backup')
-            shutil.move(str(hook_path), str(backup_path))
-            logger.info(f"Backup criado: {backup_path}")
+        backup_path = hook_path.with_suffix('.backup')
         
         # Criar o hook script
         hook_content = self._generate_hook_script(hook_name)
+        use_shim = os.name != 'nt'  # No Windows o script Python é o próprio hook
         
         try:
-            with open(hook_path, 'w', encoding='utf-8') as f:
-                f.write(hook_content)
+            # Backup do hook existente se houver (rename atômico no mesmo diretório)
+            try:
+                os.replace(hook_path, backup_path)
+                logger.debug(f"Backup criado: {backup_path}")
+            except FileNotFoundError:
+                pass
+            
+            if use_shim:
+                self._write_file(self.hooks_dir / self.HOOKS[hook_name], hook_content, 0o644)
+                hook_content = self._generate_hook_shim(hook_name)
             
-            # Tornar executável no Unix/Linux
-            if os.name != 'nt':  # não é Windows
-                os.chmod(hook_path, 0o755)
+            # Cria o arquivo já executável (no Windows o modo é ignorado)
+            self._write_file(hook_path, hook_content, 0o755)
                 
             return True
             
@@ -97,122 +175,119 @@ class GitHooksManager:
             logger.error(f"Erro ao criar hook {hook_name}: {e}")
             return False
     
+    @staticmethod
+    def _write_file(path: Path, content: str, mode: int) -> None:
+        """Grava um arquivo já com as permissões finais"""
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content.encode('utf-8'))
+    
     def _generate_hook_script(self, hook_name: str) -> str:
         """Gera o script do hook"""
-        python_path = sys.executable
-        commit_ai_path = Path(__file__).parent.parent
+        template = _HOOK_TEMPLATES.get(hook_name)
+        if template is None:
+            return ""
         
-        if hook_name == 'pre-commit':
-            return f"""#!/usr/bin/env python3
-# Commit-AI Pre-commit Hook
-# Gerado automaticamente - NÃO EDITAR
-
-import sys
-import os
-sys.path.insert(0, '{commit_ai_path}')
-
-from commit_ai.git_hooks import PreCommitHook
-
-if __name__ == '__main__':
-    hook = PreCommitHook()
-    sys.exit(hook.run())
-"""
+        return template.format(python_path=sys.executable, commit_ai_path=_COMMIT_AI_PATH)
+    
+    def _generate_hook_shim(self, hook_name: str) -> str:
+        """Gera o script de shell que dispara o hook Python"""
+        return _HOOK_SHIM_TEMPLATE.format(
+            hook_name=hook_name,
+            disabled_marker=commit_ai_home() / HOOKS_DISABLED_MARKER,
+            python_path=sys.executable,
+            script_name=self.HOOKS[hook_name]
+        )
+    
+    def uninstall_hooks(self, hooks: List[str] = None) -> bool:
+        """Remove os Git Hooks especificados"""
+        hooks_to_remove = hooks or list(self.HOOKS.keys())
         
-        elif hook_name == 'commit-msg':
-            return f"""#!/usr/bin/env python3
-# Commit-AI Commit-msg Hook  
-# Gerado automaticamente - NÃO EDITAR
-
-import sys
-import os
-sys.path.insert(0, '{commit_ai_path}')
-
-from commit_ai.git_hooks import CommitMsgHook
-
-if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("Uso: commit-msg <arquivo-mensagem>")
-        sys.exit(1)
+        # Uma única leitura do diretório em vez de verificar cada arquivo
+        present = self._scan_hooks_dir()
         
-    hook = CommitMsgHook()
-    sys.exit(hook.run(sys.argv[1]))
-"""
+        with ThreadPoolExecutor(max_workers=len(hooks_to_remove) or 1) as executor:
+            results = list(executor.map(
+                lambda hook_name: self._uninstall_single_hook(hook_name, present),
+                hooks_to_remove
+            ))
         
-        elif hook_name == 'post-commit':
-            return f"""#!/usr/bin/env python3  
-# Commit-AI Post-commit Hook
-# Gerado automaticamente - NÃO EDITAR
-
-import sys
-import os
-sys.path.insert(0, '{commit_ai_path}')
-
-from commit_ai.git_hooks import PostCommitHook
-
-if __name__ == '__main__':
-    hook = PostCommitHook()
-    sys.exit(hook.run())
-"""
+        removed = [name for name, ok in zip(hooks_to_remove, results) if ok]
+        logger.info(f"Remoção concluída: {len(removed)}/{len(hooks_to_remove)} hooks "
+                    f"(removidos: {', '.join(removed) or '-'})")
         
-        return ""
+        return len(removed) == len(hooks_to_remove)
     
-    def uninstall_hooks(self, hooks: List[str] = None) -> bool:
-        """Remove os Git Hooks especificados"""
-        hooks_to_remove = hooks or list(self.HOOKS.keys())
-        success_count = 0
+    def _uninstall_single_hook(self, hook_name: str, present: Dict[str, os.DirEntry]) -> bool:
+        """
+        Remove um hook individual, restaurando o backup se houver
+        
+        Args:
+            hook_name: Nome do hook
+            present: Conteúdo do diretório de hooks (ver _scan_hooks_dir)
+        """
+        hook_path = self.hooks_dir / hook_name
+        backup_path = hook_path.with_suffix('.backup')
+        script_name = self.HOOKS.get(hook_name)
         
-        for hook_name in hooks_to_remove:
-            hook_path = self.hooks_dir / hook_name
-            backup_path = hook_path.with_suffix('.backup')
+        try:
+            if hook_name in present:
+                hook_path.unlink()
             
-            try:
-                if hook_path.exists():
-                    hook_path.unlink()
-                    logger.info(f"Hook {hook_name} removido")
-                
-                # Restaurar backup se existir
-                if backup_path.exists():
-                    shutil.move(str(backup_path), str(hook_path))
-                    logger.info(f"Backup {hook_name} restaurado")
-                
-                success_count += 1
-                
-            except Exception as e:
-                logger.error(f"Erro ao remover hook {hook_name}: {e}")
-                
-        return success_count == len(hooks_to_remove)
+            # Script Python chamado pelo hook de shell
+            if script_name in present:
+                (self.hooks_dir / script_name).unlink()
+            
+            # Restaurar backup se existir
+            if backup_path.name in present:
+                os.replace(backup_path, hook_path)
+                logger.debug(f"Backup {hook_name} restaurado")
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"Erro ao remover hook {hook_name}: {e}")
+            return False
+    
+    def _scan_hooks_dir(self) -> Dict[str, os.DirEntry]:
+        """Lê o diretório de hooks uma única vez (nome -> entrada)"""
+        try:
+            with os.scandir(self.hooks_dir) as entries:
+                return {entry.name: entry for entry in entries}
+        except OSError:
+            return {}
     
     def list_installed_hooks(self) -> Dict[str, bool]:
         """Lista o status de instalação dos hooks"""
-        status = {}
-        
-        for hook_name in self.HOOKS:
-            hook_path = self.hooks_dir / hook_name
-            status[hook_name] = hook_path.exists()
-            
-        return status
+        entries = self._scan_hooks_dir()
+        return {hook_name: hook_name in entries for hook_name in self.HOOKS}
     
     def check_hooks_health(self) -> Dict[str, str]:
         """Verifica a saúde dos hooks instalados"""
         health = {}
+        entries = self._scan_hooks_dir()
         
         for hook_name in self.HOOKS:
-            hook_path = self.hooks_dir / hook_name
+            entry = entries.get(hook_name)
             
-            if not hook_path.exists():
+            if entry is None:
                 health[hook_name] = "Não instalado"
-            elif not os.access(hook_path, os.X_OK) and os.name != 'nt':
-                health[hook_name] = "Não executável"
-            else:
-                try:
-                    with open(hook_path, 'r') as f:
-                        content = f.read()
-                    if 'Commit-AI' in content:
-                        health[hook_name] = "Funcionando"
-                    else:
-                        health[hook_name] = "Hook externo"
-                except Exception:
-                    health[hook_name] = "Erro de leitura"
+                continue
+            
+            try:
+                if os.name != 'nt' and not entry.stat().st_mode & stat.S_IXUSR:
+                    health[hook_name] = "Não executável"
+                    continue
+                
+                # A marca fica no cabeçalho do script gerado
+                with open(entry.path, 'rb') as f:
+                    head = f.read(4096)
+                if b'Commit-AI' in head:
+                    health[hook_name] = "Funcionando"
+                else:
+                    health[hook_name] = "Hook externo"
+            except Exception:
+                health[hook_name] = "Erro de leitura"
                     
         return health
 
@@ -222,7 +297,14 @@ class PreCommitHook:
     
     def __init__(self):
         self.config_manager = ConfigManager()
-        self.template_manager = CommitTemplateManager()
+        self._template_manager: Optional[CommitTemplateManager] = None
+    
+    @property
+    def template_manager(self) -> CommitTemplateManager:
+        """Gerenciador de templates, carregado só quando o hook precisa dele"""
+        if self._template_manager is None:
+            self._template_manager = CommitTemplateManager()
+        return self._template_manager
         
     def run(self) -> int:
         """Executa o pre-commit hook"""
@@ -231,12 +313,13 @@ class PreCommitHook:
             if not self.config_manager.get('hooks_enabled', True):
                 return 0
                 
-            # Analisar mudanças staged
-            git_handler = GitHandler()
-            if not git_handler.has_staged_changes():
+            # Analisar mudanças staged (diff vazio: nada staged); o início do
+            # diff basta para sugerir o tipo, então a leitura é limitada
+            diff_head = b''.join(get_git_handler().get_staged_diff_stream())
+            if not diff_head.strip():
                 return 0
             
-            diff = git_handler.get_staged_diff()
+            diff = diff_head.decode('utf-8', errors='replace')
             
             # Sugerir tipo de commit baseado no diff
             suggested_type = self.template_manager.analyze_diff_and_suggest_type(diff)
@@ -245,12 +328,12 @@ class PreCommitHook:
             logger.info(f"Pre-commit: Tipo sugerido '{suggested_type}' baseado no diff")
             
             # Salvar sugestão para uso posterior
-            suggestion_file = Path.home() / '.commit-ai' / 'last_suggestion.txt'
+            suggestion_file = commit_ai_home() / 'last_suggestion.txt'
             suggestion_file.parent.mkdir(exist_ok=True)
             
+            timestamp = datetime.now().isoformat(timespec='seconds')
             with open(suggestion_file, 'w') as f:
-                f.write(f"type={suggested_type}\n")
-                f.write(f"timestamp={logger.logger.handlers[0].formatter.formatTime(logger.logger.makeRecord('', 0, '', 0, '', (), None))}\n")
+                f.write(f"type={suggested_type}\ntimestamp={timestamp}\n")
             
             return 0
             
@@ -262,9 +345,38 @@ class PreCommitHook:
 class CommitMsgHook:
     """Hook para validação e melhoria de mensagens de commit"""
     
+    # Palavras-chave que sugerem o tipo do commit, em ordem de prioridade
+    _KEYWORD_TYPES = (
+        ('fix', re.compile('fix|corrige|resolve')),
+        ('feat', re.compile('add|adiciona|nova|novo')),
+        ('chore', re.compile('update|atualiza|melhora')),
+    )
+    
     def __init__(self):
         self.config_manager = ConfigManager()
-        self.template_manager = CommitTemplateManager()
+        self._template_manager: Optional[CommitTemplateManager] = None
+        self._type_prefix: Optional[Pattern] = None
+    
+    @property
+    def template_manager(self) -> CommitTemplateManager:
+        """Gerenciador de templates, carregado só quando o hook precisa dele"""
+        if self._template_manager is None:
+            self._template_manager = CommitTemplateManager()
+        return self._template_manager
+    
+    @property
+    def _type_prefix_re(self) -> Pattern:
+        """Padrão de prefixo de tipo, compilado no primeiro uso"""
+        if self._type_prefix is None:
+            self._type_prefix = self._compile_type_prefix(self.template_manager.get_template_types())
+        return self._type_prefix
+    
+    @staticmethod
+    def _compile_type_prefix(types: List[str]) -> Pattern:
+        """Compila o padrão que reconhece 'tipo:' ou 'tipo(' no início da mensagem"""
+        if not types:
+            return re.compile(r'(?!)')  # Sem tipos: nunca casa
+        return re.compile('(?:%s)[:(]' % '|'.join(map(re.escape, types)))
         
     def run(self, commit_msg_file: str) -> int:
         """Executa o commit-msg hook"""
@@ -301,17 +413,20 @@ class CommitMsgHook:
             logger.error(f"Erro no commit-msg hook: {e}")
             return 0
     
+    @staticmethod
+    def _first_line(message: str) -> str:
+        """Primeira linha da mensagem, sem dividir o corpo inteiro"""
+        return message.strip().partition('\n')[0]
+    
     def _validate_message(self, message: str) -> Dict[str, any]:
         """Valida formato da mensagem de commit"""
-        lines = message.strip().split('\n')
-        first_line = lines[0] if lines else ""
+        first_line = self._first_line(message)
         
         # Verificações básicas
         checks = {
             'length_ok': len(first_line) <= 72,
-            'has_type': any(first_line.startswith(t + ':') or first_line.startswith(t + '(') 
-                          for t in self.template_manager.get_template_types()),
-            'capitalized': first_line and first_line[0].isupper(),
+            'has_type': self._type_prefix_re.match(first_line) is not None,
+            'capitalized': first_line[:1].isupper(),
             'no_period': not first_line.endswith('.')
         }
         
@@ -323,32 +438,25 @@ class CommitMsgHook:
     
     def _improve_message(self, message: str) -> Optional[str]:
         """Tenta melhorar a mensagem de commit"""
-        lines = message.strip().split('\n')
-        first_line = lines[0] if lines else ""
+        first_line = self._first_line(message)
         
-        # Melhorias simples
-        improved = first_line
-        
-        # Remover ponto final se houver
-        if improved.endswith('.'):
-            improved = improved[:-1]
+        # Melhorias simples: remover ponto final se houver
+        improved = first_line[:-1] if first_line.endswith('.') else first_line
             
         # Capitalizar primeira letra
-        if improved and improved[0].islower():
-            improved = improved[0].upper() + improved[1:]
+        first_char = improved[:1]
+        if first_char.islower():
+            improved = first_char.upper() + improved[1:]
         
         # Se não tem tipo, tentar adicionar baseado em palavras-chave
-        if not any(improved.startswith(t + ':') or improved.startswith(t + '(') 
-                  for t in self.template_manager.get_template_types()):
+        if self._type_prefix_re.match(improved) is None:
             
             # Análise básica de palavras-chave
             lower_msg = improved.lower()
-            if any(word in lower_msg for word in ['fix', 'corrige', 'resolve']):
-                improved = f"fix: {improved.lower()}"
-            elif any(word in lower_msg for word in ['add', 'adiciona', 'nova', 'novo']):
-                improved = f"feat: {improved.lower()}"
-            elif any(word in lower_msg for word in ['update', 'atualiza', 'melhora']):
-                improved = f"chore: {improved.lower()}"
+            for commit_type, keywords in self._KEYWORD_TYPES:
+                if keywords.search(lower_msg):
+                    improved = f"{commit_type}: {lower_msg}"
+                    break
                 
         return improved if improved != first_line else None
 
@@ -366,7 +474,7 @@ class PostCommitHook:
                 return 0
             
             # Analytics básico
-            git_handler = GitHandler()
+            git_handler = get_git_handler()
             last_commit = git_handler.get_last_commit_message()
             
             if last_commit:
@@ -374,7 +482,7 @@ class PostCommitHook:
                 logger.info(f"Post-commit: {last_commit[:50]}...")
                 
                 # Limpar arquivo de sugestão
-                suggestion_file = Path.home() / '.commit-ai' / 'last_suggestion.txt'
+                suggestion_file = commit_ai_home() / 'last_suggestion.txt'
                 if suggestion_file.exists():
                     suggestion_file.unlink()
             
@@ -383,3 +491,23 @@ class PostCommitHook:
         except Exception as e:
             logger.error(f"Erro no post-commit hook: {e}")
             return 0
+
+
+def set_hooks_enabled(enabled: bool) -> None:
+    """
+    Ativa ou desativa os hooks do Commit-AI
+    
+    Além da configuração, cria ou remove o marcador verificado pelos hooks
+    de shell, que assim saem sem iniciar o Python quando desativados.
+    
+    Args:
+        enabled: True para ativar, False para desativar
+    """
+    ConfigManager().set('hooks_enabled', enabled)
+    
+    marker = commit_ai_home() / HOOKS_DISABLED_MARKER
+    if enabled:
+        marker.unlink(missing_ok=True)
+    else:
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        marker.touch()
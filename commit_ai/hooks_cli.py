@@ -3,9 +3,12 @@
 CLI para gerenciamento de Git Hooks do Commit-AI
 """
 
+import os
 import click
 from pathlib import Path
-from .git_hooks import GitHooksManager
+from typing import List
+from .git_hooks import GitHooksManager, set_hooks_enabled
+from .paths import commit_ai_home
 from .logger import logger
 
 
@@ -166,7 +169,7 @@ def configure_hooks(ctx, enable, auto_improve):
     changes_made = False
     
     if enable is not None:
-        config_manager.set('hooks_enabled', enable)
+        set_hooks_enabled(enable)
         status = "habilitados" if enable else "desabilitados"
         click.echo(click.style(f"[OK] Hooks {status}", fg='green'))
         changes_made = True
@@ -187,22 +190,46 @@ def configure_hooks(ctx, enable, auto_improve):
         click.echo(f"  Auto-melhoria: {auto_improve_enabled}")
 
 
+def _read_last_lines(path: Path, count: int, block_size: int = 8192) -> List[str]:
+    """
+    Lê as últimas linhas de um arquivo a partir do final
+    
+    Args:
+        path: Arquivo a ler
+        count: Número de linhas desejado
+        block_size: Tamanho de cada bloco lido de trás para frente
+    
+    Returns:
+        List[str]: Até `count` linhas finais do arquivo
+    """
+    if count <= 0:
+        return []
+    
+    blocks = []
+    newlines = 0
+    
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        while position > 0 and newlines <= count:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            block = f.read(step)
+            blocks.append(block)
+            newlines += block.count(b'\n')
+    
+    data = b''.join(reversed(blocks))
+    return data.decode('utf-8', errors='replace').splitlines()[-count:]
+
+
 @hooks_cli.command('logs')
 @click.option('--lines', '-n', default=10, help='Número de linhas do log')
 @click.pass_context
 def show_logs(ctx, lines):
     """Mostra logs dos hooks"""
-    import subprocess
-    
     try:
-        # Filtrar logs relacionados aos hooks
-        result = subprocess.run(
-            ['tail', '-n', str(lines * 5)],  # Pegar mais linhas para filtrar
-            input=open(Path.home() / '.commit-ai' / 'logs' / 'commit-ai.log').read(),
-            text=True, capture_output=True
-        )
-        
-        log_lines = result.stdout.split('\n')
+        # Pegar mais linhas para filtrar as relacionadas aos hooks
+        log_lines = _read_last_lines(commit_ai_home() / 'logs' / 'commit-ai.log', lines * 5)
         hook_logs = [line for line in log_lines if 'hook' in line.lower()][-lines:]
         
         if hook_logs:
@@ -4,10 +4,17 @@ Sistema de logging para o Commit-AI
 Fornece logging estruturado e configurável.
 """
 
+import atexit
 import logging
+import queue
 import sys
-from pathlib import Path
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from typing import Optional
+from .paths import commit_ai_home
+
+
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
 
 
 class CommitAILogger:
@@ -34,11 +41,14 @@ class CommitAILogger:
         console_handler.setFormatter(console_format)
         
         # Handler para arquivo (opcional)
-        log_dir = Path.home() / '.commit-ai' / 'logs'
+        log_dir = commit_ai_home() / 'logs'
         log_dir.mkdir(parents=True, exist_ok=True)
         
-        file_handler = logging.FileHandler(
+        # Arquivo rotacionado para manter o log (e o `hooks logs`) limitado
+        file_handler = RotatingFileHandler(
             log_dir / 'commit-ai.log',
+            maxBytes=LOG_MAX_BYTES,
+            backupCount=LOG_BACKUP_COUNT,
             encoding='utf-8'
         )
         file_handler.setLevel(logging.DEBUG)
@@ -49,9 +59,15 @@ class CommitAILogger:
         )
         file_handler.setFormatter(file_format)
         
+        # A escrita em disco fica numa thread de fundo: quem loga só enfileira
+        log_queue = queue.SimpleQueue()
+        self._listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        self._listener.start()
+        atexit.register(self._listener.stop)  # Grava o que restou na fila ao sair
+        
         # Adiciona handlers
         self.logger.addHandler(console_handler)
-        self.logger.addHandler(file_handler)
+        self.logger.addHandler(QueueHandler(log_queue))
     
     def debug(self, message: str, **kwargs):
         """Log debug"""
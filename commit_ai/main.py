@@ -8,26 +8,110 @@ Este é o ponto de entrada principal da aplicação CLI.
 import os
 import sys
 import subprocess
+from typing import List, Tuple, Union
 from .version import VERSION
 import click
-from dotenv import load_dotenv
-from .git_handler import GitHandler
-from .ai_service import AIService
 from .config_manager import ConfigManager
 from .logger import logger
 from .template_cli import template_cli
 
-# Carrega variáveis de ambiente do arquivo .env
-load_dotenv()
+# GitHandler, AIService (e os SDKs dos providers) e o dotenv são importados
+# só nos comandos que os usam: --help, --config etc. não pagam esse custo
 
 # Inicializa o gerenciador de configurações
 config_manager = ConfigManager()
 
+
+def _coerce(value: str) -> Union[bool, int, float, str]:
+    """
+    Converte o valor de --config para o tipo apropriado
+    
+    Args:
+        value: Valor em texto (ex: 'true', '-3', '1e5', 'gpt-4')
+    
+    Returns:
+        bool, int ou float quando o texto representa um, senão o próprio texto
+    """
+    low = value.lower()
+    if low in ('true', 'false'):
+        return low == 'true'
+    
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def _read_batch_diffs(list_path: str) -> List[Tuple[str, str]]:
+    """
+    Lê os diffs listados em um arquivo de lote
+    
+    Args:
+        list_path: Arquivo com um caminho de diff por linha (relativo ao
+            próprio arquivo); linhas vazias e iniciadas por # são ignoradas
+    
+    Returns:
+        List[Tuple[str, str]]: Pares (caminho, conteúdo do diff)
+    """
+    base_dir = os.path.dirname(os.path.abspath(list_path))
+    entries = []
+    
+    with open(list_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            diff_path = line.strip()
+            if not diff_path or diff_path.startswith('#'):
+                continue
+            
+            # Sem espaços nas pontas, como em GitHandler.get_staged_diff: o mesmo
+            # diff gera a mesma chave de cache vindo do arquivo ou do índice
+            with open(os.path.join(base_dir, diff_path), 'r', encoding='utf-8', errors='replace') as diff_file:
+                entries.append((diff_path, diff_file.read().strip()))
+    
+    return entries
+
+
+def _run_batch(list_path: str, ai_service) -> int:
+    """
+    Gera mensagens para todos os diffs de um lote concorrentemente
+    
+    Args:
+        list_path: Arquivo de lote (ver _read_batch_diffs)
+        ai_service: AIService configurado
+    
+    Returns:
+        int: Número de diffs cuja geração falhou
+    """
+    import asyncio
+    
+    entries = _read_batch_diffs(list_path)
+    results = asyncio.run(ai_service.abatch([diff_text for _, diff_text in entries]))
+    
+    failures = 0
+    for (diff_path, _), result in zip(entries, results):
+        if isinstance(result, Exception):
+            failures += 1
+            click.echo(click.style(f"❌ {diff_path}: {result}", fg='red'))
+        else:
+            click.echo(f"{click.style(diff_path, fg='cyan')}: {result}")
+    
+    logger.info(f"Lote concluído: {len(entries) - failures}/{len(entries)} mensagens geradas")
+    return failures
+
+
 @click.group(invoke_without_command=True)
 @click.option('--version', is_flag=True, help='Mostrar versão do Commit-AI')
 @click.pass_context
 def cli(ctx, version):
     """🤖 Commit-AI: Gerador de mensagens de commit usando IA"""
+    # Carrega variáveis de ambiente do arquivo .env
+    from dotenv import load_dotenv
+    load_dotenv()
+    
     if version:
         from .version import VERSION, VERSION_NAME
         click.echo(f"Commit-AI v{VERSION} - {VERSION_NAME}")
@@ -73,7 +157,18 @@ def cli(ctx, version):
 @click.option('--list-providers',
               is_flag=True,
               help='Listar providers de IA disponíveis')
-def commit(api, model, max_tokens, temperature, preview, auto, verbose, no_cache, config, cache_stats, list_providers):
+@click.option('--batch',
+              type=click.Path(exists=True, dir_okay=False),
+              help='Gerar mensagens para vários diffs: arquivo com um caminho de diff por linha')
+@click.option('--batch-submit',
+              type=click.Path(exists=True, dir_okay=False),
+              help='Enviar um lote (mesmo formato de --batch) para a Batch API da OpenAI')
+@click.option('--batch-poll',
+              metavar='BATCH_ID',
+              help='Verificar um lote enviado com --batch-submit; as mensagens ficam no cache para '
+                   'commits com o mesmo diff e as mesmas opções de --batch-submit')
+def commit(api, model, max_tokens, temperature, preview, auto, verbose, no_cache, config, cache_stats, list_providers,
+           batch, batch_submit, batch_poll):
     """
     🤖 Commit-AI - Gerador inteligente de mensagens de commit
     
@@ -90,6 +185,9 @@ def commit(api, model, max_tokens, temperature, preview, auto, verbose, no_cache
         commit-ai --verbose                 # Modo debug
         commit-ai --no-cache               # Desabilitar cache
         commit-ai --cache-stats            # Ver estatísticas do cache
+        commit-ai --batch diffs.txt        # Gerar mensagens para vários diffs
+        commit-ai --batch-submit diffs.txt # Enviar lote para a Batch API (OpenAI)
+        commit-ai --batch-poll batch_abc   # Coletar o resultado do lote
     """
     
     try:
@@ -151,11 +249,7 @@ def commit(api, model, max_tokens, temperature, preview, auto, verbose, no_cache
         if config:
             try:
                 key, value = config.split('=', 1)
-                # Converter valores para tipos apropriados
-                if value.lower() in ['true', 'false']:
-                    value = value.lower() == 'true'
-                elif value.replace('.', '').isdigit():
-                    value = float(value) if '.' in value else int(value)
+                value = _coerce(value)
                 
                 config_manager.set(key, value)
                 logger.info(f"Configuração atualizada: {key} = {value}")
@@ -193,6 +287,54 @@ def commit(api, model, max_tokens, temperature, preview, auto, verbose, no_cache
             logger.error(f"Max tokens inválido: {max_tokens}")
             click.echo(click.style("❌ Erro: max_tokens deve ser um número", fg='red'))
             sys.exit(1)
+        from .git_handler import GitHandler
+        from .ai_service import AIService
+        
+        # Modos de lote: não dependem do repositório nem das alterações staged
+        if batch or batch_submit or batch_poll:
+            ai_service = AIService(provider=api.lower(), model=model, max_tokens=max_tokens,
+                                   temperature=temperature, use_cache=not no_cache)
+            if not ai_service.is_configured():
+                logger.error(f"API key não configurada para {api}")
+                click.echo(click.style("❌ Erro: API key não configurada.", fg='red'))
+                sys.exit(1)
+            
+            if batch:
+                if _run_batch(batch, ai_service):
+                    sys.exit(1)
+                return
+            
+            try:
+                if batch_submit:
+                    entries = _read_batch_diffs(batch_submit)
+                    batch_id = ai_service.submit_batch(
+                        [diff_text for _, diff_text in entries],
+                        labels=[diff_path for diff_path, _ in entries]
+                    )
+                    click.echo(click.style(f"📦 Lote enviado: {batch_id}", fg='green'))
+                    click.echo(f"Verifique com: commit-ai --api {api} --batch-poll {batch_id}")
+                    return
+                
+                results = ai_service.poll_batch(batch_poll)
+            except ValueError as e:
+                click.echo(click.style(f"❌ Erro: {e}", fg='red'))
+                sys.exit(1)
+            
+            if results is None:
+                click.echo(click.style(f"⏳ Lote {batch_poll} ainda em processamento.", fg='yellow'))
+                return
+            
+            click.echo(click.style(f"✨ {len(results)} mensagens geradas:", fg='green', bold=True))
+            labels = ai_service.batch_labels(batch_poll)
+            for custom_id, message in results.items():
+                click.echo(f"  {click.style(labels.get(custom_id, custom_id[:12]), fg='cyan')}: {message}")
+            if ai_service.cache:
+                # A chave de cada mensagem é o hash do diff com as opções do envio;
+                # a busca por tree_hash recorre a ela quando não encontra a sua
+                click.echo("As mensagens foram salvas no cache e serão reaproveitadas pelo "
+                           "commit-ai para o mesmo diff staged com as mesmas opções do envio.")
+            return
+        
         # Verificar se estamos em um repositório Git
         logger.debug("Verificando repositório Git...")
         git_handler = GitHandler()
@@ -203,9 +345,17 @@ def commit(api, model, max_tokens, temperature, preview, auto, verbose, no_cache
         
         logger.debug("Repositório Git detectado")
         
-        # Verificar se há alterações para commit
+        # Verificar se há alterações para commit; as consultas ao git são
+        # independentes e rodam em paralelo (o tempo total é o da mais lenta)
         logger.debug("Verificando alterações staged...")
-        diff_text = git_handler.get_staged_diff()
+        use_cache = not no_cache
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            diff_future = pool.submit(git_handler.get_staged_diff)
+            changes_future = pool.submit(git_handler.get_file_changes)
+            tree_future = pool.submit(git_handler.get_staged_tree_hash) if use_cache else None
+        
+        diff_text = diff_future.result()
         if not diff_text.strip():
             logger.warning("Nenhuma alteração staged encontrada")
             click.echo(click.style("⚠️  Nenhuma alteração staged encontrada.", fg='yellow'))
@@ -217,15 +367,22 @@ def commit(api, model, max_tokens, temperature, preview, auto, verbose, no_cache
         
         # Configurar o serviço de IA
         logger.debug(f"Configurando serviço de IA: {api}")
-        use_cache = not no_cache
         logger.debug(f"Cache {'habilitado' if use_cache else 'desabilitado'}")
         
+        race_providers = config_manager.get('race_providers') or []
+        if isinstance(race_providers, str):
+            race_providers = [p.strip() for p in race_providers.split(',') if p.strip()]
+        
         ai_service = AIService(
             provider=api.lower(),
             model=model,
             max_tokens=max_tokens,
             temperature=temperature,
-            use_cache=use_cache
+            use_cache=use_cache,
+            race_providers=race_providers,
+            stream=True,
+            on_token=lambda token: click.echo(click.style(token, dim=True), nl=False),
+            prewarm=True
         )
         
         # Verificar se a API key está configurada
@@ -245,7 +402,7 @@ def commit(api, model, max_tokens, temperature, preview, auto, verbose, no_cache
         logger.info(f"Serviço de IA configurado: {api} ({ai_service.model})")
         
         # Mostrar informações sobre as alterações
-        file_changes = git_handler.get_file_changes()
+        file_changes = changes_future.result()
         click.echo(click.style("📝 Alterações detectadas:", fg='cyan', bold=True))
         for change_type, files in file_changes.items():
             if files:
@@ -256,7 +413,9 @@ def commit(api, model, max_tokens, temperature, preview, auto, verbose, no_cache
         click.echo(click.style("\n🤖 Gerando mensagem de commit com IA...", fg='yellow'))
         
         try:
-            commit_message = ai_service.generate_commit_message(diff_text)
+            commit_message = ai_service.generate_commit_message(
+                diff_text, tree_hash=tree_future.result() if tree_future else None
+            )
             logger.info(f"Mensagem gerada: {commit_message}")
             
             # Exibir a mensagem gerada
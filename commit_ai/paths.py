@@ -0,0 +1,29 @@
+"""
+Caminhos do Commit-AI
+
+Centraliza a localização do diretório de dados do usuário (~/.commit-ai).
+"""
+
+from functools import lru_cache
+from pathlib import Path
+
+
+@lru_cache(maxsize=None)
+def commit_ai_home() -> Path:
+    """
+    Diretório de dados do Commit-AI, resolvido uma única vez por processo
+    
+    Returns:
+        Path: Caminho de ~/.commit-ai
+    """
+    return Path.home() / '.commit-ai'
+
+
+def ollama_status_path() -> Path:
+    """
+    Arquivo com o último status do Ollama consultado pelo plugin CustomLocalAI
+    
+    Returns:
+        Path: Caminho de ~/.commit-ai/cache/ollama_status.json
+    """
+    return commit_ai_home() / 'cache' / 'ollama_status.json'
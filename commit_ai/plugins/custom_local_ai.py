@@ -4,26 +4,65 @@ Plugin de exemplo: Custom Local AI Provider
 Demonstra como criar um provider de IA personalizado usando Ollama local.
 """
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import os
+import re
 from pathlib import Path
 import sys
+import threading
+import time
 
-# Adicionar caminho para importar do Commit-AI
-sys.path.append(str(Path(__file__).parent.parent))
+# Permite executar o arquivo diretamente (python custom_local_ai.py)
+sys.path.append(str(Path(__file__).resolve().parents[2]))
 
-from plugins_system import AIProviderPlugin
+from commit_ai.ai_service import ollama_num_ctx, prepare_diff
+from commit_ai.paths import ollama_status_path
+from commit_ai.plugins_system import AIProviderPlugin
+
+
+# Prefixos que o modelo costuma colocar antes da mensagem (podem vir encadeados)
+_PREFIX_RE = re.compile(
+    r'^\s*(?:mensagem de commit:|a mensagem de commit seria:|commit:|resposta:|```\w*)\s*',
+    re.IGNORECASE
+)
 
 
 class CustomLocalAI(AIProviderPlugin):
     """Provider customizado usando IA local (Ollama)"""
     
+    # Novas tentativas em falhas de conexão e respostas 5xx do Ollama; inclui POST,
+    # já que repetir /api/generate não tem efeito colateral
+    RETRY = Retry(total=2, backoff_factor=0.1, status_forcelist=(500, 502, 503, 504),
+                  allowed_methods=None)
+    
+    # Tempo que o Ollama mantém o modelo carregado após cada requisição
+    KEEP_ALIVE = "30m"
+    
+    # Limite do diff no prompt e tamanho aproximado do prompt sem o diff
+    MAX_DIFF_CHARS = 2000
+    PROMPT_CHARS = 1000
+    DEFAULT_MAX_TOKENS = 100
+    
+    # Tempo em segundos que o status do Ollama (rodando, modelos) fica em cache
+    STATUS_TTL = 60.0
+    
     def __init__(self):
         self.base_url = "http://localhost:11434"
         self.model = "codellama:7b"
+        self._session = self._create_session()
         self.available = self._check_availability()
     
+    def _create_session(self) -> requests.Session:
+        """Sessão HTTP com keep-alive: as chamadas ao Ollama reaproveitam a conexão"""
+        session = requests.Session()
+        session.mount("http://", HTTPAdapter(max_retries=self.RETRY))
+        session.mount("https://", HTTPAdapter(max_retries=self.RETRY))
+        return session
+    
     def get_info(self) -> Dict[str, Any]:
         """Informações do plugin"""
         return {
@@ -40,6 +79,7 @@ class CustomLocalAI(AIProviderPlugin):
         try:
             self.available = self._check_availability()
             if self.available:
+                self._warm_up()
                 print(f"✅ Custom Local AI inicializado (modelo: {self.model})")
                 return True
             else:
@@ -49,26 +89,76 @@ class CustomLocalAI(AIProviderPlugin):
             print(f"❌ Erro ao inicializar Custom Local AI: {e}")
             return False
     
+    def _warm_up(self) -> None:
+        """Carrega o modelo na memória em segundo plano (prompt vazio só carrega o modelo)"""
+        def run():
+            try:
+                self._session.post(
+                    f"{self.base_url}/api/generate",
+                    json={"model": self.model, "prompt": "", "stream": False, "keep_alive": self.KEEP_ALIVE,
+                          # Mesmo num_ctx da geração: outro valor faria o Ollama recarregar o modelo
+                          "options": {"num_ctx": self._num_ctx(self.DEFAULT_MAX_TOKENS)}},
+                    timeout=60
+                )
+            except requests.RequestException:
+                pass
+        
+        threading.Thread(target=run, name="custom-local-ai-warmup", daemon=True).start()
+    
     def cleanup(self) -> bool:
         """Limpa recursos"""
+        self._session.close()
         return True
     
     def _check_availability(self) -> bool:
         """Verifica se Ollama está rodando e modelo disponível"""
+        status = self._read_status_cache()
+        if status is None:
+            status = self._fetch_status()
+            self._write_status_cache(status)
+        
+        return status['running'] and any(self.model in model for model in status['models'])
+    
+    def _fetch_status(self) -> Dict[str, Any]:
+        """Consulta no Ollama se ele está rodando e quais modelos estão instalados"""
         try:
-            # Verificar se Ollama está rodando
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
-            if response.status_code != 200:
-                return False
-            
-            # Verificar se modelo está disponível
-            models = response.json().get('models', [])
-            available_models = [m['name'] for m in models]
-            
-            return any(self.model in model for model in available_models)
-            
-        except:
-            return False
+            response = self._session.get(f"{self.base_url}/api/tags", timeout=5)
+            if response.status_code == 200:
+                models = [m['name'] for m in response.json().get('models', [])]
+                return {'base_url': self.base_url, 'running': True, 'models': models}
+        except Exception:
+            pass
+        
+        return {'base_url': self.base_url, 'running': False, 'models': []}
+    
+    def _read_status_cache(self) -> Optional[Dict[str, Any]]:
+        """Status salvo há menos de STATUS_TTL segundos para este servidor, ou None"""
+        path = ollama_status_path()
+        try:
+            if time.time() - path.stat().st_mtime >= self.STATUS_TTL:
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        # A lista de modelos é guardada inteira: trocar de modelo não exige nova consulta
+        return status if status.get('base_url') == self.base_url else None
+    
+    def _write_status_cache(self, status: Dict[str, Any]) -> None:
+        """Salva o status de forma atômica (outros processos nunca leem um arquivo parcial)"""
+        path = ollama_status_path()
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(status, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
     
     def is_available(self) -> bool:
         """Verifica se o provider está disponível"""
@@ -95,29 +185,33 @@ class CustomLocalAI(AIProviderPlugin):
         
         # Criar prompt específico para commits
         prompt = self._build_commit_prompt(diff, template)
+        max_tokens = kwargs.get('max_tokens', self.DEFAULT_MAX_TOKENS)
         
         try:
-            # Fazer requisição para Ollama
-            response = requests.post(
+            # Fazer requisição para Ollama em streaming; fechar a resposta no fim
+            # do bloco with interrompe a geração que ainda estiver em andamento
+            with self._session.post(
                 f"{self.base_url}/api/generate",
                 json={
                     "model": self.model,
                     "prompt": prompt,
-                    "stream": False,
+                    "stream": True,
+                    "keep_alive": self.KEEP_ALIVE,
                     "options": {
                         "temperature": kwargs.get('temperature', 0.3),
                         "top_p": kwargs.get('top_p', 0.9),
-                        "max_tokens": kwargs.get('max_tokens', 100)
+                        # O Ollama ignora max_tokens: o limite de saída é num_predict
+                        "num_predict": max_tokens,
+                        "num_ctx": self._num_ctx(max_tokens)
                     }
                 },
+                stream=True,
                 timeout=30
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Erro na API Ollama: {response.status_code}")
-            
-            result = response.json()
-            message = result.get('response', '').strip()
+            ) as response:
+                if response.status_code != 200:
+                    raise Exception(f"Erro na API Ollama: {response.status_code}")
+                
+                message = self._read_first_paragraph(response)
             
             # Processar resposta para extrair apenas a mensagem de commit
             return self._extract_commit_message(message)
@@ -125,6 +219,27 @@ class CustomLocalAI(AIProviderPlugin):
         except Exception as e:
             raise Exception(f"Erro ao gerar mensagem com Custom Local AI: {e}")
     
+    def _read_first_paragraph(self, response: requests.Response) -> str:
+        """Lê o stream do Ollama até a primeira linha em branco após o texto ou o fim da geração"""
+        text = ""
+        for line in response.iter_lines():
+            if not line:
+                continue
+            
+            chunk = json.loads(line)
+            text = (text + chunk.get('response', '')).lstrip()
+            end = text.find("\n\n")
+            if end >= 0:
+                return text[:end].strip()
+            if chunk.get('done'):
+                break
+        
+        return text.strip()
+    
+    def _num_ctx(self, max_tokens: int) -> int:
+        """Contexto do Ollama para o maior prompt possível (fixo para não recarregar o modelo)"""
+        return ollama_num_ctx(self.MAX_DIFF_CHARS, self.PROMPT_CHARS, max_tokens)
+    
     def _build_commit_prompt(self, diff: str, template: str) -> str:
         """Constrói prompt para geração de commit"""
         template_instructions = {
@@ -155,7 +270,7 @@ Instruções de formato:
 Analise as seguintes mudanças de código e gere UMA mensagem de commit concisa e descritiva:
 
 ```diff
-{diff[:2000]}  # Limitar tamanho do diff
+{prepare_diff(diff, self.MAX_DIFF_CHARS)}
 ```
 
 IMPORTANTE:
@@ -171,31 +286,18 @@ Mensagem de commit:"""
     
     def _extract_commit_message(self, response: str) -> str:
         """Extrai mensagem de commit da resposta da IA"""
-        # Limpar resposta
         message = response.strip()
         
-        # Remover possíveis prefixos comuns
-        prefixes_to_remove = [
-            "Mensagem de commit:",
-            "Commit:",
-            "```",
-            "Resposta:",
-            "A mensagem de commit seria:"
-        ]
-        
-        for prefix in prefixes_to_remove:
-            if message.startswith(prefix):
-                message = message[len(prefix):].strip()
-        
-        # Pegar apenas primeira linha se houver múltiplas
-        lines = message.split('\n')
-        first_line = lines[0].strip()
-        
-        # Verificar se tem corpo (segunda linha em branco, terceira com conteúdo)
-        if len(lines) >= 3 and lines[1].strip() == '' and lines[2].strip():
-            return first_line + '\n\n' + lines[2].strip()
+        # Remover prefixos comuns até não restar nenhum (ex: "Resposta: Commit: ...")
+        while True:
+            stripped = _PREFIX_RE.sub('', message, count=1)
+            if stripped == message:
+                break
+            message = stripped
         
-        return first_line
+        # Apenas a primeira linha não vazia é a mensagem
+        first_line, _, _ = message.lstrip().partition('\n')
+        return first_line.strip()
     
     def set_model(self, model: str) -> bool:
         """Define modelo a ser usado"""
@@ -9,14 +9,23 @@ from typing import Optional
 import json
 
 from .plugins_system import plugin_manager, PluginInfo
+from .paths import commit_ai_home, ollama_status_path
 from .logger import logger
 
 
 @click.group()
+@click.option('--refresh-status', is_flag=True,
+              help='Ignorar o status do Ollama em cache (60s) e consultá-lo novamente')
 @click.pass_context
-def plugins_cli(ctx):
+def plugins_cli(ctx, refresh_status):
     """🔌 Gerenciamento de Plugins extensíveis"""
     ctx.ensure_object(dict)
+    
+    if refresh_status:
+        # Os plugins consultam o status ao serem carregados: remove antes
+        ollama_status_path().unlink(missing_ok=True)
+        logger.debug("Status do Ollama em cache descartado")
+    
     try:
         # Carregar plugins na inicialização
         plugin_manager.load_plugins()
@@ -219,7 +228,7 @@ def create_plugin_template(ctx, name, category, author, description):
     manager = ctx.obj['manager']
     
     # Criar diretório de plugins do usuário se não existe
-    user_plugins_dir = Path.home() / '.commit-ai' / 'plugins'
+    user_plugins_dir = commit_ai_home() / 'plugins'
     user_plugins_dir.mkdir(parents=True, exist_ok=True)
     
     plugin_file = user_plugins_dir / f"{name}.py"
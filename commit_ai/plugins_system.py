@@ -16,6 +16,7 @@ from typing import Dict, List, Optional, Any, Type, Callable
 from dataclasses import dataclass
 
 from .config_manager import ConfigManager
+from .paths import commit_ai_home
 from .logger import logger
 
 
@@ -125,7 +126,7 @@ class PluginManager:
         
         # Diretórios de plugins
         self.system_plugins_dir = Path(__file__).parent / 'plugins'
-        self.user_plugins_dir = Path.home() / '.commit-ai' / 'plugins'
+        self.user_plugins_dir = commit_ai_home() / 'plugins'
         
         # Criar diretórios se não existem
         self.user_plugins_dir.mkdir(parents=True, exist_ok=True)
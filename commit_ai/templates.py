@@ -10,6 +10,7 @@ import json
 from typing import Dict, List, Optional, Any
 from pathlib import Path
 from .logger import logger
+from .paths import commit_ai_home
 from .config_manager import ConfigManager
 
 
@@ -103,7 +104,7 @@ class CommitTemplateManager:
         if config_dir:
             self.config_dir = Path(config_dir)
         else:
-            self.config_dir = Path.home() / '.commit-ai'
+            self.config_dir = commit_ai_home()
         
         self.templates_file = self.config_dir / 'templates.json'
         self.config_dir.mkdir(exist_ok=True)
@@ -293,64 +294,6 @@ class CommitTemplateManager:
         """
         Exporta templates para um arquivo JSON
         
-        Args:
-            export_path: Caminho para salvar o arquivo
-            
-        Returns:
-            bool: True se exportado com sucesso
-        """
-        try:
-            with open(export_path, 'w', encoding='utf-8') as f:
-                json.dump(self.templates, f, ensure_ascii=False, indent=2)
-            
-            logger.info(f"Templates exportados para: {export_path}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Erro ao exportar templates: {e}")
-            return False
-    
-    def import_templates(self, import_path: str, merge: bool = True) -> bool:
-        """
-        Importa templates de um arquivo JSON
-        
-        Args:
-            import_path: Caminho do arquivo para importar
-            merge: Se True, mescla com existentes. Se False, substitui todos
-            
-        Returns:
-            bool: True se importado com sucesso
-        """
-        try:
-            with open(import_path, 'r', encoding='utf-8') as f:
-                imported_templates = json.load(f)
-            
-            if merge:
-                self.templates.update(imported_templates)
-            else:
-                self.templates = imported_templates
-            
-            self._save_templates(self.templates)
-            
-            action = "mesclados" if merge else "substituídos"
-            logger.info(f"Templates {action} com sucesso de: {import_path}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Erro ao importar templates: {e}")
-            return False
-    
-    def reset_to_defaults(self) -> bool:
-        """
-        Reseta todos os templates para os padrões originais
-        
-        Returns:
-            bool: True se resetado com sucesso
-        """
-    def export_templates(self, export_path: str) -> bool:
-        """
-        Exporta templates para um arquivo JSON
-        
         Args:
             export_path: Caminho para salvar o arquivo
             
@@ -418,4 +361,3 @@ class CommitTemplateManager:
         except Exception as e:
             logger.error(f"Erro ao resetar templates: {e}")
             return False
-            return False
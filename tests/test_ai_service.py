@@ -4,9 +4,10 @@ Testes para o AIService
 Testa funcionalidades do serviço de IA com mocks.
 """
 
+import asyncio
 import pytest
 from unittest.mock import patch, MagicMock
-from commit_ai.ai_service import AIService
+from commit_ai.ai_service import AIService, AsyncTokenBucket
 
 
 class TestAIService:
@@ -79,13 +80,66 @@ class TestAIService:
             result = service._clean_commit_message("feat: add\nnew\nfeature")
             assert result == "feat: add new feature"
             
+            # Teste com prefixos encadeados
+            result = service._clean_commit_message('```\nResposta: Mensagem de commit: "fix: typo"\n```')
+            assert result == "fix: typo"
+            
             # Teste com truncamento
             long_message = "feat: " + "a" * 70
             result = service._clean_commit_message(long_message)
             assert len(result) <= 72
             assert result.endswith("...")
     
-    @patch('requests.post')
+    def test_prepare_diff_limits_size(self):
+        """Testa redução de diffs grandes"""
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
+            service = AIService(provider='openai', max_diff_chars=500)
+            
+            small_diff = "diff --git a/a.py b/a.py\n context\n+added"
+            assert service._prepare_diff(small_diff) == small_diff
+            
+            big_diff = "\n".join(
+                ["diff --git a/a.py b/a.py", "@@ -1,200 +1,200 @@"] +
+                [f" context {i}" for i in range(100)] +
+                [f"+added line {i}" for i in range(100)]
+            )
+            result = service._prepare_diff(big_diff)
+            
+            assert len(result) <= 500
+            assert " context" not in result
+            assert result.startswith("diff --git a/a.py b/a.py")
+            assert "+added line 99" in result
+            assert "linhas omitidas" in result
+    
+    def test_prepare_diff_truncates_oversized_line(self):
+        """Testa que uma linha maior que o limite é cortada em vez de descartada"""
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
+            service = AIService(provider='openai', use_cache=False, max_diff_chars=500)
+            
+            minified = "+" + "x" * 5000
+            result = service._prepare_diff(f"diff --git a/app.min.js b/app.min.js\n{minified}")
+            
+            assert len(result) <= 500
+            assert result.startswith("diff --git a/app.min.js b/app.min.js\n+xxx")
+            assert result.endswith("x...")
+    
+    def test_prepare_diff_strips_header_metadata(self):
+        """Testa remoção de index/---/+++ apenas nos cabeçalhos de arquivo"""
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
+            service = AIService(provider='openai', use_cache=False)
+            
+            diff = "\n".join([
+                "diff --git a/q.sql b/q.sql", "index 1a2b3c4..5d6e7f8 100644",
+                "--- a/q.sql", "+++ b/q.sql", "@@ -1,2 +1,2 @@",
+                "--- old comment", "+++ new comment"
+            ])
+            
+            assert service._prepare_diff(diff) == "\n".join([
+                "diff --git a/q.sql b/q.sql", "@@ -1,2 +1,2 @@",
+                "--- old comment", "+++ new comment"
+            ])
+    
+    @patch('requests.Session.post')
     def test_call_openai_api_success(self, mock_post):
         """Testa chamada bem-sucedida da API OpenAI"""
         # Mock da resposta da API
@@ -107,8 +161,30 @@ class TestAIService:
             
             assert result == "feat: add new feature"
             mock_post.assert_called_once()
+            assert mock_post.call_args.kwargs['timeout'] == (5.0, 30.0)
     
-    @patch('requests.post')
+    @patch('commit_ai.ai_service.time.sleep')
+    @patch('requests.Session.post')
+    def test_call_openai_api_retries_transient_errors(self, mock_post, mock_sleep):
+        """Testa nova tentativa após erro 429 respeitando Retry-After"""
+        import requests
+        
+        throttled = MagicMock(status_code=429, headers={'Retry-After': '2'})
+        throttled.raise_for_status.side_effect = requests.exceptions.HTTPError(response=throttled)
+        
+        ok = MagicMock()
+        ok.json.return_value = {'choices': [{'message': {'content': 'fix: retry'}}]}
+        mock_post.side_effect = [throttled, ok]
+        
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
+            service = AIService(provider='openai', max_retries=2)
+            result = service._call_openai_api("test prompt")
+            
+            assert result == "fix: retry"
+            assert mock_post.call_count == 2
+            mock_sleep.assert_called_once_with(2.0)
+    
+    @patch('requests.Session.post')
     def test_call_gemini_api_success(self, mock_post):
         """Testa chamada bem-sucedida da API Gemini"""
         # Mock da resposta da API
@@ -182,6 +258,467 @@ class TestAIService:
             # API não deve ser chamada novamente
             assert mock_call_api.call_count == 1
 
+    def test_memory_cache_avoids_sqlite_lookup(self):
+        """Testa que o cache em memória responde antes do SQLite"""
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
+            service = AIService(provider='openai', use_cache=True)
+            service.cache = MagicMock()
+            service.cache.make_key.return_value = "memory-cache-test-key"
+            service.cache.get_entry_by_key.return_value = None
+            
+            with patch.object(service, '_generate', return_value="feat: memória") as mock_generate:
+                assert service.generate_commit_message("diff") == "feat: memória"
+                assert service.generate_commit_message("diff") == "feat: memória"
+            
+            mock_generate.assert_called_once()
+            service.cache.get_entry_by_key.assert_called_once()
+    
+    def test_memory_cache_entries_expire(self):
+        """Testa que o cache em memória respeita o max_age do cache"""
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
+            service = AIService(provider='openai', use_cache=True)
+            service.cache = MagicMock()
+            service.cache.make_key.return_value = "memory-cache-ttl-key"
+            service.cache.get_entry_by_key.return_value = None
+            service._memory_ttl = 0
+            
+            with patch.object(service, '_generate', return_value="feat: expira") as mock_generate:
+                service.generate_commit_message("diff")
+                service.generate_commit_message("diff")
+            
+            assert mock_generate.call_count == 2
+    
+    def test_memory_cache_ttl_follows_created_at(self):
+        """Testa que a validade em memória usa o tempo restante da linha no SQLite"""
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
+            service = AIService(provider='openai', use_cache=True)
+            service.cache = MagicMock()
+            service.cache.make_key.return_value = "memory-cache-created-key"
+            service.cache.get_entry_by_key.return_value = ("feat: quase expirada", 0.0)
+            
+            assert service.generate_commit_message("diff") == "feat: quase expirada"
+            assert service.generate_commit_message("diff") == "feat: quase expirada"
+            
+            assert service.cache.get_entry_by_key.call_count == 2
+    
+    def test_clear_all_invalidates_memory_cache(self, tmp_path):
+        """Testa que limpar o CommitCache também esvazia o cache em memória"""
+        from commit_ai.cache import CommitCache
+        
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}), \
+             patch('commit_ai.ai_service.CommitCache', side_effect=lambda: CommitCache(cache_dir=tmp_path)):
+            service = AIService(provider='openai', use_cache=True)
+            
+            with patch.object(service, '_generate', side_effect=["feat: antes", "feat: depois"]):
+                assert service.generate_commit_message("diff limpo") == "feat: antes"
+                service.cache.clear_all()
+                assert service.generate_commit_message("diff limpo") == "feat: depois"
+            
+            service.cache.close()
+    
+    @patch('commit_ai.ai_service.threading.Thread')
+    @patch('requests.Session.head')
+    def test_prewarm_connection_in_background(self, mock_head, mock_thread):
+        """Testa pré-aquecimento da conexão em thread daemon"""
+        with patch.dict('os.environ', {'GOOGLE_API_KEY': 'test-key'}):
+            AIService(provider='gemini', use_cache=False, prewarm=True)
+            
+            assert mock_thread.call_args.kwargs['daemon'] is True
+            mock_head.assert_not_called()
+            
+            mock_thread.call_args.kwargs['target']()
+            mock_head.assert_called_once()
+    
+    def test_abatch_preserves_order_and_errors(self):
+        """Testa geração em lote assíncrona com falhas individuais"""
+        async def fake_generate(diff_text):
+            if diff_text == "bad diff":
+                raise Exception("falha simulada")
+            return f"feat: {diff_text}"
+
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
+            service = AIService(provider='openai', use_cache=False)
+
+            with patch.object(service, 'agenerate_commit_message', side_effect=fake_generate):
+                results = asyncio.run(service.abatch(["one", "bad diff", "two"], max_concurrency=2))
+
+            assert results[0] == "feat: one"
+            assert isinstance(results[1], Exception)
+            assert results[2] == "feat: two"
+    
+    def test_abatch_closes_async_clients(self):
+        """Testa que os clientes assíncronos são fechados ao final do lote"""
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key', 'ANTHROPIC_API_KEY': 'test-key'}):
+            service = AIService(provider='openai', use_cache=False, race_providers=['claude'])
+            race_service = service._get_race_services()[1]
+        
+        async def fake_generate(diff_text):
+            service._get_async_clients()
+            race_service._get_async_clients()
+            return "feat: ok"
+        
+        async def run():
+            with patch.object(service, 'agenerate_commit_message', side_effect=fake_generate):
+                await service.abatch(["one"])
+            return service._aclient
+        
+        assert asyncio.run(run()) is None
+        assert service._async_client is None
+        assert race_service._aclient is None
+        assert race_service._async_client is None
+
+    
+    def test_generate_openai_streaming(self):
+        """Testa geração em streaming repassando os trechos recebidos"""
+        def chunk(text):
+            return MagicMock(choices=[MagicMock(delta=MagicMock(content=text))])
+        
+        tokens = []
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
+            service = AIService(provider='openai', use_cache=False, stream=True, on_token=tokens.append)
+            service.client = MagicMock()
+            service.client.chat.completions.create.return_value = iter(
+                [chunk("feat: "), chunk(None), chunk("stream ")]
+            )
+            
+            assert service._generate_openai("diff") == "feat: stream"
+            assert tokens == ["feat: ", "stream "]
+            assert service.client.chat.completions.create.call_args.kwargs['stream'] is True
+    
+    def test_generate_ollama_stops_at_first_paragraph(self):
+        """Testa que o stream do Ollama é abandonado após o primeiro parágrafo"""
+        with patch('commit_ai.ai_service._is_available', return_value=True), \
+             patch('commit_ai.ai_service._get_ollama_client'):
+            service = AIService(provider='ollama', use_cache=False)
+        
+        consumed = []
+        def chunks():
+            for text in ["\n", "feat: add", " parser\n", "\nBody line", " never read"]:
+                consumed.append(text)
+                yield {'response': text}
+        
+        service.client = MagicMock()
+        service.client.generate.return_value = chunks()
+        
+        assert service._generate_ollama("diff") == "feat: add parser"
+        assert consumed[-1] == "\nBody line"
+        assert service.client.generate.call_args.kwargs['stream'] is True
+    
+    @patch('commit_ai.ai_service.time.sleep')
+    def test_generate_ollama_retries_errors_while_streaming(self, mock_sleep):
+        """Testa que erros de conexão durante a leitura do stream são repetidos"""
+        with patch('commit_ai.ai_service._is_available', return_value=True), \
+             patch('commit_ai.ai_service._get_ollama_client'):
+            service = AIService(provider='ollama', use_cache=False)
+        
+        def refused():
+            raise ConnectionError("conexão recusada")
+            yield  # pragma: no cover - torna a função um gerador
+        
+        service.client = MagicMock()
+        service.client.generate.side_effect = [refused(), iter([{'response': "fix: retry"}])]
+        
+        assert service._generate_ollama("diff") == "fix: retry"
+        assert service.client.generate.call_count == 2
+    
+    def test_abatch_retries_stalled_request(self):
+        """Testa que uma chamada travada é cancelada e repetida sem travar o lote"""
+        calls = []
+        
+        async def fake_generate(diff_text):
+            calls.append(diff_text)
+            if diff_text == "slow" and calls.count("slow") == 1:
+                await asyncio.sleep(10)
+            return f"feat: {diff_text}"
+        
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
+            service = AIService(provider='openai', use_cache=False, request_timeout=0.05)
+            
+            with patch.object(service, 'agenerate_commit_message', side_effect=fake_generate):
+                results = asyncio.run(service.abatch(["slow", "fast"]))
+            
+            assert results == ["feat: slow", "feat: fast"]
+            assert calls.count("slow") == 2
+    
+    def test_token_bucket_throttles_bursts(self):
+        """Testa que o limitador segura chamadas além da capacidade"""
+        bucket = AsyncTokenBucket(capacity=2, period=0.2)
+        
+        async def acquire_three():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            for _ in range(3):
+                await bucket.acquire()
+            return loop.time() - start
+        
+        elapsed = asyncio.run(acquire_three())
+        
+        assert elapsed >= 0.09  # Terceira chamada espera a reposição (~0.1s)
+    
+    def test_race_providers_returns_first_success(self):
+        """Testa corrida entre providers: falha rápida não derruba a geração"""
+        async def fail_fast(diff_text):
+            raise Exception("5xx simulado")
+        
+        async def succeed_slow(diff_text):
+            await asyncio.sleep(0.01)
+            return "feat: winner"
+        
+        async def never_finishes(diff_text):
+            await asyncio.sleep(10)
+        
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
+            service = AIService(provider='openai', use_cache=False, race_providers=['claude', 'ollama'])
+            participants = [MagicMock(provider=p) for p in ('openai', 'claude', 'ollama')]
+            participants[0]._agenerate_raw = fail_fast
+            participants[1]._agenerate_raw = succeed_slow
+            participants[2]._agenerate_raw = never_finishes
+            
+            with patch.object(service, '_get_race_services', return_value=participants):
+                result = asyncio.run(service._race_providers("diff"))
+            
+            assert result == "feat: winner"
+    
+    def test_race_providers_inside_running_loop(self):
+        """Testa a API síncrona com corrida chamada de dentro de um event loop"""
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
+            service = AIService(provider='openai', use_cache=False, race_providers=['claude'])
+            participants = [MagicMock(provider=p) for p in ('openai', 'claude')]
+            participants[0]._generate.side_effect = Exception("5xx simulado")
+            participants[1]._generate.return_value = "feat: sequencial"
+            
+            async def call_sync_api():
+                return service.generate_commit_message("diff")
+            
+            with patch.object(service, '_get_race_services', return_value=participants):
+                assert asyncio.run(call_sync_api()) == "feat: sequencial"
+    
+    def test_batch_submit_and_poll(self):
+        """Testa envio e coleta de lote pela Batch API"""
+        import json
+        
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
+            service = AIService(provider='openai', use_cache=False)
+            service.client = MagicMock()
+            service.client.files.create.return_value = MagicMock(id='file-1')
+            service.client.batches.create.return_value = MagicMock(id='batch-1')
+            
+            assert service.submit_batch(["diff a", "diff a", "diff b"]) == 'batch-1'
+            
+            payload = service.client.files.create.call_args.kwargs['file'][1].decode('utf-8')
+            batch_requests = [json.loads(line) for line in payload.splitlines()]
+            assert len(batch_requests) == 2  # diffs duplicados viram uma requisição
+            
+            service.client.batches.retrieve.return_value = MagicMock(status='in_progress')
+            assert service.poll_batch('batch-1') is None
+            
+            output = "\n".join(json.dumps({
+                'custom_id': request['custom_id'],
+                'response': {'status_code': 200, 'body': {
+                    'choices': [{'message': {'content': '"feat: batch"'}}]
+                }}
+            }) for request in batch_requests)
+            service.client.batches.retrieve.return_value = MagicMock(status='completed', output_file_id='file-2')
+            service.client.files.content.return_value = MagicMock(text=output)
+            
+            results = service.poll_batch('batch-1')
+            
+            assert set(results) == {request['custom_id'] for request in batch_requests}
+            assert all(message == "feat: batch" for message in results.values())
+    
+    def test_batch_from_file_hits_staged_cache(self, tmp_path):
+        """Testa o fluxo diff salvo em arquivo -> lote -> commit do mesmo diff staged"""
+        import json
+        from commit_ai.cache import CommitCache
+        from commit_ai.main import _read_batch_diffs
+        
+        staged_diff = "diff --git a/a.py b/a.py\n+print('oi')"
+        (tmp_path / 'a.diff').write_text(staged_diff + "\n", encoding='utf-8')  # git diff > a.diff
+        (tmp_path / 'lote.txt').write_text("a.diff\n", encoding='utf-8')
+        
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}), \
+             patch('commit_ai.ai_service.CommitCache', side_effect=lambda: CommitCache(cache_dir=tmp_path)), \
+             patch('commit_ai.batch.commit_ai_home', return_value=tmp_path):
+            service = AIService(provider='openai')
+            service.client = MagicMock()
+            service.client.files.create.return_value = MagicMock(id='file-1')
+            service.client.batches.create.return_value = MagicMock(id='batch-2')
+            
+            entries = _read_batch_diffs(str(tmp_path / 'lote.txt'))
+            service.submit_batch([diff for _, diff in entries], labels=[path for path, _ in entries])
+            
+            payload = service.client.files.create.call_args.kwargs['file'][1].decode('utf-8')
+            custom_id = json.loads(payload)['custom_id']
+            assert service.batch_labels('batch-2') == {custom_id: 'a.diff'}
+            
+            service.client.batches.retrieve.return_value = MagicMock(status='completed', output_file_id='file-2',
+                                                                     error_file_id=None)
+            service.client.files.content.return_value = MagicMock(text=json.dumps({
+                'custom_id': custom_id,
+                'response': {'status_code': 200, 'body': {
+                    'choices': [{'message': {'content': 'feat: via arquivo'}}]
+                }}
+            }))
+            service.poll_batch('batch-2')
+            
+            with patch.object(service, '_generate') as mock_generate:
+                message = service.generate_commit_message(staged_diff, tree_hash="tree-a..tree-b")
+            
+            assert message == "feat: via arquivo"
+            mock_generate.assert_not_called()
+            service.cache.close()
+    
+    def test_batch_poll_without_output_file(self):
+        """Testa lote concluído em que todas as requisições falharam"""
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}):
+            service = AIService(provider='openai', use_cache=False)
+            service.client = MagicMock()
+            service.client.batches.retrieve.return_value = MagicMock(
+                status='completed', output_file_id=None, error_file_id='file-err'
+            )
+            
+            with pytest.raises(Exception, match='file-err'):
+                service.poll_batch('batch-3')
+            service.client.files.content.assert_not_called()
+    
+    def test_batch_results_hit_cache_with_tree_hash(self, tmp_path):
+        """Testa que mensagens do lote são reaproveitadas pela CLI, que usa tree_hash"""
+        import json
+        from commit_ai.cache import CommitCache
+        
+        with patch.dict('os.environ', {'OPENAI_API_KEY': 'test-key'}), \
+             patch('commit_ai.ai_service.CommitCache', side_effect=lambda: CommitCache(cache_dir=tmp_path)):
+            service = AIService(provider='openai')
+            service.client = MagicMock()
+            
+            custom_id = service.cache.make_key("diff lote", service.provider, service.model,
+                                               service.temperature, service.max_tokens)
+            service.client.batches.retrieve.return_value = MagicMock(status='completed', output_file_id='file-2')
+            service.client.files.content.return_value = MagicMock(text=json.dumps({
+                'custom_id': custom_id,
+                'response': {'status_code': 200, 'body': {
+                    'choices': [{'message': {'content': 'feat: do lote'}}]
+                }}
+            }))
+            service.poll_batch('batch-1')
+            
+            with patch.object(service, '_generate') as mock_generate:
+                message = service.generate_commit_message("diff lote", tree_hash="tree-head..tree-index")
+            
+            assert message == "feat: do lote"
+            mock_generate.assert_not_called()
+            service.cache.close()
+
+
+class TestCustomLocalAI:
+    """Testes para o plugin CustomLocalAI"""
+    
+    def make_plugin(self):
+        """Cria o plugin sem consultar o Ollama"""
+        from commit_ai.plugins.custom_local_ai import CustomLocalAI
+        with patch.object(CustomLocalAI, '_check_availability', return_value=True):
+            return CustomLocalAI()
+    
+    def test_session_retries_post_on_503(self):
+        """Testa que o adapter montado repete um POST que recebeu 503"""
+        import threading
+        from http.server import BaseHTTPRequestHandler, HTTPServer
+        
+        statuses = [503, 200]
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                self.send_response(statuses.pop(0))
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+            
+            def log_message(self, *args):
+                pass
+        
+        server = HTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            plugin = self.make_plugin()
+            response = plugin._session.post(
+                f"http://127.0.0.1:{server.server_port}/api/generate", json={}, timeout=5
+            )
+        finally:
+            server.shutdown()
+            server.server_close()
+        
+        assert response.status_code == 200
+        assert statuses == []
+    
+    def test_generate_streams_until_first_paragraph(self):
+        """Testa que a leitura do stream para no primeiro parágrafo"""
+        import json
+        
+        plugin = self.make_plugin()
+        lines = [json.dumps({'response': text, 'done': False}).encode()
+                 for text in ["feat: add", " login\n", "\nCorpo", " nunca lido"]]
+        consumed = []
+        def iter_lines():
+            for line in lines:
+                consumed.append(line)
+                yield line
+        
+        response = MagicMock(status_code=200)
+        response.__enter__.return_value = response
+        response.iter_lines.side_effect = iter_lines
+        
+        with patch.object(plugin._session, 'post', return_value=response) as mock_post:
+            assert plugin.generate_commit_message("+def login(): ...") == "feat: add login"
+        
+        assert len(consumed) == 3
+        response.__exit__.assert_called_once()
+        payload = mock_post.call_args.kwargs['json']
+        assert payload['stream'] is True
+        assert payload['options']['num_predict'] == 100
+    
+    def test_build_commit_prompt_compacts_diff(self):
+        """Testa que o prompt usa o diff compactado e mantém o fim de diffs grandes"""
+        plugin = self.make_plugin()
+        diff = "\n".join(
+            ["diff --git a/a.py b/a.py", "index 1a2b3c4..5d6e7f8 100644", "--- a/a.py", "+++ b/a.py"] +
+            [f"+linha {i}" for i in range(1000)]
+        )
+        
+        prompt = plugin._build_commit_prompt(diff, "conventional")
+        
+        assert "index 1a2b3c4" not in prompt
+        assert "+linha 999" in prompt
+        assert len(prompt) < plugin.MAX_DIFF_CHARS + plugin.PROMPT_CHARS
+    
+    def test_extract_commit_message_chained_prefixes(self):
+        """Testa remoção de prefixos encadeados e uso da primeira linha não vazia"""
+        plugin = self.make_plugin()
+        
+        assert plugin._extract_commit_message("Resposta: Commit: feat: add login") == "feat: add login"
+        assert plugin._extract_commit_message("```\n\nfix: corrige timeout\n```") == "fix: corrige timeout"
+        assert plugin._extract_commit_message("docs: atualiza README\n\nCorpo") == "docs: atualiza README"
+    
+    def test_check_availability_uses_status_cache(self, tmp_path):
+        """Testa que o status do Ollama é consultado uma vez e reaproveitado pelo TTL"""
+        from commit_ai.plugins.custom_local_ai import CustomLocalAI
+        
+        status_file = tmp_path / 'ollama_status.json'
+        tags = MagicMock(status_code=200)
+        tags.json.return_value = {'models': [{'name': 'codellama:7b'}, {'name': 'mistral:7b'}]}
+        
+        with patch('commit_ai.plugins.custom_local_ai.ollama_status_path', return_value=status_file), \
+             patch('requests.Session.get', return_value=tags) as mock_get:
+            plugin = CustomLocalAI()
+            assert plugin.is_available()
+            
+            # Outro modelo usa a lista de modelos em cache, sem nova consulta
+            plugin.set_model('mistral:7b')
+            assert plugin._check_availability()
+            assert mock_get.call_count == 1
+            
+            # Sem o arquivo (--refresh-status), o Ollama é consultado novamente
+            status_file.unlink()
+            assert plugin._check_availability()
+            assert mock_get.call_count == 2
 
 if __name__ == '__main__':
     pytest.main([__file__])
@@ -22,12 +22,9 @@ class TestCommitCache:
     
     def teardown_method(self):
         """Cleanup após cada teste"""
-        # Fechar conexão SQLite se existir
-        if hasattr(self, 'cache') and hasattr(self.cache, 'conn'):
-            try:
-                self.cache.conn.close()
-            except:
-                pass
+        # Fechar conexões SQLite abertas pelo cache
+        if hasattr(self, 'cache'):
+            self.cache.close()
         # Limpar diretório temporário
         import shutil
         import time
@@ -136,7 +133,7 @@ class TestCommitCache:
         assert self.cache.stats()['total_entries'] == 1
         
         # Limpar tudo
-        self.cache.clear_all()
+        assert self.cache.clear_all() == 1
         
         # Verificar que foi limpo
         assert self.cache.stats()['total_entries'] == 0
@@ -158,6 +155,94 @@ class TestCommitCache:
         result = self.cache.get(diff_text, "openai", "gpt-4", 0.3, 100)
         assert result == "second commit"
 
+    
+    def test_database_uses_wal(self):
+        """Testa que o banco de cache é criado em modo WAL"""
+        import sqlite3
+        from contextlib import closing
+        
+        with closing(sqlite3.connect(self.cache.db_path)) as conn:
+            assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    
+    def test_connection_waits_for_locks(self):
+        """Testa que as conexões do cache esperam por locks de outros processos"""
+        conn = self.cache._pool.get()
+        
+        assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == 5000
+    
+    def test_set_and_get_by_key(self):
+        """Testa acesso ao cache com chave pré-calculada"""
+        key = self.cache.make_key("diff", "openai", "gpt-4", 0.3, 100)
+        
+        assert key == self.cache.make_key("diff", "openai", "gpt-4", 0.3, 100)
+        assert key != self.cache.make_key("diff", "openai", "gpt-4", 0.5, 100)
+        
+        self.cache.set_by_key(key, "openai", "gpt-4", 0.3, 100, "feat: by key")
+        
+        assert self.cache.get_by_key(key) == "feat: by key"
+        assert self.cache.get("diff", "openai", "gpt-4", 0.3, 100) == "feat: by key"
+    
+    def test_set_many_by_key(self):
+        """Testa armazenamento em lote com chaves pré-calculadas"""
+        keys = [self.cache.make_key(f"diff {i}", "openai", "gpt-4", 0.3, 100) for i in range(3)]
+        messages = {key: f"feat: lote {i}" for i, key in enumerate(keys)}
+        
+        self.cache.set_many_by_key(messages, "openai", "gpt-4", 0.3, 100)
+        
+        assert self.cache.stats()['total_entries'] == 3
+        assert self.cache.get("diff 1", "openai", "gpt-4", 0.3, 100) == "feat: lote 1"
+    
+    def test_expired_entry_is_miss(self):
+        """Testa que entradas mais antigas que max_age não são retornadas"""
+        import sqlite3
+        from contextlib import closing
+        
+        self.cache.set("diff", "openai", "gpt-4", 0.3, 100, "feat: old")
+        
+        with closing(sqlite3.connect(self.cache.db_path)) as conn:
+            conn.execute("UPDATE commit_cache SET created_at = datetime('now', '-2 hours')")
+            conn.commit()
+        
+        assert self.cache.get("diff", "openai", "gpt-4", 0.3, 100) is None
+        
+        assert self.cache.clear_expired() == 1
+        assert self.cache.stats()['total_entries'] == 0
+    
+    def test_entry_ttl_counts_from_created_at(self):
+        """Testa que a validade restante é contada a partir de created_at"""
+        import sqlite3
+        from contextlib import closing
+        
+        key = self.cache.make_key("diff", "openai", "gpt-4", 0.3, 100)
+        self.cache.set_by_key(key, "openai", "gpt-4", 0.3, 100, "feat: ttl")
+        
+        with closing(sqlite3.connect(self.cache.db_path)) as conn:
+            conn.execute("UPDATE commit_cache SET created_at = datetime('now', '-45 minutes')")
+            conn.commit()
+        
+        message, ttl = self.cache.get_entry_by_key(key)
+        assert message == "feat: ttl"
+        assert 14 * 60 <= ttl <= 15 * 60 + 1
+    
+    def test_clear_notifies_invalidation_listeners(self):
+        """Testa que gravações e limpezas avisam os listeners de invalidação"""
+        from unittest.mock import MagicMock, patch
+        
+        listener = MagicMock()
+        with patch('commit_ai.cache._INVALIDATION_LISTENERS', [listener]):
+            key = self.cache.make_key("diff", "openai", "gpt-4", 0.3, 100)
+            self.cache.set_by_key(key, "openai", "gpt-4", 0.3, 100, "feat: listener")
+            self.cache.clear_all()
+        
+        assert listener.call_args_list[0].args == ([key],)
+        assert listener.call_args_list[1].args == (None,)
+    
+    def test_optimize_keeps_entries(self):
+        """Testa que a otimização do banco preserva as entradas"""
+        self.cache.set("diff", "openai", "gpt-4", 0.3, 100, "feat: optimize")
+        
+        assert self.cache.optimize() is True
+        assert self.cache.get("diff", "openai", "gpt-4", 0.3, 100) == "feat: optimize"
 
 if __name__ == '__main__':
     pytest.main([__file__])
@@ -0,0 +1,43 @@
+"""
+Testes para o ConfigManager
+
+Testa persistência e cache em memória das configurações.
+"""
+
+import pytest
+from unittest.mock import patch
+from commit_ai.config_manager import ConfigManager
+
+
+class TestConfigManager:
+    """Classe de testes para ConfigManager"""
+    
+    def make_manager(self, tmp_path):
+        """Cria um ConfigManager usando um diretório temporário"""
+        with patch('commit_ai.config_manager.commit_ai_home', return_value=tmp_path):
+            return ConfigManager()
+    
+    def test_set_persists_mutated_nested_value(self, tmp_path):
+        """Testa que listas alteradas pelo chamador são gravadas por set"""
+        config_manager = self.make_manager(tmp_path)
+        config_manager.set('enabled_plugins', ['a'])
+        
+        plugins = config_manager.get('enabled_plugins')
+        plugins.append('b')
+        config_manager.set('enabled_plugins', plugins)
+        
+        assert config_manager.get('enabled_plugins') == ['a', 'b']
+        assert self.make_manager(tmp_path).get('enabled_plugins') == ['a', 'b']
+    
+    def test_get_returns_independent_copy(self, tmp_path):
+        """Testa que alterar um valor lido não altera a configuração"""
+        config_manager = self.make_manager(tmp_path)
+        
+        config_manager.get('commit_types').append('wip')
+        
+        assert 'wip' not in config_manager.get('commit_types')
+        assert 'wip' not in config_manager.default_config['commit_types']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -9,7 +9,7 @@ import tempfile
 import os
 import subprocess
 from pathlib import Path
-from commit_ai.git_handler import GitHandler
+from commit_ai.git_handler import GitHandler, get_git_handler
 
 
 class TestGitHandler:
@@ -31,6 +31,7 @@ class TestGitHandler:
     
     def teardown_method(self):
         """Cleanup após cada teste"""
+        self.git_handler.close()
         os.chdir(self.original_cwd)
         # Remove diretório temporário
         import shutil
@@ -79,6 +80,36 @@ class TestGitHandler:
         assert len(changes['Modificados']) == 0
         assert len(changes['Removidos']) == 0
     
+    def test_get_file_changes_all_statuses(self):
+        """Testa classificação de modificados, removidos e renomeados"""
+        Path('a.txt').write_text('a\n' * 20)
+        Path('b.txt').write_text('b')
+        Path('c.txt').write_text('c')
+        subprocess.run(['git', 'add', '.'], check=True)
+        subprocess.run(['git', 'commit', '-m', 'inicial'], check=True, capture_output=True)
+        
+        subprocess.run(['git', 'mv', 'a.txt', 'renomeado.txt'], check=True)
+        subprocess.run(['git', 'rm', '-q', 'b.txt'], check=True)
+        Path('c.txt').write_text('c2')
+        subprocess.run(['git', 'add', 'c.txt'], check=True)
+        
+        changes = self.git_handler.get_file_changes()
+        
+        assert changes['Modificados'] == ['c.txt']
+        assert changes['Removidos'] == ['b.txt']
+        assert changes['Renomeados'] == ['a.txt → renomeado.txt']
+        assert changes['Adicionados'] == []
+    
+    def test_get_file_changes_special_names(self):
+        """Testa nomes com acentos e tabulação"""
+        Path('café.txt').write_text('a')
+        Path('com\ttab.txt').write_text('b')
+        subprocess.run(['git', 'add', '.'], check=True)
+        
+        changes = self.git_handler.get_file_changes()
+        
+        assert sorted(changes['Adicionados']) == ['café.txt', 'com\ttab.txt']
+    
     def test_get_staged_diff(self):
         """Testa obtenção do diff staged"""
         # Cria arquivo e adiciona ao staging
@@ -91,6 +122,64 @@ class TestGitHandler:
         assert 'print("Hello, World!")' in diff
         assert '+' in diff  # Linha adicionada
 
+    
+    def test_get_staged_diff_stream_limit(self):
+        """Testa leitura limitada do diff staged"""
+        assert b''.join(self.git_handler.get_staged_diff_stream()) == b''
+        
+        Path('big.txt').write_text('linha de teste\n' * 10000)
+        subprocess.run(['git', 'add', 'big.txt'], check=True)
+        
+        head = b''.join(self.git_handler.get_staged_diff_stream(max_bytes=1000, chunk_size=300))
+        assert len(head) == 1000
+        assert head.startswith(b'diff --git a/big.txt')
+        
+        full = b''.join(self.git_handler.get_staged_diff_stream())
+        assert full.decode('utf-8').strip() == self.git_handler.get_staged_diff()
+    
+    def test_get_staged_tree_hash(self):
+        """Testa identificador do estado staged"""
+        Path('test.py').write_text('print("a")')
+        subprocess.run(['git', 'add', 'test.py'], check=True)
+        
+        first = self.git_handler.get_staged_tree_hash()
+        assert first is not None
+        assert first == self.git_handler.get_staged_tree_hash()
+        
+        Path('test.py').write_text('print("b")')
+        subprocess.run(['git', 'add', 'test.py'], check=True)
+        
+        assert self.git_handler.get_staged_tree_hash() != first
+    
+    def test_resolve_object_reuses_process(self):
+        """Testa consultas de objetos pelo git cat-file persistente"""
+        assert self.git_handler._resolve_object('HEAD^{tree}') is None
+        
+        Path('test.py').write_text('print("a")')
+        subprocess.run(['git', 'add', 'test.py'], check=True)
+        subprocess.run(['git', 'commit', '-m', 'inicial'], check=True, capture_output=True)
+        
+        proc = self.git_handler._object_reader
+        head_tree = subprocess.run(
+            ['git', 'rev-parse', 'HEAD^{tree}'], check=True, capture_output=True, text=True
+        ).stdout.strip()
+        
+        assert self.git_handler._resolve_object('HEAD^{tree}') == head_tree
+        assert self.git_handler._object_reader is proc
+        
+        self.git_handler.close()
+        assert self.git_handler._object_reader is None
+    
+    def test_get_git_handler_shared(self):
+        """Testa reutilização do GitHandler no mesmo repositório"""
+        handler = get_git_handler()
+        assert handler is get_git_handler()
+        assert handler.git_dir == self.git_handler.git_dir
+        
+        os.chdir(self.original_cwd)
+        other = get_git_handler()
+        assert other is not handler
+        other.close()
 
 if __name__ == '__main__':
     pytest.main([__file__])
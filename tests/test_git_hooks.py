@@ -129,11 +129,11 @@ class TestPreCommitHook:
         """Setup para cada teste"""
         self.hook = PreCommitHook()
     
-    @patch('commit_ai.git_hooks.GitHandler')
+    @patch('commit_ai.git_hooks.get_git_handler')
     @patch('commit_ai.git_hooks.CommitTemplateManager')
     def test_run_with_changes(self, mock_template_manager, mock_git_handler):
         """Testa execução do hook com alterações"""
-        # Mock do GitHandler
+        # Mock do get_git_handler
         mock_git = Mock()
         mock_git.has_staged_changes.return_value = True
         mock_git.get_staged_diff.return_value = "diff content"
@@ -149,10 +149,10 @@ class TestPreCommitHook:
         assert result == 0
         mock_template.analyze_diff_and_suggest_type.assert_called_once()
     
-    @patch('commit_ai.git_hooks.GitHandler')
+    @patch('commit_ai.git_hooks.get_git_handler')
     def test_run_without_changes(self, mock_git_handler):
         """Testa execução do hook sem alterações"""
-        # Mock do GitHandler
+        # Mock do get_git_handler
         mock_git = Mock()
         mock_git.has_staged_changes.return_value = False
         mock_git_handler.return_value = mock_git
@@ -194,9 +194,16 @@ class TestCommitMsgHook:
         finally:
             Path(msg_file).unlink()
     
+    def test_improve_message_keyword_priority(self):
+        """Testa inferência do tipo por palavras-chave"""
+        assert self.hook._improve_message("fixed the Add bug.") == "fix: fixed the add bug"
+        assert self.hook._improve_message("adds thing") == "feat: adds thing"
+        assert self.hook._improve_message("Update readme") == "chore: update readme"
+        assert self.hook._validate_message("feat: nova tela")['checks']['has_type'] is True
+    
     @patch('commit_ai.git_hooks.ConfigManager')
     @patch('commit_ai.git_hooks.AIService')
-    @patch('commit_ai.git_hooks.GitHandler')
+    @patch('commit_ai.git_hooks.get_git_handler')
     def test_auto_improve_message(self, mock_git_handler, mock_ai_service, mock_config):
         """Testa melhoria automática de mensagem"""
         # Mock da configuração
@@ -209,7 +216,7 @@ class TestCommitMsgHook:
         mock_ai.generate_commit_message.return_value = "feat: improved commit message"
         mock_ai_service.return_value = mock_ai
         
-        # Mock do GitHandler
+        # Mock do get_git_handler
         mock_git = Mock()
         mock_git.get_staged_diff.return_value = "diff content"
         mock_git_handler.return_value = mock_git
@@ -239,10 +246,10 @@ class TestPostCommitHook:
         """Setup para cada teste"""
         self.hook = PostCommitHook()
     
-    @patch('commit_ai.git_hooks.GitHandler')
+    @patch('commit_ai.git_hooks.get_git_handler')
     def test_run_analytics(self, mock_git_handler):
         """Testa execução de analytics pós-commit"""
-        # Mock do GitHandler
+        # Mock do get_git_handler
         mock_git = Mock()
         mock_git.get_last_commit_info.return_value = {
             'hash': 'abc123',